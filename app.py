@@ -2,14 +2,19 @@ import os
 import json
 from datetime import datetime, timedelta
 
+import numpy as np
 import plotly.graph_objs as go
 import plotly.io as pio
-from flask import Flask, render_template, redirect, url_for, request, session, jsonify
+from flask import Flask, render_template, redirect, url_for, request, session, jsonify, abort, send_file
 
 from config import config
+from models.portfolio import HoldingsFrame
 from services.auth_service import AuthService
 from services.portfolio_service import PortfolioService
-from utils.decorators import login_required
+from utils.decorators import admin_required, login_required, metrics_token_required
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, observe_chart, registry as metrics_registry
+from utils.profiling import ProfileStore, init_profiling
+from utils.timing import init_timing, route_timings, timed
 
 
 def create_app(config_name=None):
@@ -22,6 +27,13 @@ def create_app(config_name=None):
 
     app.config.from_object(config[config_name])
 
+    if app.config.get('TIMING_ENABLED'):
+        init_timing(app, window=app.config['TIMING_WINDOW'])
+
+    profile_store = ProfileStore(app.config['PROFILING_DIR'], app.config['PROFILING_MAX_PROFILES'])
+    if app.config.get('ADMIN_TOKEN') or app.config.get('PROFILING_SAMPLE_RATE'):
+        init_profiling(app, profile_store, sample_rate=app.config.get('PROFILING_SAMPLE_RATE', 0.0))
+
     # Initialize services
     auth_service = AuthService()
     portfolio_service = PortfolioService()
@@ -99,8 +111,7 @@ def create_app(config_name=None):
             pie_html, bar_html, day_change_html = _create_summary_charts(portfolio_summary)
 
             # Calculate gainers and losers for template
-            gainers = len([h for h in portfolio_summary.holdings if getattr(h, 'day_pnl', 0) > 0])
-            losers = len([h for h in portfolio_summary.holdings if getattr(h, 'day_pnl', 0) < 0])
+            gainers, losers = _count_gainers_losers(portfolio_summary)
 
             return render_template('summary.html',
                                    portfolio=portfolio_summary,
@@ -140,21 +151,14 @@ def create_app(config_name=None):
             }
 
             # Add holdings data
-            for holding in portfolio_summary.holdings:
-                response_data['holdings'].append({
-                    'tradingsymbol': holding.tradingsymbol,
-                    'day_change': getattr(holding, 'day_change', 0),
-                    'day_change_percentage': getattr(holding, 'day_change_percentage', 0),
-                    'day_pnl': getattr(holding, 'day_pnl', 0),
-                    'real_time_price': getattr(holding, 'real_time_price', holding.last_price),
-                    'last_price': holding.last_price,
-                    'current_value': holding.current_value,
-                    'quantity': holding.quantity
-                })
+            frame = _get_holdings_frame(portfolio_summary)
+            response_data['holdings'] = frame.to_records((
+                'tradingsymbol', 'day_change', 'day_change_percentage', 'day_pnl',
+                'real_time_price', 'last_price', 'current_value', 'quantity'
+            ))
 
             # Count gainers and losers
-            gainers = len([h for h in portfolio_summary.holdings if getattr(h, 'day_pnl', 0) > 0])
-            losers = len([h for h in portfolio_summary.holdings if getattr(h, 'day_pnl', 0) < 0])
+            gainers, losers = _count_gainers_losers(portfolio_summary)
 
             response_data['gainers'] = gainers
             response_data['losers'] = losers
@@ -227,110 +231,6 @@ def create_app(config_name=None):
             app.logger.error(f"Error refreshing day change data: {str(e)}")
             return f"Error refreshing day change data: {str(e)}", 500
 
-    def _create_summary_charts(portfolio_summary):
-        """Create enhanced visualizations for portfolio summary including day change"""
-
-        # Check if we have holdings
-        if not portfolio_summary.holdings:
-            # Return empty charts
-            empty_fig = go.Figure()
-            empty_fig.update_layout(
-                title="No data available",
-                height=400,
-                annotations=[dict(text="No holdings data available",
-                                  showarrow=False,
-                                  x=0.5, y=0.5,
-                                  xref="paper", yref="paper")]
-            )
-            empty_html = pio.to_html(empty_fig, full_html=False)
-            return empty_html, empty_html, empty_html
-
-        # Enhanced colors matching original
-        colors = ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#4facfe', '#00f2fe', '#43e97b', '#38f9d7']
-
-        # Pie chart with custom colors and styling
-        pie_fig = go.Figure(data=[go.Pie(
-            labels=[holding.tradingsymbol for holding in portfolio_summary.holdings],
-            values=[holding.current_value for holding in portfolio_summary.holdings],
-            hole=0.4,
-            textinfo='percent+label',
-            hovertemplate='<b>%{label}</b><br>Value: ₹%{value:,.0f}<br>Percentage: %{percent}<extra></extra>',
-            marker=dict(
-                colors=colors[:len(portfolio_summary.holdings)],
-                line=dict(color='white', width=2)
-            )
-        )])
-
-        pie_fig.update_layout(
-            title_text='',
-            height=500,
-            font=dict(size=12),
-            showlegend=True,
-            legend=dict(
-                orientation="v",
-                yanchor="middle",
-                y=0.5,
-                xanchor="left",
-                x=1.05
-            ),
-            margin=dict(t=40, b=20, l=20, r=120)
-        )
-
-        # Enhanced bar chart with conditional coloring for overall returns
-        return_percentages = [holding.return_percentage for holding in portfolio_summary.holdings]
-        symbols = [holding.tradingsymbol for holding in portfolio_summary.holdings]
-
-        bar_fig = go.Figure([go.Bar(
-            x=symbols,
-            y=return_percentages,
-            marker_color=[('#28a745' if val >= 0 else '#dc3545') for val in return_percentages],
-            hovertemplate='<b>%{x}</b><br>Return: %{y:.1f}%<extra></extra>',
-            text=[f"{val:.1f}%" for val in return_percentages],
-            textposition='outside'
-        )])
-
-        bar_fig.update_layout(
-            title_text='',
-            yaxis_title='Return (%)',
-            xaxis_title='Stock',
-            height=500,
-            font=dict(size=12),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=60, l=60, r=20)
-        )
-        bar_fig.update_yaxes(gridcolor='rgba(0,0,0,0.1)')
-
-        # New day change chart with FIXED annotation position
-        day_change_percentages = [getattr(holding, 'day_change_percentage', 0) for holding in portfolio_summary.holdings]
-        day_change_fig = go.Figure([go.Bar(
-            x=symbols,
-            y=day_change_percentages,
-            marker_color=[('#28a745' if val >= 0 else '#dc3545') for val in day_change_percentages],
-            hovertemplate='<b>%{x}</b><br>Day Change: %{y:.1f}%<extra></extra>',
-            text=[f"{val:.1f}%" for val in day_change_percentages],
-            textposition='outside'
-        )])
-
-        day_change_fig.update_layout(
-            title_text='',
-            yaxis_title='Day Change (%)',
-            xaxis_title='Stock',
-            height=400,
-            font=dict(size=12),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=60, l=60, r=20)
-        )
-        day_change_fig.update_yaxes(gridcolor='rgba(0,0,0,0.1)')
-
-        # Convert to HTML
-        pie_html = pio.to_html(pie_fig, full_html=False)
-        bar_html = pio.to_html(bar_fig, full_html=False)
-        day_change_html = pio.to_html(day_change_fig, full_html=False)
-
-        return pie_html, bar_html, day_change_html
-
     @app.route('/portfolio')
     @login_required
     def portfolio():
@@ -362,6 +262,13 @@ def create_app(config_name=None):
                                        start_date=start_date.date(),
                                        end_date=end_date.date())
 
+            # Per-holding risk breakdown (reuses the candles fetched above)
+            try:
+                risk_attribution = portfolio_service.get_risk_attribution(start_date, end_date)
+            except Exception as e:
+                app.logger.error(f"Error computing risk attribution: {str(e)}")
+                risk_attribution = None
+
             # Create visualization
             chart_html = _create_performance_chart(portfolio_metrics, benchmark_metrics)
 
@@ -380,6 +287,7 @@ def create_app(config_name=None):
             return render_template('performance.html',
                                    portfolio_metrics=portfolio_metrics,
                                    benchmark_metrics=benchmark_metrics,
+                                   risk_attribution=risk_attribution,
                                    chart_html=chart_html,
                                    start_date=start_date,
                                    end_date=end_date,
@@ -414,9 +322,9 @@ def create_app(config_name=None):
             for holding in summary.holdings:
                 debug_info['holdings_details'].append({
                     'symbol': holding.tradingsymbol,
-                    'day_change': getattr(holding, 'day_change', 'N/A'),
-                    'day_change_percentage': getattr(holding, 'day_change_percentage', 'N/A'),
-                    'day_pnl': getattr(holding, 'day_pnl', 'N/A'),
+                    'day_change': holding.day_change,
+                    'day_change_percentage': holding.day_change_percentage,
+                    'day_pnl': holding.day_pnl,
                     'last_price': holding.last_price,
                     'quantity': holding.quantity
                 })
@@ -525,6 +433,168 @@ def create_app(config_name=None):
                 'message': str(e)
             }), 500
 
+    @app.route('/api/rolling_statistics')
+    @login_required
+    def api_rolling_statistics():
+        """API endpoint for rolling benchmark statistics and portfolio beta"""
+        try:
+            window_years = max(1, min(int(request.args.get('window_years', 1)), 10))
+            include_portfolio = request.args.get('portfolio', 'true').lower() == 'true'
+
+            rolling = portfolio_service.get_rolling_statistics(window_years, include_portfolio)
+            rolling = rolling.dropna(subset=['rolling_return']) if not rolling.empty else rolling
+            # NaN is not valid JSON
+            rolling = rolling.astype(object).where(rolling.notna(), None)
+
+            return jsonify({
+                'status': 'success',
+                'window_years': window_years,
+                'dates': [date.strftime('%Y-%m-%d') for date in rolling.index],
+                'statistics': {column: rolling[column].tolist() for column in rolling.columns},
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+        except ValueError:
+            return jsonify({'status': 'error', 'message': 'window_years must be an integer'}), 400
+        except Exception as e:
+            app.logger.error(f"Error getting rolling statistics: {str(e)}")
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 500
+
+    @app.route('/api/vix_distribution')
+    @login_required
+    def api_vix_distribution():
+        """API endpoint for the India VIX histogram and percentile rank over time"""
+        try:
+            years = max(1, min(int(request.args.get('years', 3)), 10))
+            bins = max(5, min(int(request.args.get('bins', 30)), 200))
+
+            distribution = portfolio_service.market_data_service.get_vix_distribution(
+                days_back=365 * years, bins=bins
+            )
+            if distribution is None:
+                return jsonify({'status': 'error', 'message': 'No VIX data available'}), 404
+
+            return jsonify({
+                'status': 'success',
+                'years': years,
+                **distribution,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+        except ValueError:
+            return jsonify({'status': 'error', 'message': 'years and bins must be integers'}), 400
+        except Exception as e:
+            app.logger.error(f"Error getting VIX distribution: {str(e)}")
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 500
+
+    @app.route('/metrics')
+    @metrics_token_required
+    def metrics():
+        """Prometheus scrape endpoint for upstream, cache, simulation and chart metrics"""
+        return metrics_registry.render(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
+
+    @app.route('/api/timing')
+    @login_required
+    def api_timing():
+        """API endpoint for the rolling per-route latency breakdown"""
+        return jsonify({
+            'status': 'success',
+            'enabled': bool(app.config.get('TIMING_ENABLED')),
+            'routes': route_timings.breakdown() if app.config.get('TIMING_ENABLED') else {},
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    @app.route('/admin/profiles')
+    @admin_required
+    def admin_profiles():
+        """List saved request profiles"""
+        return jsonify({
+            'status': 'success',
+            'profiles': profile_store.list(),
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    @app.route('/admin/profiles/<profile_id>/<kind>')
+    @admin_required
+    def admin_profile_download(profile_id, kind):
+        """Download a saved profile: 'prof' (pstats dump) or 'txt' (report)"""
+        path = profile_store.path(profile_id, kind)
+        if path is None:
+            abort(404)
+        return send_file(path, as_attachment=True, download_name=f"{profile_id}.{kind}")
+
+    @app.route('/api/projections/sensitivity')
+    @login_required
+    def api_projection_sensitivity():
+        """API endpoint for the expected return x volatility projection heatmap"""
+        try:
+            years = max(1, min(int(request.args.get('years', 10)), 30))
+            return_steps = max(2, min(int(request.args.get('return_steps', 20)), 100))
+            volatility_steps = max(2, min(int(request.args.get('volatility_steps', 20)), 100))
+            return_range = (
+                float(request.args.get('return_min', 0.0)),
+                float(request.args.get('return_max', 0.24))
+            )
+            volatility_range = (
+                max(0.0, float(request.args.get('volatility_min', 0.05))),
+                float(request.args.get('volatility_max', 0.40))
+            )
+            simulations = max(1000, min(int(request.args.get('simulations', 10000)), 100000))
+
+            sensitivity = portfolio_service.get_projection_sensitivity(
+                years=years,
+                return_range=return_range,
+                volatility_range=volatility_range,
+                return_steps=return_steps,
+                volatility_steps=volatility_steps,
+                simulations=simulations
+            )
+
+            return jsonify({
+                'status': 'success',
+                **sensitivity,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        except Exception as e:
+            app.logger.error(f"Error getting projection sensitivity: {str(e)}")
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 500
+
+    @app.route('/api/fire_planner')
+    @login_required
+    def api_fire_planner():
+        """API endpoint for FIRE feasibility across retirement ages and withdrawal rates"""
+        try:
+            plan = portfolio_service.get_fire_plan(
+                annual_expenses=float(request.args.get('expenses', 500000)),
+                current_age=int(request.args.get('current_age', 30)),
+                life_expectancy=int(request.args.get('life_expectancy', 90)),
+                monthly_contribution=float(request.args.get('monthly_contribution', 0)),
+                withdrawal_rate=float(request.args.get('withdrawal_rate', 0.03))
+            )
+
+            return jsonify({
+                'status': 'success',
+                **plan,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        except Exception as e:
+            app.logger.error(f"Error getting FIRE plan: {str(e)}")
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 500
+
     @app.route('/fire')
     @login_required
     def fire_calculator():
@@ -535,6 +605,7 @@ def create_app(config_name=None):
         current_age = int(request.args.get('current_age', 30))
         retirement_age = int(request.args.get('retirement_age', 45))
         life_expectancy = int(request.args.get('life_expectancy', 90))
+        monthly_contribution = request.args.get('monthly_contribution', type=float)  # None: savings needed
 
         try:
             # Get FIRE projections
@@ -542,11 +613,21 @@ def create_app(config_name=None):
                 annual_expenses=annual_expenses,
                 current_age=current_age,
                 retirement_age=retirement_age,
-                life_expectancy=life_expectancy
+                life_expectancy=life_expectancy,
+                monthly_contribution=monthly_contribution
+            )
+
+            # Sweep every retirement age at the simulated SIP
+            fire_plan = portfolio_service.get_fire_plan(
+                annual_expenses=annual_expenses,
+                current_age=current_age,
+                life_expectancy=life_expectancy,
+                monthly_contribution=fire_results['monthly_contribution']
             )
 
             # Create visualization
             fire_chart = _create_fire_progress_chart(fire_results)
+            fire_planner_chart = _create_fire_planner_chart(fire_plan)
 
             # Get portfolio summary
             portfolio_summary = portfolio_service.get_portfolio_summary()
@@ -556,6 +637,8 @@ def create_app(config_name=None):
                 fire=fire_results,
                 portfolio=portfolio_summary,
                 fire_chart=fire_chart,
+                fire_plan=fire_plan,
+                fire_planner_chart=fire_planner_chart,
                 annual_expenses=annual_expenses,
                 current_age=current_age,
                 retirement_age=retirement_age,
@@ -566,339 +649,500 @@ def create_app(config_name=None):
             app.logger.error(f"Error in FIRE calculator: {str(e)}")
             return f"Error calculating FIRE projections: {str(e)}", 500
 
-    def _create_projection_chart(projections):
-        """Create projection distribution visualization with improved readability"""
-
-        # Create histogram of final values
-        fig = go.Figure()
-
-        # Add histogram with better binning
-        fig.add_trace(go.Histogram(
-            x=projections.final_values,
-            nbinsx=40,  # Reduced bins for cleaner look
-            name='Projected Values',
-            marker_color='rgba(102, 126, 234, 0.7)',
-            marker_line=dict(color='rgba(102, 126, 234, 1)', width=1),
-            hovertemplate='<b>Portfolio Value Range</b>: ₹%{x:,.0f}<br><b>Frequency</b>: %{y}<br><extra></extra>'
-        ))
-
-        # Add percentile lines with controlled positioning - avoid extremes with small shifts
-        percentile_colors = {
-            5: '#dc3545',    # Red for worst case
-            25: '#fd7e14',   # Orange
-            50: '#28a745',   # Green for expected
-            75: '#fd7e14',   # Orange
-            95: '#6f42c1'    # Purple for best case
-        }
-
-        percentile_labels = {
-            5: 'Worst Case (5%)',
-            25: '25th Percentile',
-            50: 'Expected (50%)',
-            75: '75th Percentile',
-            95: 'Best Case (95%)'
-        }
-
-        for percentile in [5, 25, 50, 75, 95]:
-            value = projections.percentiles[percentile]
-            color = percentile_colors[percentile]
-            label = percentile_labels[percentile]
-
-            # Use top/bottom with small shifts to stay in middle area
-            # 5%, 50%, 95% slightly above chart center
-            # 25%, 75% slightly below chart center
-            if percentile in [5, 50, 95]:  # Worst case, Expected, Best case
-                annotation_position = "top"
-                y_shift = -30  # Negative shift brings it down from top extreme
-            else:  # 25th, 75th percentiles
-                annotation_position = "bottom"
-                y_shift = 30   # Positive shift brings it up from bottom extreme
-
-            fig.add_vline(
-                x=value,
-                line_dash="dash",
-                line_color=color,
-                line_width=2,
-                annotation_text=f"<b>{label}</b><br>₹{value:,.0f}",
-                annotation_position=annotation_position,
-                annotation_font_size=9,
-                annotation_font_color=color,
-                annotation_bordercolor=color,
-                annotation_borderwidth=1,
-                annotation_bgcolor="rgba(255,255,255,0.95)",
-                annotation_yshift=y_shift
-            )
-
-        # Calculate statistics for subtitle
-        expected_annual_return = projections.expected_return * 100
-        current_value = projections.initial_value
-
-        fig.update_layout(
-            title={
-                'text': f'Portfolio Projection Distribution - {projections.projection_years} Year Outlook<br>' +
-                        f'<sub style="font-size: 12px;">Starting Value: ₹{current_value:,.0f} | ' +
-                        f'Expected Annual Return: {expected_annual_return:.1f}% | ' +
-                        f'Risk of Loss: {projections.probability_of_loss*100:.1f}%</sub>',
-                'x': 0.5,
-                'xanchor': 'center',
-                'font': {'size': 16}
-            },
-            xaxis_title='Portfolio Value (₹)',
-            yaxis_title='Number of Simulations',
-            showlegend=False,
-            height=550,  # Back to reasonable height
-            template='plotly_white',
-            hovermode='x',
-            margin=dict(t=100, b=70, l=60, r=60)  # Moderate margins
-        )
+    return app
 
-        # Format x-axis with better scaling
-        fig.update_xaxes(
-            tickformat=',.0f',
-            tickprefix='₹',
-            tickangle=45,  # Angle ticks to prevent overlap
-            nticks=8  # Limit number of ticks
-        )
 
-        # Format y-axis
-        fig.update_yaxes(
-            tickformat=',d'
-        )
+def _get_holdings_frame(portfolio_summary):
+    """Columnar holdings for a summary, built from the records if not already present"""
+    if portfolio_summary.holdings_frame is not None:
+        return portfolio_summary.holdings_frame
+    return HoldingsFrame.from_holdings(portfolio_summary.holdings)
 
-        return pio.to_html(fig, full_html=False)
 
+def _count_gainers_losers(portfolio_summary):
+    """Count holdings with positive and negative day P&L"""
+    day_pnl = _get_holdings_frame(portfolio_summary)['day_pnl']
+    return int((day_pnl > 0).sum()), int((day_pnl < 0).sum())
 
-    def _create_scenario_chart(scenarios):
-        """Create scenario analysis visualization with improved readability"""
 
-        from plotly.subplots import make_subplots
+@timed('chart.summary')
+@observe_chart('summary')
+def _create_summary_charts(portfolio_summary):
+    """Create enhanced visualizations for portfolio summary including day change"""
 
-        # Prepare data
-        scenario_names = [s.name for s in scenarios]
-        projected_values = [s.projected_value for s in scenarios]
-        probabilities_of_loss = [s.probability_of_loss * 100 for s in scenarios]
-
-        # Create figure with secondary y-axis and better spacing
-        fig = make_subplots(
-            specs=[[{"secondary_y": True}]],
-            subplot_titles=("Market Scenario Analysis",)
+    # Check if we have holdings
+    if not portfolio_summary.holdings:
+        # Return empty charts
+        empty_fig = go.Figure()
+        empty_fig.update_layout(
+            title="No data available",
+            height=400,
+            annotations=[dict(text="No holdings data available",
+                              showarrow=False,
+                              x=0.5, y=0.5,
+                              xref="paper", yref="paper")]
         )
-
-        # Add bar chart for projected values with better colors
-        colors = ['#198754', '#0dcaf0', '#ffc107', '#dc3545']  # Green, Cyan, Yellow, Red
-
-        fig.add_trace(
-            go.Bar(
-                name='Projected Portfolio Value',
-                x=scenario_names,
-                y=projected_values,
-                text=[f'₹{v/1000000:.1f}M' if v >= 1000000 else f'₹{v/100000:.1f}L' for v in projected_values],
-                textposition='outside',
-                textfont=dict(size=11, color='black'),
-                marker_color=colors,
-                marker_line=dict(color='white', width=1),
-                hovertemplate='<b>%{x}</b><br>Projected Value: ₹%{y:,.0f}<br><extra></extra>',
-                width=0.6  # Narrower bars for better appearance
-            ),
-            secondary_y=False,
+        empty_html = pio.to_html(empty_fig, full_html=False)
+        return empty_html, empty_html, empty_html
+
+    frame = _get_holdings_frame(portfolio_summary)
+    symbols = frame['tradingsymbol'].tolist()
+
+    # Enhanced colors matching original
+    colors = ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#4facfe', '#00f2fe', '#43e97b', '#38f9d7']
+
+    # Pie chart with custom colors and styling
+    pie_fig = go.Figure(data=[go.Pie(
+        labels=symbols,
+        values=frame['current_value'],
+        hole=0.4,
+        textinfo='percent+label',
+        hovertemplate='<b>%{label}</b><br>Value: ₹%{value:,.0f}<br>Percentage: %{percent}<extra></extra>',
+        marker=dict(
+            colors=colors[:len(frame)],
+            line=dict(color='white', width=2)
         )
-
-        # Add line chart for probability of loss with better styling
-        fig.add_trace(
-            go.Scatter(
-                name='Risk of Loss (%)',
-                x=scenario_names,
-                y=probabilities_of_loss,
-                mode='lines+markers+text',
-                text=[f'{p:.0f}%' for p in probabilities_of_loss],
-                textposition='top center',
-                textfont=dict(size=11, color='#dc3545'),
-                line=dict(color='#dc3545', width=4),
-                marker=dict(
-                    size=12,
-                    color='#dc3545',
-                    line=dict(color='white', width=2)
-                ),
-                hovertemplate='<b>%{x}</b><br>Risk of Loss: %{y:.1f}%<br><extra></extra>'
-            ),
-            secondary_y=True,
+    )])
+
+    pie_fig.update_layout(
+        title_text='',
+        height=500,
+        font=dict(size=12),
+        showlegend=True,
+        legend=dict(
+            orientation="v",
+            yanchor="middle",
+            y=0.5,
+            xanchor="left",
+            x=1.05
+        ),
+        margin=dict(t=40, b=20, l=20, r=120)
+    )
+
+    # Enhanced bar chart with conditional coloring for overall returns
+    return_percentages = frame['return_percentage']
+
+    bar_fig = go.Figure([go.Bar(
+        x=symbols,
+        y=return_percentages,
+        marker_color=np.where(return_percentages >= 0, '#28a745', '#dc3545'),
+        hovertemplate='<b>%{x}</b><br>Return: %{y:.1f}%<extra></extra>',
+        text=[f"{val:.1f}%" for val in return_percentages],
+        textposition='outside'
+    )])
+
+    bar_fig.update_layout(
+        title_text='',
+        yaxis_title='Return (%)',
+        xaxis_title='Stock',
+        height=500,
+        font=dict(size=12),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(t=40, b=60, l=60, r=20)
+    )
+    bar_fig.update_yaxes(gridcolor='rgba(0,0,0,0.1)')
+
+    # New day change chart with FIXED annotation position
+    day_change_percentages = frame['day_change_percentage']
+    day_change_fig = go.Figure([go.Bar(
+        x=symbols,
+        y=day_change_percentages,
+        marker_color=np.where(day_change_percentages >= 0, '#28a745', '#dc3545'),
+        hovertemplate='<b>%{x}</b><br>Day Change: %{y:.1f}%<extra></extra>',
+        text=[f"{val:.1f}%" for val in day_change_percentages],
+        textposition='outside'
+    )])
+
+    day_change_fig.update_layout(
+        title_text='',
+        yaxis_title='Day Change (%)',
+        xaxis_title='Stock',
+        height=400,
+        font=dict(size=12),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(t=40, b=60, l=60, r=20)
+    )
+    day_change_fig.update_yaxes(gridcolor='rgba(0,0,0,0.1)')
+
+    # Convert to HTML
+    pie_html = pio.to_html(pie_fig, full_html=False)
+    bar_html = pio.to_html(bar_fig, full_html=False)
+    day_change_html = pio.to_html(day_change_fig, full_html=False)
+
+    return pie_html, bar_html, day_change_html
+
+
+@timed('chart.projection')
+@observe_chart('projection')
+def _create_projection_chart(projections):
+    """Create projection distribution visualization with improved readability"""
+
+    # Create histogram of final values
+    fig = go.Figure()
+
+    # Add histogram with better binning
+    fig.add_trace(go.Histogram(
+        x=projections.final_values,
+        nbinsx=40,  # Reduced bins for cleaner look
+        name='Projected Values',
+        marker_color='rgba(102, 126, 234, 0.7)',
+        marker_line=dict(color='rgba(102, 126, 234, 1)', width=1),
+        hovertemplate='<b>Portfolio Value Range</b>: ₹%{x:,.0f}<br><b>Frequency</b>: %{y}<br><extra></extra>'
+    ))
+
+    # Add percentile lines with controlled positioning - avoid extremes with small shifts
+    percentile_colors = {
+        5: '#dc3545',    # Red for worst case
+        25: '#fd7e14',   # Orange
+        50: '#28a745',   # Green for expected
+        75: '#fd7e14',   # Orange
+        95: '#6f42c1'    # Purple for best case
+    }
+
+    percentile_labels = {
+        5: 'Worst Case (5%)',
+        25: '25th Percentile',
+        50: 'Expected (50%)',
+        75: '75th Percentile',
+        95: 'Best Case (95%)'
+    }
+
+    for percentile in [5, 25, 50, 75, 95]:
+        value = projections.percentiles[percentile]
+        color = percentile_colors[percentile]
+        label = percentile_labels[percentile]
+
+        # Use top/bottom with small shifts to stay in middle area
+        # 5%, 50%, 95% slightly above chart center
+        # 25%, 75% slightly below chart center
+        if percentile in [5, 50, 95]:  # Worst case, Expected, Best case
+            annotation_position = "top"
+            y_shift = -30  # Negative shift brings it down from top extreme
+        else:  # 25th, 75th percentiles
+            annotation_position = "bottom"
+            y_shift = 30   # Positive shift brings it up from bottom extreme
+
+        fig.add_vline(
+            x=value,
+            line_dash="dash",
+            line_color=color,
+            line_width=2,
+            annotation_text=f"<b>{label}</b><br>₹{value:,.0f}",
+            annotation_position=annotation_position,
+            annotation_font_size=9,
+            annotation_font_color=color,
+            annotation_bordercolor=color,
+            annotation_borderwidth=1,
+            annotation_bgcolor="rgba(255,255,255,0.95)",
+            annotation_yshift=y_shift
         )
 
-        # Update layout with better spacing and fonts
-        fig.update_layout(
-            height=450,  # Increased height
-            template='plotly_white',
-            hovermode='x unified',
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.05,
-                xanchor="center",
-                x=0.5,
-                font=dict(size=12)
+    # Calculate statistics for subtitle
+    expected_annual_return = projections.expected_return * 100
+    current_value = projections.initial_value
+
+    fig.update_layout(
+        title={
+            'text': f'Portfolio Projection Distribution - {projections.projection_years} Year Outlook<br>' +
+                    f'<sub style="font-size: 12px;">Starting Value: ₹{current_value:,.0f} | ' +
+                    f'Expected Annual Return: {expected_annual_return:.1f}% | ' +
+                    f'Risk of Loss: {projections.probability_of_loss*100:.1f}%</sub>',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 16}
+        },
+        xaxis_title='Portfolio Value (₹)',
+        yaxis_title='Number of Simulations',
+        showlegend=False,
+        height=550,  # Back to reasonable height
+        template='plotly_white',
+        hovermode='x',
+        margin=dict(t=100, b=70, l=60, r=60)  # Moderate margins
+    )
+
+    # Format x-axis with better scaling
+    fig.update_xaxes(
+        tickformat=',.0f',
+        tickprefix='₹',
+        tickangle=45,  # Angle ticks to prevent overlap
+        nticks=8  # Limit number of ticks
+    )
+
+    # Format y-axis
+    fig.update_yaxes(
+        tickformat=',d'
+    )
+
+    return pio.to_html(fig, full_html=False)
+
+
+@timed('chart.scenario')
+@observe_chart('scenario')
+def _create_scenario_chart(scenarios):
+    """Create scenario analysis visualization with improved readability"""
+
+    from plotly.subplots import make_subplots
+
+    # Prepare data
+    scenario_names = [s.name for s in scenarios]
+    projected_values = [s.projected_value for s in scenarios]
+    probabilities_of_loss = [s.probability_of_loss * 100 for s in scenarios]
+
+    # Create figure with secondary y-axis and better spacing
+    fig = make_subplots(
+        specs=[[{"secondary_y": True}]],
+        subplot_titles=("Market Scenario Analysis",)
+    )
+
+    # Add bar chart for projected values with better colors
+    colors = ['#198754', '#0dcaf0', '#ffc107', '#dc3545']  # Green, Cyan, Yellow, Red
+
+    fig.add_trace(
+        go.Bar(
+            name='Projected Portfolio Value',
+            x=scenario_names,
+            y=projected_values,
+            text=[f'₹{v/1000000:.1f}M' if v >= 1000000 else f'₹{v/100000:.1f}L' for v in projected_values],
+            textposition='outside',
+            textfont=dict(size=11, color='black'),
+            marker_color=colors,
+            marker_line=dict(color='white', width=1),
+            hovertemplate='<b>%{x}</b><br>Projected Value: ₹%{y:,.0f}<br><extra></extra>',
+            width=0.6  # Narrower bars for better appearance
+        ),
+        secondary_y=False,
+    )
+
+    # Add line chart for probability of loss with better styling
+    fig.add_trace(
+        go.Scatter(
+            name='Risk of Loss (%)',
+            x=scenario_names,
+            y=probabilities_of_loss,
+            mode='lines+markers+text',
+            text=[f'{p:.0f}%' for p in probabilities_of_loss],
+            textposition='top center',
+            textfont=dict(size=11, color='#dc3545'),
+            line=dict(color='#dc3545', width=4),
+            marker=dict(
+                size=12,
+                color='#dc3545',
+                line=dict(color='white', width=2)
             ),
-            margin=dict(t=100, b=80, l=80, r=80),  # Better margins
+            hovertemplate='<b>%{x}</b><br>Risk of Loss: %{y:.1f}%<br><extra></extra>'
+        ),
+        secondary_y=True,
+    )
+
+    # Update layout with better spacing and fonts
+    fig.update_layout(
+        height=450,  # Increased height
+        template='plotly_white',
+        hovermode='x unified',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.05,
+            xanchor="center",
+            x=0.5,
             font=dict(size=12)
-        )
-
-        # Set y-axes titles with better formatting
-        fig.update_yaxes(
-            title_text="<b>Projected Portfolio Value (₹)</b>",
-            secondary_y=False,
-            tickformat=',.0f',
-            title_font=dict(size=14)
-        )
-        fig.update_yaxes(
-            title_text="<b>Probability of Loss (%)</b>",
-            secondary_y=True,
-            tickformat='.0f',
-            ticksuffix='%',
-            title_font=dict(size=14),
-            range=[0, max(probabilities_of_loss) * 1.2]  # Better range for readability
-        )
-
-        # Format x-axis
-        fig.update_xaxes(
-            title_text="<b>Market Scenario</b>",
-            title_font=dict(size=14),
-            tickfont=dict(size=12)
-        )
-
-        return pio.to_html(fig, full_html=False)
-
-
-    def _create_fire_progress_chart(fire_results):
-        """Create FIRE progress visualization with improved readability"""
-
-        # Create gauge chart for progress
-        current_value = fire_results['current_portfolio_value']
-        fire_number = fire_results['fire_number']
-        progress_percentage = min(100, (current_value / fire_number) * 100)
-
-        # Format values for display
-        current_display = f"₹{current_value/1000000:.1f}M" if current_value >= 1000000 else f"₹{current_value/100000:.1f}L"
-        target_display = f"₹{fire_number/1000000:.1f}M" if fire_number >= 1000000 else f"₹{fire_number/100000:.1f}L"
-
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number+delta",
-            value=progress_percentage,
-            number={'suffix': '%', 'font': {'size': 36}},
-            title={
-                'text': f"<b>Progress to Financial Independence</b><br>" +
-                        f"<span style='font-size: 14px; color: #666;'>Current: {current_display} | " +
-                        f"Target: {target_display}</span>",
-                'font': {'size': 18}
+        ),
+        margin=dict(t=100, b=80, l=80, r=80),  # Better margins
+        font=dict(size=12)
+    )
+
+    # Set y-axes titles with better formatting
+    fig.update_yaxes(
+        title_text="<b>Projected Portfolio Value (₹)</b>",
+        secondary_y=False,
+        tickformat=',.0f',
+        title_font=dict(size=14)
+    )
+    fig.update_yaxes(
+        title_text="<b>Probability of Loss (%)</b>",
+        secondary_y=True,
+        tickformat='.0f',
+        ticksuffix='%',
+        title_font=dict(size=14),
+        range=[0, max(probabilities_of_loss) * 1.2]  # Better range for readability
+    )
+
+    # Format x-axis
+    fig.update_xaxes(
+        title_text="<b>Market Scenario</b>",
+        title_font=dict(size=14),
+        tickfont=dict(size=12)
+    )
+
+    return pio.to_html(fig, full_html=False)
+
+
+@timed('chart.fire_progress')
+@observe_chart('fire_progress')
+def _create_fire_progress_chart(fire_results):
+    """Create FIRE progress visualization with improved readability"""
+
+    # Create gauge chart for progress
+    current_value = fire_results['current_portfolio_value']
+    fire_number = fire_results['fire_number']
+    progress_percentage = min(100, (current_value / fire_number) * 100)
+
+    # Format values for display
+    current_display = f"₹{current_value/1000000:.1f}M" if current_value >= 1000000 else f"₹{current_value/100000:.1f}L"
+    target_display = f"₹{fire_number/1000000:.1f}M" if fire_number >= 1000000 else f"₹{fire_number/100000:.1f}L"
+
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=progress_percentage,
+        number={'suffix': '%', 'font': {'size': 36}},
+        title={
+            'text': f"<b>Progress to Financial Independence</b><br>" +
+                    f"<span style='font-size: 14px; color: #666;'>Current: {current_display} | " +
+                    f"Target: {target_display}</span>",
+            'font': {'size': 18}
+        },
+        delta={
+            'reference': 0,
+            'increasing': {'color': "#28a745"},
+            'decreasing': {'color': "#dc3545"},
+            'suffix': '%',
+            'font': {'size': 16}
+        },
+        gauge={
+            'axis': {
+                'range': [None, 100],
+                'tickwidth': 1,
+                'tickcolor': "darkblue",
+                'ticksuffix': '%',
+                'tickfont': {'size': 12}
             },
-            delta={
-                'reference': 0,
-                'increasing': {'color': "#28a745"},
-                'decreasing': {'color': "#dc3545"},
-                'suffix': '%',
-                'font': {'size': 16}
-            },
-            gauge={
-                'axis': {
-                    'range': [None, 100],
-                    'tickwidth': 1,
-                    'tickcolor': "darkblue",
-                    'ticksuffix': '%',
-                    'tickfont': {'size': 12}
-                },
-                'bar': {'color': "#0d6efd", 'thickness': 0.3},
-                'bgcolor': "white",
-                'borderwidth': 2,
-                'bordercolor': "gray",
-                'steps': [
-                    {'range': [0, 25], 'color': "#f8f9fa"},
-                    {'range': [25, 50], 'color': "#e9ecef"},
-                    {'range': [50, 75], 'color': "#d4edda"},
-                    {'range': [75, 100], 'color': "#d1ecf1"}
-                ],
-                'threshold': {
-                    'line': {'color': "#28a745", 'width': 4},
-                    'thickness': 0.75,
-                    'value': progress_percentage
-                }
+            'bar': {'color': "#0d6efd", 'thickness': 0.3},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "gray",
+            'steps': [
+                {'range': [0, 25], 'color': "#f8f9fa"},
+                {'range': [25, 50], 'color': "#e9ecef"},
+                {'range': [50, 75], 'color': "#d4edda"},
+                {'range': [75, 100], 'color': "#d1ecf1"}
+            ],
+            'threshold': {
+                'line': {'color': "#28a745", 'width': 4},
+                'thickness': 0.75,
+                'value': progress_percentage
             }
-        ))
-
-        fig.update_layout(
-            height=450,
-            font={'size': 14},
-            margin=dict(t=80, b=40, l=40, r=40)
-        )
-
-        return pio.to_html(fig, full_html=False)
-
-
-    def _create_performance_chart(portfolio_metrics, benchmark_metrics):
-        """Create performance comparison chart with improved readability"""
-        fig = go.Figure()
-
-        # Portfolio line with better styling
+        }
+    ))
+
+    fig.update_layout(
+        height=450,
+        font={'size': 14},
+        margin=dict(t=80, b=40, l=40, r=40)
+    )
+
+    return pio.to_html(fig, full_html=False)
+
+
+@timed('chart.fire_planner')
+@observe_chart('fire_planner')
+def _create_fire_planner_chart(fire_plan):
+    """Create heatmap of funded ratio by retirement age and withdrawal rate"""
+
+    funded_percent = np.minimum(np.array(fire_plan['funded_ratio']) * 100, 200)
+
+    fig = go.Figure(go.Heatmap(
+        z=funded_percent.T,
+        x=fire_plan['ages'],
+        y=[f"{rate * 100:.2f}%" for rate in fire_plan['withdrawal_rates']],
+        colorscale=[[0, '#dc3545'], [0.5, '#ffc107'], [0.5, '#d4edda'], [1, '#28a745']],
+        zmin=0,
+        zmax=200,
+        colorbar={'title': 'Funded %'},
+        hovertemplate='Retire at %{x}<br>Withdrawal rate %{y}<br>Funded: %{z:.0f}%<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title="FIRE Feasibility by Retirement Age",
+        xaxis_title="Retirement Age",
+        yaxis_title="Withdrawal Rate",
+        height=450,
+        margin=dict(t=60, b=40, l=60, r=40)
+    )
+
+    return pio.to_html(fig, full_html=False)
+
+
+@timed('chart.performance')
+@observe_chart('performance')
+def _create_performance_chart(portfolio_metrics, benchmark_metrics):
+    """Create performance comparison chart with improved readability"""
+    fig = go.Figure()
+
+    # Portfolio line with better styling
+    fig.add_trace(go.Scatter(
+        x=portfolio_metrics.cumulative_returns.index,
+        y=portfolio_metrics.cumulative_returns * 100,
+        mode='lines',
+        name='Your Portfolio',
+        line=dict(width=4, color='#0d6efd'),
+        hovertemplate='<b>Your Portfolio</b><br>Date: %{x}<br>Return: %{y:.2f}%<extra></extra>'
+    ))
+
+    # Benchmark line with contrasting style
+    if benchmark_metrics:
         fig.add_trace(go.Scatter(
-            x=portfolio_metrics.cumulative_returns.index,
-            y=portfolio_metrics.cumulative_returns * 100,
+            x=benchmark_metrics.cumulative_returns.index,
+            y=benchmark_metrics.cumulative_returns * 100,
             mode='lines',
-            name='Your Portfolio',
-            line=dict(width=4, color='#0d6efd'),
-            hovertemplate='<b>Your Portfolio</b><br>Date: %{x}<br>Return: %{y:.2f}%<extra></extra>'
+            name='Nifty 50 Benchmark',
+            line=dict(dash='dot', width=3, color='#dc3545'),
+            hovertemplate='<b>Nifty 50</b><br>Date: %{x}<br>Return: %{y:.2f}%<extra></extra>'
         ))
 
-        # Benchmark line with contrasting style
-        if benchmark_metrics:
-            fig.add_trace(go.Scatter(
-                x=benchmark_metrics.cumulative_returns.index,
-                y=benchmark_metrics.cumulative_returns * 100,
-                mode='lines',
-                name='Nifty 50 Benchmark',
-                line=dict(dash='dot', width=3, color='#dc3545'),
-                hovertemplate='<b>Nifty 50</b><br>Date: %{x}<br>Return: %{y:.2f}%<extra></extra>'
-            ))
-
-        fig.update_layout(
-            title={
-                'text': '<b>Portfolio Performance vs Benchmark</b><br><sub>Cumulative Returns Comparison</sub>',
-                'x': 0.5,
-                'xanchor': 'center',
-                'font': {'size': 18}
-            },
-            xaxis_title='<b>Date</b>',
-            yaxis_title='<b>Cumulative Return (%)</b>',
-            template='plotly_white',
-            hovermode='x unified',
-            height=550,
-            font=dict(size=12),
-            legend=dict(
-                orientation="v",  # Changed to vertical
-                yanchor="top",
-                y=0.98,
-                xanchor="left",
-                x=1.02,  # Position to the right of the chart
-                font=dict(size=14),
-                bgcolor="rgba(255,255,255,0.9)",
-                bordercolor="rgba(0,0,0,0.2)",
-                borderwidth=1
-            ),
-            margin=dict(t=100, b=60, l=60, r=120)  # Increased right margin for legend space
-        )
+    fig.update_layout(
+        title={
+            'text': '<b>Portfolio Performance vs Benchmark</b><br><sub>Cumulative Returns Comparison</sub>',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 18}
+        },
+        xaxis_title='<b>Date</b>',
+        yaxis_title='<b>Cumulative Return (%)</b>',
+        template='plotly_white',
+        hovermode='x unified',
+        height=550,
+        font=dict(size=12),
+        legend=dict(
+            orientation="v",  # Changed to vertical
+            yanchor="top",
+            y=0.98,
+            xanchor="left",
+            x=1.02,  # Position to the right of the chart
+            font=dict(size=14),
+            bgcolor="rgba(255,255,255,0.9)",
+            bordercolor="rgba(0,0,0,0.2)",
+            borderwidth=1
+        ),
+        margin=dict(t=100, b=60, l=60, r=120)  # Increased right margin for legend space
+    )
+
+    # Format axes
+    fig.update_xaxes(
+        tickfont=dict(size=11),
+        title_font=dict(size=14)
+    )
+    fig.update_yaxes(
+        tickformat='.1f',
+        ticksuffix='%',
+        tickfont=dict(size=11),
+        title_font=dict(size=14),
+        gridcolor='rgba(0,0,0,0.1)'
+    )
+
+    return pio.to_html(fig, full_html=False)
 
-        # Format axes
-        fig.update_xaxes(
-            tickfont=dict(size=11),
-            title_font=dict(size=14)
-        )
-        fig.update_yaxes(
-            tickformat='.1f',
-            ticksuffix='%',
-            tickfont=dict(size=11),
-            title_font=dict(size=14),
-            gridcolor='rgba(0,0,0,0.1)'
-        )
-
-        return pio.to_html(fig, full_html=False)
-
-    return app
 
 if __name__ == '__main__':
     app = create_app()
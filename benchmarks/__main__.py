@@ -0,0 +1,80 @@
+"""
+Run the benchmark suite or compare two result files.
+
+    python -m benchmarks run --output benchmarks/baselines/laptop.json
+    python -m benchmarks run --filter monte_carlo --baseline benchmarks/baselines/laptop.json
+    python -m benchmarks compare benchmarks/baselines/laptop.json benchmarks/results/latest.json
+
+Exits with status 1 when any case is slower than the baseline by more than the
+threshold.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import cases  # noqa: F401  (registers the benchmarks)
+from benchmarks.runner import (
+    compare_results, format_comparison, format_seconds, load_results, run_benchmarks, save_results
+)
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'latest.json')
+
+
+def report(rows) -> int:
+    print(format_comparison(rows))
+    regressions = [row for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f"\n{len(regressions)} regression(s)")
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Run benchmarks and save the results as JSON')
+    run.add_argument('--filter', help='Only run cases whose name contains this text')
+    run.add_argument('--output', default=DEFAULT_OUTPUT, help='Results file (default: %(default)s)')
+    run.add_argument('--budget', type=float, default=1.0, help='Seconds of timing per case')
+    run.add_argument('--baseline', help='Compare against this results file when done')
+    run.add_argument('--threshold', type=float, default=0.15, help='Relative slowdown flagged as a regression')
+
+    compare = commands.add_parser('compare', help='Compare two results files')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.15, help='Relative slowdown flagged as a regression')
+    compare.add_argument('--stat', default='median', choices=['min', 'median', 'mean'])
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        rows = compare_results(load_results(args.baseline), load_results(args.current), args.threshold, args.stat)
+        return report(rows)
+
+    results = run_benchmarks(
+        args.filter,
+        budget=args.budget,
+        progress=lambda case, timing: print(
+            f"{case:<70} {format_seconds(timing['median']):>10}  ({timing['rounds']} rounds)", flush=True
+        )
+    )
+    save_results(results, args.output)
+    print(f"\nSaved {len(results['results'])} results to {args.output}")
+
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        if args.filter:
+            baseline['results'] = {
+                case: timing for case, timing in baseline['results'].items() if args.filter in case
+            }
+        print()
+        return report(compare_results(baseline, results, args.threshold))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
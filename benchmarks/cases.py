@@ -0,0 +1,145 @@
+"""
+Benchmarks for the projection, calculation, service and chart hot paths.
+
+Service benchmarks run PortfolioService against SyntheticUpstoxService, which
+serves the same synthetic data as devtools/fake_upstox.py straight from memory,
+so they time the analysis code rather than the network.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.runner import benchmark
+from devtools.synthetic_data import SyntheticUpstoxService
+from services.portfolio_service import PortfolioService
+from utils.calculations import FinancialCalculator
+from utils.projections import PortfolioProjector
+
+CURRENT_VALUE = 1000000
+
+
+def stub_portfolio_service(holdings: int, years: int = 3) -> PortfolioService:
+    """PortfolioService wired to an in-memory data source"""
+    service = PortfolioService()
+    stub = SyntheticUpstoxService(holdings=holdings, years=years)
+    service.upstox_service = stub
+    service.market_data_service.upstox_service = stub
+    return service
+
+
+def daily_returns(years: int, seed: int = 0) -> pd.Series:
+    dates = pd.bdate_range(end=datetime.now().date(), periods=252 * years)
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.standard_t(4, len(dates)) * 0.008 + 0.0004, index=dates)
+
+
+@benchmark('monte_carlo.parametric', simulations=[1000, 10000, 100000], years=[5, 30])
+def monte_carlo_parametric(simulations, years):
+    projector = PortfolioProjector()
+    return lambda: projector.monte_carlo_projection(
+        CURRENT_VALUE, expected_return=0.12, volatility=0.2, years=years,
+        simulations=simulations, method='parametric', random_seed=1
+    )
+
+
+@benchmark('monte_carlo.historical', simulations=[1000, 10000, 100000], years=[5, 30])
+def monte_carlo_historical(simulations, years):
+    projector = PortfolioProjector()
+    returns = daily_returns(3)
+    return lambda: projector.monte_carlo_projection(
+        CURRENT_VALUE, historical_returns=returns, years=years,
+        simulations=simulations, method='historical', random_seed=1
+    )
+
+
+@benchmark('scenario_analysis', years=[5, 30])
+def scenario_analysis(years):
+    projector = PortfolioProjector()
+    return lambda: projector.scenario_analysis(CURRENT_VALUE, years=years)
+
+
+@benchmark('calculate_metrics', days=[252, 2520, 25200])
+def calculate_metrics(days):
+    calculator = FinancialCalculator()
+    returns = daily_returns(max(1, days // 252)).iloc[:days]
+    return lambda: calculator.calculate_metrics(returns)
+
+
+@benchmark('portfolio_summary', holdings=[10, 100, 1000])
+def portfolio_summary(holdings):
+    service = stub_portfolio_service(holdings)
+
+    def run():
+        service.refresh_cache()
+        return service.get_portfolio_summary()
+    return run
+
+
+@benchmark('performance_analysis', holdings=[10, 100], years=[1, 3], cache=['cold', 'warm'])
+def performance_analysis(holdings, years, cache):
+    service = stub_portfolio_service(holdings, years=years)
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=365 * years)
+
+    def run():
+        if cache == 'cold':
+            service.refresh_cache()
+        return service.get_performance_analysis(start_date, end_date)
+    return run
+
+
+@benchmark('charts.summary', holdings=[10, 100, 1000])
+def summary_charts(holdings):
+    from app import _create_summary_charts
+
+    summary = stub_portfolio_service(holdings).get_portfolio_summary()
+    return lambda: _create_summary_charts(summary)
+
+
+@benchmark('charts.projection')
+def projection_chart():
+    from app import _create_projection_chart
+
+    projections = PortfolioProjector().monte_carlo_projection(
+        CURRENT_VALUE, expected_return=0.12, volatility=0.2, years=10, simulations=10000, random_seed=1
+    )
+    return lambda: _create_projection_chart(projections)
+
+
+@benchmark('charts.scenario')
+def scenario_chart():
+    from app import _create_scenario_chart
+
+    scenarios = PortfolioProjector().scenario_analysis(CURRENT_VALUE, years=5)
+    return lambda: _create_scenario_chart(scenarios)
+
+
+@benchmark('charts.fire_progress')
+def fire_progress_chart():
+    from app import _create_fire_progress_chart
+
+    fire = PortfolioProjector().calculate_fire_number(600000, 30, 45)
+    fire['current_portfolio_value'] = CURRENT_VALUE
+    return lambda: _create_fire_progress_chart(fire)
+
+
+@benchmark('charts.fire_planner')
+def fire_planner_chart():
+    from app import _create_fire_planner_chart
+
+    plan = PortfolioProjector().fire_planner(CURRENT_VALUE, 600000, 30, monthly_contribution=50000)
+    plan = {key: value.tolist() for key, value in plan.items()}
+    return lambda: _create_fire_planner_chart(plan)
+
+
+@benchmark('charts.performance')
+def performance_chart():
+    from app import _create_performance_chart
+
+    end_date = datetime.now()
+    portfolio_metrics, benchmark_metrics, _ = stub_portfolio_service(20).get_performance_analysis(
+        end_date - timedelta(days=365), end_date
+    )
+    return lambda: _create_performance_chart(portfolio_metrics, benchmark_metrics)
@@ -0,0 +1,206 @@
+"""
+Benchmark registry, timing and baseline comparison.
+
+A benchmark is a setup function registered with @benchmark; it builds its inputs
+and returns the zero-argument callable to time, so setup cost stays out of the
+measurement. Each parameter combination becomes its own named case, e.g.
+"monte_carlo.parametric[simulations=10000,years=30]".
+"""
+
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS: List['Benchmark'] = []
+
+
+@dataclass
+class Benchmark:
+    """A registered setup function and its parameter grid"""
+    name: str
+    setup: Callable[..., Callable[[], object]]
+    params: Dict[str, list] = field(default_factory=dict)
+
+    def cases(self):
+        """Yield (case name, kwargs) for every parameter combination"""
+        if not self.params:
+            yield self.name, {}
+            return
+
+        keys = list(self.params)
+        for values in itertools.product(*(self.params[key] for key in keys)):
+            kwargs = dict(zip(keys, values))
+            label = ','.join(f"{key}={value}" for key, value in kwargs.items())
+            yield f"{self.name}[{label}]", kwargs
+
+
+def benchmark(name: str, **params):
+    """Register a setup function; keyword arguments give the values to sweep"""
+    def decorator(setup):
+        BENCHMARKS.append(Benchmark(name, setup, params))
+        return setup
+    return decorator
+
+
+def measure(func: Callable[[], object], min_rounds: int = 3, max_rounds: int = 50,
+            budget: float = 1.0) -> Dict[str, float]:
+    """
+    Time a callable
+
+    Runs one warm-up call, then repeats until min_rounds calls and the time
+    budget are both used up (capped at max_rounds). Output printed by the code
+    under test is discarded.
+
+    Returns:
+        Dictionary with min, median, mean and stdev seconds and the round count
+    """
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+        started = time.perf_counter()
+        while len(timings) < max_rounds:
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+            if len(timings) >= min_rounds and time.perf_counter() - started >= budget:
+                break
+
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'rounds': len(timings)
+    }
+
+
+def run_benchmarks(pattern: Optional[str] = None, budget: float = 1.0,
+                   progress: Optional[Callable[[str, Dict[str, float]], None]] = None) -> Dict:
+    """
+    Run every registered case whose name contains pattern
+
+    Returns:
+        Dictionary with environment 'meta' and per-case 'results'
+    """
+    results = {}
+    for bench in BENCHMARKS:
+        for case, kwargs in bench.cases():
+            if pattern and pattern not in case:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                func = bench.setup(**kwargs)
+            results[case] = measure(func, budget=budget)
+            if progress:
+                progress(case, results[case])
+
+    return {'meta': environment(), 'results': results}
+
+
+def environment() -> Dict[str, str]:
+    """Machine and library versions the results were measured with"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def save_results(results: Dict, path: str):
+    """Write results as JSON, creating the directory if needed"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = 0.15,
+                    stat: str = 'median') -> List[Dict]:
+    """
+    Compare two result sets case by case
+
+    Args:
+        baseline: Results to compare against
+        current: New results
+        threshold: Relative slowdown that counts as a regression (0.15 = 15%)
+        stat: Timing statistic to compare
+
+    Returns:
+        One row per case with both timings, the ratio and a status of
+        'regression', 'improvement', 'ok', 'new' or 'missing'
+    """
+    base_results = baseline.get('results', {})
+    current_results = current.get('results', {})
+    rows = []
+
+    for case in sorted(set(base_results) | set(current_results)):
+        before = base_results.get(case, {}).get(stat)
+        after = current_results.get(case, {}).get(stat)
+
+        if before is None or after is None:
+            rows.append({'case': case, 'baseline': before, 'current': after, 'ratio': None,
+                         'status': 'new' if before is None else 'missing'})
+            continue
+
+        ratio = after / before if before > 0 else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'case': case, 'baseline': before, 'current': after, 'ratio': ratio, 'status': status})
+
+    return rows
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '-'
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.3f}s"
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    """Render comparison rows as a fixed-width table"""
+    width = max([len(row['case']) for row in rows] + [4])
+    lines = [f"{'case':<{width}}  {'baseline':>10}  {'current':>10}  {'ratio':>7}  status"]
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else '-'
+        lines.append(
+            f"{row['case']:<{width}}  {format_seconds(row['baseline']):>10}  "
+            f"{format_seconds(row['current']):>10}  {ratio:>7}  {row['status']}"
+        )
+    return '\n'.join(lines)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -16,23 +17,51 @@ class Config:
     UPSTOX_API_SECRET = os.environ.get('UPSTOX_API_SECRET')
     UPSTOX_REDIRECT_URI = os.environ.get('UPSTOX_REDIRECT_URI')
 
-    # API URLs
-    UPSTOX_BASE_URL = 'https://api.upstox.com'
+    # API URLs (point UPSTOX_BASE_URL at devtools/fake_upstox.py to work offline)
+    UPSTOX_BASE_URL = os.environ.get('UPSTOX_BASE_URL', 'https://api.upstox.com').rstrip('/')
     UPSTOX_AUTH_URL = f'{UPSTOX_BASE_URL}/v2/login/authorization/dialog'
     UPSTOX_TOKEN_URL = f'{UPSTOX_BASE_URL}/v2/login/authorization/token'
     UPSTOX_HOLDINGS_URL = f'{UPSTOX_BASE_URL}/v2/portfolio/long-term-holdings'
     UPSTOX_HISTORICAL_URL = f'{UPSTOX_BASE_URL}/v3/historical-candle'
     UPSTOX_MARKET_QUOTES_URL = f'{UPSTOX_BASE_URL}/v2/market-quote/quotes'
 
+    # Client-side rate limits per Upstox endpoint: list of (requests, period_seconds)
+    # windows. Upstox allows 50/sec, 500/min and 2000/30min for standard APIs.
+    UPSTOX_RATE_LIMITS = {
+        'default': [(50, 1), (500, 60), (2000, 1800)],
+        'holdings': [(50, 1), (500, 60), (2000, 1800)],
+        'market_quotes': [(50, 1), (500, 60), (2000, 1800)],
+        'historical': [(25, 1), (250, 60), (1000, 1800)],
+    }
+    UPSTOX_MAX_RETRIES = 5
+    UPSTOX_BACKOFF_BASE = 0.5  # Seconds, doubled on every retry
+    UPSTOX_BACKOFF_MAX = 30    # Seconds
+
     # Benchmark configuration
     BENCHMARK_SYMBOL = 'NSE_INDEX|Nifty 50'
 
+    # Market parameter lookback windows (years) and their weight in the blended estimate
+    MARKET_PARAMETER_WINDOWS = {10: 0.5, 5: 0.3, 3: 0.2}
+
     # Default date range
     DEFAULT_ANALYSIS_DAYS = 30
 
     # Cache settings
     CACHE_TIMEOUT = timedelta(minutes=15)
 
+    # Request timing: Server-Timing headers and a rolling per-route breakdown at /api/timing
+    TIMING_ENABLED = os.environ.get('TIMING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    TIMING_WINDOW = 200  # Requests kept per route
+
+    # Admin token (X-Admin-Token header) for /admin routes and flagged profiling (?profile=1)
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    # Fraction of requests profiled with cProfile + tracemalloc, saved for download from /admin/profiles
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+    PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'upstox-portfolio-profiles'))
+    PROFILING_MAX_PROFILES = 50
+    # Bearer token for Prometheus scrapes of /metrics (the admin token also works); unset with no ADMIN_TOKEN hides it
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
     # Validate required environment variables
     if not UPSTOX_API_KEY:
         raise ValueError("UPSTOX_API_KEY environment variable is required")
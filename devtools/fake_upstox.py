@@ -0,0 +1,151 @@
+"""
+Local stand-in for the Upstox API.
+
+Serves synthetic holdings, market quotes and daily candles on the same paths and
+in the same JSON shapes as the endpoints UpstoxService calls, so fetch pipelines
+can be exercised and benchmarked offline. Point the app at it with
+
+    python -m devtools.fake_upstox --port 5001 --holdings 200
+    UPSTOX_BASE_URL=http://127.0.0.1:5001 python app.py
+
+Latency, HTTP 429s and 5xx errors can be injected to exercise the rate limiter
+and retry paths. Every series is seeded from the instrument key, so repeated
+runs see identical data (see devtools/synthetic_data.py).
+"""
+
+import argparse
+import random
+import threading
+import time
+from urllib.parse import urlencode
+
+from flask import Flask, jsonify, redirect, request
+
+from devtools.synthetic_data import SyntheticMarket
+
+
+def create_fake_upstox_app(
+        holdings: int = 50,
+        years: int = 10,
+        seed: int = 0,
+        latency: float = 0.0,
+        rate_limit_probability: float = 0.0,
+        error_probability: float = 0.0,
+        retry_after: int = 1
+) -> Flask:
+    """
+    Build the stand-in API
+
+    Args:
+        holdings: Number of synthetic holdings
+        years: Years of daily candles per instrument
+        seed: Seed for the data and for fault injection
+        latency: Seconds to sleep before answering each API call
+        rate_limit_probability: Chance of answering an API call with HTTP 429
+        error_probability: Chance of answering an API call with HTTP 500
+        retry_after: Retry-After seconds sent with 429 responses
+
+    Returns:
+        Flask app serving the Upstox endpoints
+    """
+    app = Flask(__name__)
+    app.config['SYNTHETIC_MARKET'] = market = SyntheticMarket(seed=seed, years=years, holdings=holdings)
+    faults = random.Random(seed)
+    faults_lock = threading.Lock()
+
+    def error(status: int, message: str, **headers):
+        response = jsonify({
+            'status': 'error',
+            'errors': [{'errorCode': f'UDAPI{status}', 'message': message}]
+        })
+        response.status_code = status
+        response.headers.update(headers)
+        return response
+
+    @app.before_request
+    def simulate_network():
+        if request.path.startswith('/v2/login'):
+            return None
+
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return error(401, 'Invalid token used to access API')
+
+        if latency > 0:
+            time.sleep(latency)
+
+        with faults_lock:
+            draw = faults.random()
+        if draw < rate_limit_probability:
+            return error(429, 'Too many requests', **{'Retry-After': str(retry_after)})
+        if draw < rate_limit_probability + error_probability:
+            return error(500, 'Something went wrong')
+        return None
+
+    @app.route('/v2/login/authorization/dialog')
+    def authorization_dialog():
+        redirect_uri = request.args.get('redirect_uri', '')
+        return redirect(f"{redirect_uri}?{urlencode({'code': 'fake-authorization-code'})}")
+
+    @app.route('/v2/login/authorization/token', methods=['POST'])
+    def authorization_token():
+        return jsonify({
+            'access_token': 'fake-access-token',
+            'user_id': 'FAKE01',
+            'user_name': 'Fake User',
+            'exchanges': ['NSE', 'BSE']
+        })
+
+    @app.route('/v2/portfolio/long-term-holdings')
+    def long_term_holdings():
+        return jsonify({'status': 'success', 'data': market.holding_records})
+
+    @app.route('/v2/market-quote/quotes')
+    def market_quotes():
+        keys = [key for key in request.args.get('instrument_key', '').split(',') if key]
+        if not keys:
+            return error(400, 'instrument_key is required')
+        if len(keys) > 500:
+            return error(400, 'Maximum 500 instrument keys allowed')
+
+        return jsonify({'status': 'success', 'data': market.quotes_payload(keys)})
+
+    @app.route('/v3/historical-candle/<path:instrument_key>/<unit>/<int:interval>/<to_date>/<from_date>')
+    def historical_candles(instrument_key, unit, interval, to_date, from_date):
+        if unit != 'days' or interval != 1:
+            return error(400, 'Only daily candles are simulated')
+        try:
+            candles = market.candle_payload(instrument_key, from_date, to_date)
+        except ValueError:
+            return error(400, 'Invalid date format')
+        return jsonify({'status': 'success', 'data': {'candles': candles}})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Upstox API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--holdings', type=int, default=50, help='Number of synthetic holdings')
+    parser.add_argument('--years', type=int, default=10, help='Years of daily candles')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every API call')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Probability of HTTP 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of HTTP 500')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds on 429')
+    args = parser.parse_args()
+
+    app = create_fake_upstox_app(
+        holdings=args.holdings,
+        years=args.years,
+        seed=args.seed,
+        latency=args.latency,
+        rate_limit_probability=args.rate_limit,
+        error_probability=args.error_rate,
+        retry_after=args.retry_after
+    )
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
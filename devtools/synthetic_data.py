@@ -0,0 +1,278 @@
+"""
+Deterministic synthetic portfolio and market data for scale testing.
+
+SyntheticMarket simulates a Nifty-like index with GJR-GARCH volatility and
+Student-t shocks, an India VIX series implied by that volatility (so it rises
+when the index falls), and any number of stocks driven by the index, a sector
+factor and fat-tailed idiosyncratic noise. Every instrument's path is seeded
+from the market seed and its instrument key, so series are reproducible and
+independent of the order they are requested in.
+
+Outputs come in the shapes the app consumes: Holding lists, Upstox holdings
+and market-quote payloads, raw candle lists as the v3 historical-candle API
+returns them, and the DataFrame UpstoxService.get_historical_data builds.
+SyntheticUpstoxService wraps it all as an in-memory drop-in for UpstoxService.
+"""
+
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from models.portfolio import Holding
+from services.market_data_service import VIX_INSTRUMENT_TOKEN
+
+TRADING_DAYS_PER_YEAR = 252
+TIMEZONE = 'Asia/Kolkata'
+IST_OFFSET = timezone(timedelta(hours=5, minutes=30))  # What pandas parses the API's "+05:30" timestamps to
+
+
+class SyntheticMarket:
+    """Seeded index, VIX and stock price histories"""
+
+    def __init__(
+            self,
+            seed: int = 0,
+            years: int = 10,
+            holdings: int = 50,
+            sectors: int = 10,
+            end_date: Optional[datetime] = None,
+            cache_candles: bool = True
+    ):
+        """
+        Args:
+            seed: Seed for every generated series
+            years: Years of daily history
+            holdings: Number of holdings in the synthetic portfolio
+            sectors: Number of sector factors shared between stocks
+            end_date: Last trading day (defaults to today)
+            cache_candles: Keep generated candle frames in memory
+        """
+        self.seed = seed
+        self.years = years
+        self.sectors = sectors
+        self.cache_candles = cache_candles
+        self.end_date = (end_date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.dates = pd.bdate_range(self.end_date - timedelta(days=365 * years), self.end_date, tz=TIMEZONE)
+
+        self._candles: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+        self.market_returns, market_variance = self._simulate_market()
+        self.vix = self._simulate_vix(market_variance)
+        self.sector_returns = self._rng('sectors').standard_t(5, (sectors, len(self.dates))) \
+            * np.sqrt(3 / 5) * 0.12 / np.sqrt(TRADING_DAYS_PER_YEAR)
+
+        self.holding_records = [self._make_holding_record(i) for i in range(holdings)]
+        self._symbols = {record['instrument_token']: record['tradingsymbol'] for record in self.holding_records}
+
+    def _rng(self, name: str) -> np.random.Generator:
+        return np.random.default_rng([self.seed, zlib.crc32(name.encode())])
+
+    def _simulate_market(self):
+        """Daily index log returns from a GJR-GARCH(1,1) with Student-t shocks"""
+        rng = self._rng('market')
+        n = len(self.dates)
+        shocks = rng.standard_t(5, n) * np.sqrt(3 / 5)  # Unit variance
+
+        long_run_variance = 0.16 ** 2 / TRADING_DAYS_PER_YEAR
+        alpha, gamma, beta = 0.03, 0.08, 0.9  # gamma: extra response to down days
+        omega = long_run_variance * (1 - alpha - gamma / 2 - beta)
+        drift = 0.12 / TRADING_DAYS_PER_YEAR
+
+        returns = np.empty(n)
+        variance = np.empty(n + 1)
+        variance[0] = long_run_variance
+        for t in range(n):
+            innovation = np.sqrt(variance[t]) * shocks[t]
+            returns[t] = drift - 0.5 * variance[t] + innovation
+            variance[t + 1] = omega + (alpha + gamma * (innovation < 0)) * innovation ** 2 + beta * variance[t]
+
+        return returns, variance[1:]
+
+    def _simulate_vix(self, market_variance: np.ndarray) -> np.ndarray:
+        """VIX as the annualised forward volatility with a risk premium and AR(1) noise"""
+        rng = self._rng('vix')
+        noise = np.empty(len(market_variance))
+        noise[0] = 0.0
+        innovations = rng.normal(0, 0.04, len(noise))
+        for t in range(1, len(noise)):
+            noise[t] = 0.9 * noise[t - 1] + innovations[t]
+
+        return 100 * np.sqrt(market_variance * TRADING_DAYS_PER_YEAR) * 1.15 * np.exp(noise)
+
+    def _make_holding_record(self, index: int) -> Dict:
+        symbol = f"SYN{index:04d}"
+        instrument_key = f"NSE_EQ|INE{index:06d}S01"
+        closes = self.candles(instrument_key)['close'].to_numpy()
+        rng = self._rng(symbol)
+
+        quantity = int(rng.integers(1, 500))
+        average_price = float(closes[int(rng.integers(0, len(closes)))])
+        last_price = float(closes[-1])
+
+        return {
+            'tradingsymbol': symbol,
+            'trading_symbol': symbol,
+            'exchange': 'NSE',
+            'isin': instrument_key.split('|')[1],
+            'instrument_token': instrument_key,
+            'quantity': quantity,
+            'average_price': round(average_price, 2),
+            'last_price': round(last_price, 2),
+            'close_price': round(float(closes[-2]), 2),
+            'pnl': round((last_price - average_price) * quantity, 2),
+            'product': 'D'
+        }
+
+    def holdings(self) -> List[Holding]:
+        """Fresh Holding objects with the day-change fields UpstoxService fills in"""
+        result = []
+        for record in self.holding_records:
+            holding = Holding(
+                tradingsymbol=record['tradingsymbol'],
+                quantity=record['quantity'],
+                average_price=record['average_price'],
+                last_price=record['last_price'],
+                pnl=record['pnl'],
+                close_price=record['close_price'],
+                instrument_token=record['instrument_token']
+            )
+            holding.day_change = record['last_price'] - record['close_price']
+            holding.day_change_percentage = holding.day_change / record['close_price'] * 100
+            holding.day_pnl = holding.day_change * record['quantity']
+            holding.real_time_price = record['last_price']
+            holding.previous_close = record['close_price']
+            result.append(holding)
+        return result
+
+    def candles(self, instrument_key: str) -> pd.DataFrame:
+        """Full daily open/high/low/close/volume/oi history for an instrument"""
+        with self._lock:
+            cached = self._candles.get(instrument_key)
+        if cached is not None:
+            return cached
+
+        frame = self._generate_candles(instrument_key)
+        if self.cache_candles:
+            with self._lock:
+                frame = self._candles.setdefault(instrument_key, frame)
+        return frame
+
+    def _close_path(self, instrument_key: str, rng: np.random.Generator) -> np.ndarray:
+        if instrument_key == Config.BENCHMARK_SYMBOL:
+            return 8000 * np.exp(np.cumsum(self.market_returns))
+        if instrument_key == VIX_INSTRUMENT_TOKEN:
+            return self.vix
+
+        # One-factor model plus a sector factor and fat-tailed idiosyncratic noise
+        beta = rng.uniform(0.6, 1.4)
+        sector_loading = rng.uniform(0.5, 1.0)
+        idiosyncratic_vol = rng.uniform(0.15, 0.35) / np.sqrt(TRADING_DAYS_PER_YEAR)
+        alpha = rng.normal(0.0, 0.04) / TRADING_DAYS_PER_YEAR
+        sector = zlib.crc32(instrument_key.encode()) % self.sectors
+
+        idiosyncratic = rng.standard_t(4, len(self.dates)) / np.sqrt(2) * idiosyncratic_vol
+        log_returns = (alpha + beta * self.market_returns + sector_loading * self.sector_returns[sector]
+                       + idiosyncratic - 0.5 * idiosyncratic_vol ** 2)
+        return rng.lognormal(np.log(500), 1.0) * np.exp(np.cumsum(log_returns))
+
+    def _generate_candles(self, instrument_key: str) -> pd.DataFrame:
+        rng = self._rng(instrument_key)
+        n = len(self.dates)
+        close = self._close_path(instrument_key, rng)
+
+        log_returns = np.diff(np.log(close), prepend=np.log(close[0]))
+        daily_range = np.maximum(np.abs(log_returns), 0.002)
+        open_ = np.concatenate([[close[0]], close[:-1]]) * np.exp(rng.normal(0, daily_range / 4))
+        high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, daily_range / 2)))
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, daily_range / 2)))
+
+        # Volume rises with the size of the move
+        volume = rng.lognormal(12, 0.4, n) * (1 + 20 * np.abs(log_returns))
+        if instrument_key in (Config.BENCHMARK_SYMBOL, VIX_INSTRUMENT_TOKEN):
+            volume = np.zeros(n)
+
+        return pd.DataFrame({
+            'open': open_.round(2),
+            'high': high.round(2),
+            'low': low.round(2),
+            'close': close.round(2),
+            'volume': volume.astype(np.int64),
+            'oi': np.zeros(n, dtype=np.int64)
+        }, index=self.dates)
+
+    def _window(self, instrument_key: str, start_date, end_date) -> pd.DataFrame:
+        frame = self.candles(instrument_key)
+        start = pd.Timestamp(start_date).normalize().tz_localize(TIMEZONE)
+        end = pd.Timestamp(end_date).normalize().tz_localize(TIMEZONE)
+        return frame[(frame.index >= start) & (frame.index <= end)]
+
+    def candle_payload(self, instrument_key: str, start_date, end_date) -> List[list]:
+        """Candles between two dates, newest first, as the historical-candle API returns them"""
+        window = self._window(instrument_key, start_date, end_date).iloc[::-1]
+        return [
+            [timestamp.isoformat(), *row]
+            for timestamp, row in zip(window.index, window.itertuples(index=False, name=None))
+        ]
+
+    def historical_frame(self, instrument_key: str, start_date, end_date) -> Optional[pd.DataFrame]:
+        """The DataFrame UpstoxService.get_historical_data returns for the same request"""
+        window = self._window(instrument_key, start_date, end_date).rename(columns={'oi': 'unknown'})
+        if window.empty:
+            return None
+        window.index = pd.DatetimeIndex(window.index.tz_convert(IST_OFFSET), name='date', freq=None)
+        return window
+
+    def quote(self, instrument_key: str) -> Dict:
+        """Full market quote for an instrument"""
+        frame = self.candles(instrument_key)
+        last, previous = frame.iloc[-1], frame.iloc[-2]
+
+        return {
+            'instrument_token': instrument_key,
+            'symbol': self._symbols.get(instrument_key, instrument_key.split('|')[-1]),
+            'last_price': float(last['close']),
+            'net_change': round(float(last['close'] - previous['close']), 2),
+            'volume': int(last['volume']),
+            'timestamp': datetime.now().isoformat(),
+            'ohlc': {
+                'open': float(last['open']),
+                'high': float(last['high']),
+                'low': float(last['low']),
+                'close': float(previous['close'])
+            }
+        }
+
+    def quotes_payload(self, instrument_keys: Sequence[str]) -> Dict[str, Dict]:
+        """Market quotes keyed by exchange:symbol, as the market-quote API returns them"""
+        quotes = {}
+        for key in instrument_keys:
+            quote = self.quote(key)
+            quotes[f"{key.split('|')[0]}:{quote['symbol']}"] = quote
+        return quotes
+
+
+class SyntheticUpstoxService:
+    """In-memory stand-in for UpstoxService backed by SyntheticMarket"""
+
+    def __init__(self, holdings: int = 50, years: int = 3, seed: int = 0,
+                 market: Optional[SyntheticMarket] = None):
+        self.market = market or SyntheticMarket(seed=seed, years=years, holdings=holdings)
+
+    def get_holdings(self) -> List[Holding]:
+        return self.market.holdings()
+
+    def get_holdings_with_day_change(self) -> List[Holding]:
+        return self.market.holdings()
+
+    def get_historical_data(self, instrument_key: str, start_date: datetime,
+                            end_date: datetime) -> Optional[pd.DataFrame]:
+        return self.market.historical_frame(instrument_key, start_date, end_date)
+
+    def get_benchmark_data(self, start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
+        return self.get_historical_data(Config.BENCHMARK_SYMBOL, start_date, end_date)
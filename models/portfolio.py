@@ -1,26 +1,166 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
 import pandas as pd
 
-@dataclass
+
 class Holding:
-    """Individual stock holding data"""
-    tradingsymbol: str
-    quantity: int
-    average_price: float
-    last_price: float
-    pnl: float
-    close_price: float
-    instrument_token: Optional[str] = None
-    current_value: float = 0
-    investment: float = 0
-    return_percentage: float = 0
-    allocation_percentage: float = 0
-    day_change: float = 0  # Net change from previous close
-    day_change_percentage: float = 0  # Percentage change from previous close
-    day_pnl: float = 0  # P&L impact from day change
-    real_time_price: float = 0  # Real-time price from market quotes
-    previous_close: float = 0  # Previous day's closing price
+    """Individual stock holding data (slotted record, no per-instance __dict__)"""
+
+    __slots__ = (
+        'tradingsymbol',
+        'quantity',
+        'average_price',
+        'last_price',
+        'pnl',
+        'close_price',
+        'instrument_token',
+        'current_value',
+        'investment',
+        'return_percentage',
+        'allocation_percentage',
+        'day_change',  # Net change from previous close
+        'day_change_percentage',  # Percentage change from previous close
+        'day_pnl',  # P&L impact from day change
+        'real_time_price',  # Real-time price from market quotes
+        'previous_close',  # Previous day's closing price
+    )
+
+    def __init__(
+            self,
+            tradingsymbol: str,
+            quantity: int,
+            average_price: float,
+            last_price: float,
+            pnl: float,
+            close_price: float,
+            instrument_token: Optional[str] = None,
+            current_value: float = 0,
+            investment: float = 0,
+            return_percentage: float = 0,
+            allocation_percentage: float = 0,
+            day_change: float = 0,
+            day_change_percentage: float = 0,
+            day_pnl: float = 0,
+            real_time_price: float = 0,
+            previous_close: float = 0
+    ):
+        self.tradingsymbol = tradingsymbol
+        self.quantity = quantity
+        self.average_price = average_price
+        self.last_price = last_price
+        self.pnl = pnl
+        self.close_price = close_price
+        self.instrument_token = instrument_token
+        self.current_value = current_value
+        self.investment = investment
+        self.return_percentage = return_percentage
+        self.allocation_percentage = allocation_percentage
+        self.day_change = day_change
+        self.day_change_percentage = day_change_percentage
+        self.day_pnl = day_pnl
+        self.real_time_price = real_time_price
+        self.previous_close = previous_close
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"Holding({fields})"
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary for JSON serialization"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class HoldingsFrame:
+    """
+    Columnar view of a list of holdings
+
+    Each numeric Holding field is stored as one float64 NumPy array, so summary
+    math, chart building and JSON serialization can work on whole columns.
+    Conversion to and from pandas shares the underlying arrays.
+    """
+
+    TEXT_FIELDS = ('tradingsymbol', 'instrument_token')
+    NUMERIC_FIELDS = (
+        'quantity', 'average_price', 'last_price', 'pnl', 'close_price',
+        'current_value', 'investment', 'return_percentage', 'allocation_percentage',
+        'day_change', 'day_change_percentage', 'day_pnl', 'real_time_price', 'previous_close'
+    )
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        length = len(columns['tradingsymbol'])
+        self.columns: Dict[str, np.ndarray] = {}
+        for name in self.TEXT_FIELDS:
+            self.columns[name] = np.asarray(columns.get(name, [None] * length), dtype=object)
+        for name in self.NUMERIC_FIELDS:
+            values = columns.get(name)
+            self.columns[name] = (np.zeros(length) if values is None
+                                  else np.asarray(values, dtype=float))
+            if len(self.columns[name]) != length:
+                raise ValueError(f"Column '{name}' has {len(self.columns[name])} rows, expected {length}")
+
+    def __len__(self):
+        return len(self.columns['tradingsymbol'])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __setitem__(self, name: str, values):
+        if name not in self.columns:
+            raise KeyError(f"Unknown holdings field '{name}'")
+        dtype = object if name in self.TEXT_FIELDS else float
+        values = np.asarray(values, dtype=dtype)
+        if values.shape != (len(self),):
+            raise ValueError(f"Column '{name}' must have {len(self)} rows")
+        self.columns[name] = values
+
+    @classmethod
+    def from_holdings(cls, holdings: Sequence[Holding]) -> 'HoldingsFrame':
+        """Build a frame from Holding records"""
+        count = len(holdings)
+        columns = {name: np.array([getattr(h, name) for h in holdings], dtype=object)
+                   for name in cls.TEXT_FIELDS}
+        for name in cls.NUMERIC_FIELDS:
+            columns[name] = np.fromiter((getattr(h, name) for h in holdings), dtype=float, count=count)
+        return cls(columns)
+
+    def to_holdings(self) -> List[Holding]:
+        """Materialize Holding records from the frame"""
+        names = self.TEXT_FIELDS + self.NUMERIC_FIELDS
+        rows = zip(*(self.columns[name].tolist() for name in names))
+        return [Holding(**dict(zip(names, row))) for row in rows]
+
+    def write_back(self, holdings: Sequence[Holding], fields: Iterable[str]):
+        """Copy the given columns onto existing Holding records, row-aligned"""
+        for name in fields:
+            for holding, value in zip(holdings, self.columns[name].tolist()):
+                setattr(holding, name, value)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'HoldingsFrame':
+        """Build a frame from a DataFrame without copying float64 columns"""
+        columns = {}
+        for name in cls.TEXT_FIELDS + cls.NUMERIC_FIELDS:
+            if name in df.columns:
+                dtype = object if name in cls.TEXT_FIELDS else float
+                columns[name] = df[name].to_numpy(dtype=dtype, copy=False)
+        return cls(columns)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame sharing the frame's arrays"""
+        return pd.DataFrame(self.columns, copy=False)
+
+    def to_records(self, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+        """JSON-serializable list of dicts for the given fields"""
+        fields = list(fields or self.TEXT_FIELDS + self.NUMERIC_FIELDS)
+        rows = zip(*(self.columns[name].tolist() for name in fields))
+        return [dict(zip(fields, row)) for row in rows]
+
 
 @dataclass
 class PortfolioSummary:
@@ -33,6 +173,7 @@ class PortfolioSummary:
     total_day_change: float = 0  # Added for total 1-day change
     total_day_change_percentage: float = 0  # Added for total 1-day percentage change
     total_day_pnl: float = 0  # Added for total 1-day P&L impact
+    holdings_frame: Optional[HoldingsFrame] = None  # Columnar view of holdings
 
 @dataclass
 class PerformanceMetrics:
@@ -41,4 +182,4 @@ class PerformanceMetrics:
     sharpe_ratio: float
     max_drawdown: float
     total_return: float
-    cumulative_returns: pd.Series
\ No newline at end of file
+    cumulative_returns: pd.Series
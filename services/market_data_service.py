@@ -3,18 +3,26 @@ Market data service for fetching and calculating market parameters dynamically
 """
 
 import logging
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime, timedelta
-from functools import lru_cache
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
 from config import Config
 from services.upstox_service import UpstoxService
+from utils.calculations import FinancialCalculator
+from utils.metrics import cache_evictions_total, record_cache_lookup
+from utils.request_cache import request_memoized
+from utils.singleflight import SingleFlight
+from utils.timing import timed
 
 logger = logging.getLogger(__name__)
 
+# India VIX instrument token on NSE
+VIX_INSTRUMENT_TOKEN = "NSE_INDEX|India VIX"
+
 
 class MarketDataService:
     """Service for fetching and calculating market parameters from actual data"""
@@ -25,8 +33,15 @@ class MarketDataService:
         self._cache_timeout = timedelta(hours=24)  # Cache market data for 24 hours
         self._last_cache_time = None
         self._cached_parameters = None
-
-    @lru_cache(maxsize=1)
+        self._benchmark_history = None  # 10-year benchmark candles shared by all windows
+        self._benchmark_history_time = None
+        self._vix_history = None  # 10-year India VIX candles shared by every lookback
+        self._vix_history_time = None
+        self._sorted_vix = {}  # Lookback days -> sorted VIX closes for percentile ranks
+        self._inflight = SingleFlight('market_data_service')  # Coalesces concurrent cache misses
+
+    @request_memoized(bypass='force_refresh')
+    @timed('market.parameters')
     def get_market_parameters(self, force_refresh: bool = False) -> Dict[str, float]:
         """
         Get market parameters calculated from actual historical data
@@ -42,47 +57,46 @@ class MarketDataService:
         if not force_refresh and self._cached_parameters and self._last_cache_time:
             if datetime.now() - self._last_cache_time < self._cache_timeout:
                 logger.info("Returning cached market parameters")
+                record_cache_lookup('market_parameters', True)
                 return self._cached_parameters
+            cache_evictions_total.inc(cache='market_parameters', reason='expired')
+        elif force_refresh and self._cached_parameters:
+            cache_evictions_total.inc(cache='market_parameters', reason='refresh')
+        record_cache_lookup('market_parameters', False)
+
+        # Concurrent misses wait on a single computation instead of each refetching
+        return self._inflight.do('market_parameters', self._compute_market_parameters)
 
+    def _compute_market_parameters(self) -> Dict[str, float]:
+        """Calculate market parameters from historical data and cache them"""
         logger.info("Calculating fresh market parameters from historical data")
 
         try:
-            # Get benchmark historical data
             end_date = datetime.now()
 
-            # Try different time periods for robustness (limited to 10 years max due to Upstox limitation)
-            parameters = {}
-
-            # Calculate 10-year parameters (maximum available from Upstox)
-            ten_year_params = self._calculate_historical_parameters(
-                end_date - timedelta(days=365 * 10), end_date, "10-year"
-            )
-
-            # Calculate 5-year parameters
-            five_year_params = self._calculate_historical_parameters(
-                end_date - timedelta(days=365 * 5), end_date, "5-year"
-            )
-
-            # Calculate 3-year parameters (minimum recommended)
-            three_year_params = self._calculate_historical_parameters(
-                end_date - timedelta(days=365 * 3), end_date, "3-year"
-            )
+            # One 10-year benchmark download (maximum available from Upstox) serves every window
+            window_parameters = self._calculate_window_parameters(self._get_benchmark_history(), end_date)
 
             # Use the longest available period with valid data
-            if ten_year_params:
-                parameters = ten_year_params
-                logger.info("Using 10-year historical parameters")
-            elif five_year_params:
-                parameters = five_year_params
-                logger.info("Using 5-year historical parameters")
-            elif three_year_params:
-                parameters = three_year_params
-                logger.info("Using 3-year historical parameters")
+            parameters = {}
+            for years in sorted(window_parameters, reverse=True):
+                if window_parameters[years]:
+                    parameters = dict(window_parameters[years])
+                    logger.info(f"Using {years}-year historical parameters")
+                    break
             else:
                 # Fallback to conservative defaults if no data available
                 logger.warning("No historical data available, using conservative defaults")
                 parameters = self._get_fallback_parameters()
 
+            # Per-window estimates and their weighted blend
+            parameters['windows'] = {
+                f"{years}-year": window_parameters[years] for years in sorted(window_parameters)
+            }
+            blended = self._blend_window_parameters(window_parameters)
+            if blended:
+                parameters['blended'] = blended
+
             # Add current market conditions
             parameters.update(self._get_current_market_conditions())
 
@@ -97,46 +111,109 @@ class MarketDataService:
             logger.error(f"Error calculating market parameters: {str(e)}")
             return self._get_fallback_parameters()
 
-    def _calculate_historical_parameters(
-            self,
-            start_date: datetime,
-            end_date: datetime,
-            period_name: str
-    ) -> Optional[Dict[str, float]]:
+    def get_inflight_stats(self) -> Dict[str, int]:
+        """Get single-flight counters for market parameter computation"""
+        return self._inflight.stats()
+
+    def _get_benchmark_history(self) -> Optional[pd.DataFrame]:
         """
-        Calculate market parameters from historical data
+        Get 10 years of benchmark (Nifty 50) candles
 
-        Returns:
-            Dictionary with calculated parameters or None if insufficient data
+        Fetched once per cache period and shared by every parameter window and
+        the rolling statistics, instead of one download per window.
         """
-        try:
-            # Ensure we don't go back more than 10 years due to Upstox limitation
-            max_start_date = datetime.now() - timedelta(days=365 * 10)
-            if start_date < max_start_date:
-                start_date = max_start_date
-                logger.warning(f"Adjusted start date to {start_date.date()} due to Upstox 10-year data limitation")
+        if self._benchmark_history is not None and self._benchmark_history_time:
+            if datetime.now() - self._benchmark_history_time < self._cache_timeout:
+                return self._benchmark_history
 
-            # Get benchmark (Nifty 50) historical data
-            benchmark_data = self.upstox_service.get_benchmark_data(start_date, end_date)
+        return self._inflight.do('benchmark_history', self._fetch_benchmark_history)
 
-            if benchmark_data is None or len(benchmark_data) < 250:  # At least 1 year of daily data
-                logger.warning(f"Insufficient data for {period_name} calculation")
-                return None
+    def _fetch_benchmark_history(self) -> Optional[pd.DataFrame]:
+        """Fetch the 10-year benchmark history (Upstox limitation) and cache it"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=365 * 10)
 
-            # Calculate daily returns
-            daily_returns = benchmark_data['close'].pct_change().dropna()
+        benchmark_data = self.upstox_service.get_benchmark_data(start_date, end_date)
+        if benchmark_data is not None and len(benchmark_data) > 0:
+            self._benchmark_history = benchmark_data
+            self._benchmark_history_time = datetime.now()
 
-            # Calculate annualized return (CAGR)
-            total_return = (benchmark_data['close'].iloc[-1] / benchmark_data['close'].iloc[0]) - 1
-            years = (end_date - start_date).days / 365.25
-            cagr = (1 + total_return) ** (1 / years) - 1
+        return benchmark_data
 
-            # Calculate annualized volatility
-            # Annualize daily volatility (assuming 252 trading days)
-            annual_volatility = daily_returns.std() * np.sqrt(252)
+    @staticmethod
+    def _index_timestamp(index: pd.DatetimeIndex, date: datetime) -> pd.Timestamp:
+        """Make a naive date comparable with a (possibly tz-aware) candle index"""
+        timestamp = pd.Timestamp(date)
+        if index.tz is not None and timestamp.tz is None:
+            timestamp = timestamp.tz_localize(index.tz)
+        return timestamp
+
+    def _slice_since(self, data: pd.DataFrame, start_date: datetime) -> pd.DataFrame:
+        """Rows of a candle frame on or after start_date"""
+        return data[data.index >= self._index_timestamp(data.index, start_date)]
+
+    def _calculate_window_parameters(
+            self,
+            benchmark_data: Optional[pd.DataFrame],
+            end_date: datetime
+    ) -> Dict[int, Optional[Dict[str, float]]]:
+        """
+        Calculate market parameters for every lookback window from one benchmark series
+
+        Mean and volatility of each window come from differences of prefix sums of
+        returns and squared returns, and CAGR from cumulative log growth, so every
+        window is evaluated off the same arrays.
+
+        Returns:
+            Dictionary of window years to calculated parameters, or None for windows
+            with insufficient data
+        """
+        windows = Config.MARKET_PARAMETER_WINDOWS
+        if benchmark_data is None or len(benchmark_data) < 2:
+            return {years: None for years in windows}
+
+        dates = benchmark_data.index
+        closes = benchmark_data['close'].to_numpy(dtype=float)
+        daily_returns = closes[1:] / closes[:-1] - 1
+
+        # Prefix sums over the full history; index i covers returns up to close i
+        sum_returns = np.concatenate([[0.0], np.cumsum(daily_returns)])
+        sum_squares = np.concatenate([[0.0], np.cumsum(daily_returns ** 2)])
+        log_growth = np.concatenate([[0.0], np.cumsum(np.log1p(daily_returns))])
+        last = len(closes) - 1
+
+        # Assuming risk-free rate of 6% for India
+        risk_free_daily = 0.06 / 252
+
+        results = {}
+        for years in windows:
+            start_date = end_date - timedelta(days=365 * years)
+            # Index of the first close inside the window
+            window_start = self._index_timestamp(dates, start_date)
+            first = int(dates.searchsorted(window_start))
+            n = last - first
+
+            # At least 1 year of daily data, and history reaching back to the window start
+            if n + 1 < 250 or dates[first] - window_start > timedelta(days=30):
+                logger.warning(f"Insufficient data for {years}-year calculation")
+                results[years] = None
+                continue
+
+            period_years = (end_date - start_date).days / 365.25
+            cagr = np.exp((log_growth[last] - log_growth[first]) / period_years) - 1
+
+            mean = (sum_returns[last] - sum_returns[first]) / n
+            variance = ((sum_squares[last] - sum_squares[first]) - n * mean ** 2) / (n - 1)
+            daily_std = np.sqrt(max(variance, 0.0))
+            realized_volatility = daily_std * np.sqrt(252)
+            sharpe_ratio = (mean - risk_free_daily) / daily_std * np.sqrt(252) if daily_std > 0 else 0.0
+
+            window_growth = log_growth[first:] - log_growth[first]
+            max_drawdown = np.expm1((window_growth - np.maximum.accumulate(window_growth)).min())
 
             # Get VIX-based volatility for comparison
-            vix_stats = self.get_volatility_index_stats(days_back=int(years * 365))
+            annual_volatility = realized_volatility
+            vix_stats = self.get_volatility_index_stats(days_back=int(period_years * 365))
 
             # Use VIX average if available and reliable
             if vix_stats['data_points'] > 100:
@@ -145,36 +222,37 @@ class MarketDataService:
 
                 # Take weighted average of calculated and VIX-based volatility
                 # Give more weight to VIX as it's forward-looking
-                annual_volatility = (0.4 * annual_volatility + 0.6 * vix_based_volatility)
-
-                logger.info(f"Using VIX-adjusted volatility: {annual_volatility:.2%}")
-
-            # Calculate Sharpe ratio (for reference)
-            # Assuming risk-free rate of 6% for India
-            risk_free_daily = 0.06 / 252
-            excess_returns = daily_returns - risk_free_daily
-            sharpe_ratio = (excess_returns.mean() / excess_returns.std()) * np.sqrt(252)
-
-            # Calculate maximum drawdown
-            cumulative_returns = (1 + daily_returns).cumprod()
-            running_max = cumulative_returns.cummax()
-            drawdown = (cumulative_returns - running_max) / running_max
-            max_drawdown = drawdown.min()
-
-            return {
-                'expected_return': cagr,
-                'volatility': annual_volatility,
-                'sharpe_ratio': sharpe_ratio,
-                'max_drawdown': max_drawdown,
-                'data_points': len(daily_returns),
-                'period_years': years,
+                annual_volatility = (0.4 * realized_volatility + 0.6 * vix_based_volatility)
+
+            results[years] = {
+                'expected_return': float(cagr),
+                'volatility': float(annual_volatility),
+                'realized_volatility': float(realized_volatility),
+                'sharpe_ratio': float(sharpe_ratio),
+                'max_drawdown': float(max_drawdown),
+                'data_points': int(n),
+                'period_years': period_years,
                 'vix_adjusted': vix_stats['data_points'] > 100
             }
 
-        except Exception as e:
-            logger.error(f"Error calculating {period_name} parameters: {str(e)}")
+        return results
+
+    @staticmethod
+    def _blend_window_parameters(window_parameters: Dict[int, Optional[Dict[str, float]]]) -> Optional[Dict]:
+        """Weighted average of the per-window estimates, renormalized over windows with data"""
+        weights = {years: Config.MARKET_PARAMETER_WINDOWS[years]
+                   for years, params in window_parameters.items() if params}
+        total_weight = sum(weights.values())
+        if total_weight <= 0:
             return None
 
+        blended = {
+            key: sum(window_parameters[years][key] * weight for years, weight in weights.items()) / total_weight
+            for key in ('expected_return', 'volatility', 'sharpe_ratio', 'max_drawdown')
+        }
+        blended['weights'] = {f"{years}-year": weight / total_weight for years, weight in weights.items()}
+        return blended
+
     @staticmethod
     def _get_current_market_conditions() -> Dict[str, float]:
         """
@@ -204,6 +282,8 @@ class MarketDataService:
             'max_drawdown': -0.5       # 50% max drawdown assumption
         }
 
+    @request_memoized()
+    @timed('market.vix_stats')
     def get_volatility_index_stats(self, days_back: int = 365) -> Dict[str, float]:
         """
         Get India VIX statistics from actual data
@@ -221,29 +301,17 @@ class MarketDataService:
                 days_back = max_days
                 logger.warning(f"Limited VIX data request to {max_days} days due to Upstox limitation")
 
-            # India VIX instrument token on NSE
-            vix_instrument_token = "NSE_INDEX|India VIX"
-
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
+            # Slice the cached 10-year history instead of fetching each lookback
+            vix_values = self._get_vix_window(days_back)
 
-            logger.info(f"Fetching India VIX data from {start_date.date()} to {end_date.date()}")
-
-            # Fetch VIX historical data using existing upstox service
-            vix_data = self.upstox_service.get_historical_data(
-                vix_instrument_token,
-                start_date,
-                end_date
-            )
-
-            if vix_data is not None and len(vix_data) > 0:
+            if len(vix_values) > 0:
                 # Calculate VIX statistics
-                current_vix = vix_data['close'].iloc[-1]
-                average_vix = vix_data['close'].mean()
-                min_vix = vix_data['close'].min()
-                max_vix = vix_data['close'].max()
-                percentile_75 = vix_data['close'].quantile(0.75)
-                percentile_25 = vix_data['close'].quantile(0.25)
+                current_vix = vix_values[-1]
+                average_vix = vix_values.mean()
+                min_vix = vix_values.min()
+                max_vix = vix_values.max()
+                percentile_75 = np.quantile(vix_values, 0.75)
+                percentile_25 = np.quantile(vix_values, 0.25)
 
                 logger.info(f"VIX Stats - Current: {current_vix:.2f}, Average: {average_vix:.2f}")
 
@@ -254,7 +322,7 @@ class MarketDataService:
                     'max_vix': float(max_vix),
                     'percentile_25': float(percentile_25),
                     'percentile_75': float(percentile_75),
-                    'data_points': len(vix_data)
+                    'data_points': len(vix_values)
                 }
             else:
                 logger.warning("No VIX data available, using fallback values")
@@ -264,6 +332,85 @@ class MarketDataService:
             logger.error(f"Error fetching VIX data: {str(e)}")
             return self._get_fallback_vix_stats()
 
+    def _get_vix_history(self) -> Optional[pd.DataFrame]:
+        """Get 10 years of India VIX candles, fetched once per cache period"""
+        if self._vix_history is not None and self._vix_history_time:
+            if datetime.now() - self._vix_history_time < self._cache_timeout:
+                return self._vix_history
+
+        return self._inflight.do('vix_history', self._fetch_vix_history)
+
+    def _fetch_vix_history(self) -> Optional[pd.DataFrame]:
+        """Fetch the 10-year VIX history and reset the sorted lookups built from it"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=365 * 10)
+
+        logger.info(f"Fetching India VIX data from {start_date.date()} to {end_date.date()}")
+
+        vix_data = self.upstox_service.get_historical_data(VIX_INSTRUMENT_TOKEN, start_date, end_date)
+        if vix_data is not None and len(vix_data) > 0:
+            self._vix_history = vix_data
+            self._vix_history_time = datetime.now()
+            self._sorted_vix.clear()
+
+        return vix_data
+
+    def _get_vix_window(self, days_back: int) -> np.ndarray:
+        """VIX closes (in date order) for the last days_back days of the cached history"""
+        vix_data = self._get_vix_history()
+        if vix_data is None or len(vix_data) == 0:
+            return np.empty(0)
+        window = self._slice_since(vix_data, datetime.now() - timedelta(days=days_back))
+        return window['close'].to_numpy(dtype=float)
+
+    def _get_sorted_vix(self, days_back: int) -> np.ndarray:
+        """Sorted VIX closes for a lookback, built once per history refresh"""
+        self._get_vix_history()  # Refreshing the history resets the sorted lookups
+        if days_back not in self._sorted_vix:
+            self._sorted_vix[days_back] = np.sort(self._get_vix_window(days_back))
+        return self._sorted_vix[days_back]
+
+    @timed('market.vix_distribution')
+    def get_vix_distribution(self, days_back: int = 365 * 3, bins: int = 30) -> Optional[Dict]:
+        """
+        Get the India VIX distribution from the cached history
+
+        Args:
+            days_back: Lookback for the distribution (max 10 years)
+            bins: Number of histogram bins
+
+        Returns:
+            Dictionary with histogram 'bin_edges' and 'counts', the daily 'dates',
+            'values' and 'percentile_rank' of each day within the lookback, and the
+            current VIX with its rank; or None without VIX data. Each day's rank is
+            as of that day: against the days_back of history ending on it, never
+            against later days.
+        """
+        days_back = min(days_back, 365 * 10)
+        vix_data = self._get_vix_history()
+        if vix_data is None or len(vix_data) == 0:
+            return None
+
+        window = self._slice_since(vix_data, datetime.now() - timedelta(days=days_back))['close']
+        if window.empty:
+            return None
+        sorted_vix = self._get_sorted_vix(days_back)
+        values = window.to_numpy(dtype=float)
+
+        counts, bin_edges = np.histogram(sorted_vix, bins=bins)
+        ranks = self._trailing_vix_percentiles(vix_data['close'], len(values), days_back)
+
+        return {
+            'bin_edges': bin_edges.tolist(),
+            'counts': counts.tolist(),
+            'dates': [date.strftime('%Y-%m-%d') for date in window.index],
+            'values': values.tolist(),
+            'percentile_rank': ranks.tolist(),
+            'current_vix': float(values[-1]),
+            'current_percentile': float(ranks[-1]),
+            'data_points': len(values)
+        }
+
     @staticmethod
     def _get_fallback_vix_stats() -> Dict[str, float]:
         """Fallback VIX statistics based on historical averages"""
@@ -277,6 +424,7 @@ class MarketDataService:
             'data_points': 0
         }
 
+    @request_memoized()
     def get_scenario_parameters(self) -> Dict[str, Dict[str, float]]:
         """
         Get scenario analysis parameters based on historical data and current VIX
@@ -378,54 +526,65 @@ class MarketDataService:
                 }
             }
 
+    @staticmethod
+    def get_rolling_statistics_range(window_years: int = 1) -> Tuple[datetime, datetime]:
+        """
+        Date range fetched for rolling statistics: the window plus 5 years, capped
+        at 10 years due to Upstox limitation
+        """
+        max_years = 10
+        total_years = window_years + 5  # Extra data for rolling
+        if total_years > max_years:
+            total_years = max_years
+            logger.warning(f"Limited rolling statistics to {max_years} years due to Upstox limitation")
+
+        end_date = datetime.now()
+        return end_date - timedelta(days=365 * total_years), end_date
+
+    @timed('market.rolling_statistics')
     def calculate_rolling_statistics(
             self,
-            window_years: int = 1
+            window_years: int = 1,
+            portfolio_returns: Optional[pd.Series] = None
     ) -> pd.DataFrame:
         """
         Calculate rolling statistics for different time windows
 
         Args:
             window_years: Rolling window in years (max 10 due to Upstox limitation)
+            portfolio_returns: Optional daily portfolio returns for the rolling beta
+                against the benchmark
 
         Returns:
-            DataFrame with rolling statistics
+            DataFrame with rolling return, volatility, Sharpe, drawdown, max drawdown
+            and (with portfolio returns) beta
         """
         try:
-            # Limit to 10 years max due to Upstox limitation
-            max_years = 10
-            total_years = window_years + 5  # Extra data for rolling
-            if total_years > max_years:
-                total_years = max_years
-                logger.warning(f"Limited rolling statistics to {max_years} years due to Upstox limitation")
+            start_date, end_date = self.get_rolling_statistics_range(window_years)
 
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=365 * total_years)
-
-            benchmark_data = self.upstox_service.get_benchmark_data(start_date, end_date)
+            # Reuse the shared benchmark history rather than downloading again
+            benchmark_data = self._get_benchmark_history()
 
             if benchmark_data is None:
                 return pd.DataFrame()
+            benchmark_data = self._slice_since(benchmark_data, start_date)
 
-            # Calculate rolling returns and volatility
+            # Calculate rolling statistics from cumulative log-returns
             daily_returns = benchmark_data['close'].pct_change().dropna()
             trading_days = 252 * window_years
 
-            rolling_returns = daily_returns.rolling(window=trading_days).apply(
-                lambda x: (1 + x).prod() ** (252 / len(x)) - 1
+            return FinancialCalculator.calculate_rolling_metrics(
+                daily_returns,
+                trading_days,
+                risk_free_rate=self._get_current_market_conditions()['risk_free_rate'],
+                portfolio_returns=portfolio_returns
             )
 
-            rolling_volatility = daily_returns.rolling(window=trading_days).std() * np.sqrt(252)
-
-            return pd.DataFrame({
-                'rolling_return': rolling_returns,
-                'rolling_volatility': rolling_volatility
-            })
-
         except Exception as e:
             logger.error(f"Error calculating rolling statistics: {str(e)}")
             return pd.DataFrame()
 
+    @request_memoized()
     def get_current_market_sentiment(self) -> Dict[str, any]:
         """
         Get current market sentiment based on VIX levels
@@ -451,31 +610,57 @@ class MarketDataService:
             risk_level = "Very High"
 
         # Calculate VIX percentile rank (where current VIX stands historically)
-        historical_vix = self.get_volatility_index_stats(days_back=365 * 3)  # 3 years max
+        historical_vix = self._get_sorted_vix(days_back=365 * 3)  # 3 years max
+        vix_percentile = (float(self._calculate_vix_percentile(current_vix, historical_vix))
+                          if len(historical_vix) else 50.0)
 
         return {
             'current_vix': current_vix,
             'sentiment': sentiment,
             'risk_level': risk_level,
-            'vix_percentile': self._calculate_vix_percentile(current_vix, historical_vix),
+            'vix_percentile': vix_percentile,
             'recommendation': self._get_investment_recommendation(current_vix, risk_level)
         }
 
     @staticmethod
-    def _calculate_vix_percentile(current_vix: float, historical_stats: Dict) -> float:
-        """Calculate where current VIX stands in historical distribution"""
-        if current_vix <= historical_stats['min_vix']:
-            return 0.0
-        elif current_vix >= historical_stats['max_vix']:
-            return 100.0
-        elif current_vix <= historical_stats['percentile_25']:
-            return 25.0 * (current_vix - historical_stats['min_vix']) / (historical_stats['percentile_25'] - historical_stats['min_vix'])
-        elif current_vix <= historical_stats['average_vix']:
-            return 25.0 + 25.0 * (current_vix - historical_stats['percentile_25']) / (historical_stats['average_vix'] - historical_stats['percentile_25'])
-        elif current_vix <= historical_stats['percentile_75']:
-            return 50.0 + 25.0 * (current_vix - historical_stats['average_vix']) / (historical_stats['percentile_75'] - historical_stats['average_vix'])
-        else:
-            return 75.0 + 25.0 * (current_vix - historical_stats['percentile_75']) / (historical_stats['max_vix'] - historical_stats['percentile_75'])
+    def _calculate_vix_percentile(current_vix, sorted_vix: np.ndarray):
+        """
+        Exact percentile rank of VIX level(s) within a sorted historical array
+
+        Uses binary search and mid-rank for ties, so a value equal to every
+        observation ranks 50 and values outside the range rank 0 or 100.
+        """
+        below = np.searchsorted(sorted_vix, current_vix, side='left')
+        at_or_below = np.searchsorted(sorted_vix, current_vix, side='right')
+        return (below + at_or_below) / 2 / len(sorted_vix) * 100
+
+    @staticmethod
+    def _trailing_vix_percentiles(history: pd.Series, days: int, days_back: int) -> np.ndarray:
+        """
+        As-of percentile rank of each of the last `days` closes in a VIX history
+
+        Each close is ranked (mid-rank for ties, like _calculate_vix_percentile)
+        against the closes in the days_back calendar days ending on its date. A
+        sorted window is slid forward with binary-search inserts and removals, so
+        no day is ranked against later data.
+        """
+        dates = history.index
+        values = history.to_numpy(dtype=float)
+        first = len(values) - days
+        starts = dates.searchsorted(dates[first:] - pd.Timedelta(days=days_back), side='right')
+
+        window = sorted(values[starts[0]:first])
+        oldest = starts[0]
+        ranks = np.empty(days)
+        for position, (index, start) in enumerate(zip(range(first, len(values)), starts)):
+            insort(window, values[index])
+            while oldest < start:
+                del window[bisect_left(window, values[oldest])]
+                oldest += 1
+            below = bisect_left(window, values[index])
+            at_or_below = bisect_right(window, values[index])
+            ranks[position] = (below + at_or_below) / 2 / len(window) * 100
+        return ranks
 
     @staticmethod
     def _get_investment_recommendation(vix_level: float, risk_level: str) -> str:
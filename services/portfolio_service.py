@@ -1,13 +1,24 @@
+import hashlib
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Tuple, Optional, Dict
 import logging
+import threading
+from collections import OrderedDict
 
-from models.portfolio import PortfolioSummary, PerformanceMetrics, Holding
+from config import Config
+from models.portfolio import PortfolioSummary, PerformanceMetrics, Holding, HoldingsFrame
 from services.upstox_service import UpstoxService
 from services.market_data_service import MarketDataService
 from utils.calculations import FinancialCalculator
+from utils.price_matrix import PriceMatrix
 from utils.projections import PortfolioProjector, ProjectionResults, ScenarioResult
+from utils.metrics import cache_evictions_total, record_cache_lookup
+from utils.request_cache import clear_request_memo, request_memoized
+from utils.singleflight import SingleFlight
+from utils.streaming_metrics import StreamingMetrics
+from utils.timing import timed
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +35,13 @@ class PortfolioService:
         self._cache_timeout_minutes = 5  # Unified cache timeout
         self._historical_cache = {}  # Cache for historical data
         self._historical_cache_timeout = timedelta(hours=1)  # Historical data cache timeout
+        self._price_matrix_cache = {}  # Aligned price matrices built from the historical cache
+        self._returns_cache = {}  # Daily portfolio returns per holdings fingerprint, with the dates they cover
+        self._metrics_store: Dict[str, StreamingMetrics] = OrderedDict()  # Incremental return metrics per series, LRU order
+        self._metrics_store_size = 16  # Benchmark plus recent holdings fingerprints
+        self._metrics_locks: Dict[str, threading.Lock] = {}  # One lock per accumulator key
+        self._metrics_locks_guard = threading.Lock()
+        self._inflight = SingleFlight('portfolio_service')  # Coalesces concurrent cache misses
 
     def _is_cache_valid(self) -> bool:
         """Check if holdings cache is still valid"""
@@ -31,6 +49,16 @@ class PortfolioService:
             return False
         return datetime.now() - self._cache_timestamp < timedelta(minutes=self._cache_timeout_minutes)
 
+    def _check_holdings_cache(self) -> bool:
+        """Check the holdings cache and count the lookup"""
+        valid = self._is_cache_valid()
+        record_cache_lookup('holdings', valid)
+        if not valid and self._cache_timestamp is not None:
+            cache_evictions_total.inc(cache='holdings', reason='expired')
+        return valid
+
+    @request_memoized()
+    @timed('portfolio.summary')
     def get_portfolio_summary(self) -> PortfolioSummary:
         """Get comprehensive portfolio summary with day change data"""
         holdings = self._get_cached_holdings_with_day_change()
@@ -48,26 +76,10 @@ class PortfolioService:
                 total_day_pnl=0
             )
 
-        # Convert to DataFrame for calculations
-        holdings_data = []
-        for holding in holdings:
-            # Ensure we have Holding objects, not dicts
-            if isinstance(holding, dict):
-                continue  # Skip invalid entries
-
-            holdings_data.append({
-                'tradingsymbol': holding.tradingsymbol,
-                'quantity': holding.quantity,
-                'average_price': holding.average_price,
-                'last_price': holding.last_price,
-                'pnl': holding.pnl,
-                'close_price': holding.close_price,
-                'day_change': getattr(holding, 'day_change', 0),
-                'day_change_percentage': getattr(holding, 'day_change_percentage', 0),
-                'day_pnl': getattr(holding, 'day_pnl', 0)
-            })
-
-        if not holdings_data:
+        # Skip invalid entries up front so the arrays stay aligned with the holdings
+        valid_holdings = [holding for holding in holdings if isinstance(holding, Holding)]
+
+        if not valid_holdings:
             return PortfolioSummary(
                 total_value=0,
                 total_investment=0,
@@ -79,41 +91,27 @@ class PortfolioService:
                 total_day_pnl=0
             )
 
-        df = pd.DataFrame(holdings_data)
-
-        # Calculate metrics
-        df = self.calculator.calculate_portfolio_value(df)
+        frame = HoldingsFrame.from_holdings(valid_holdings)
 
-        # Update holding objects with calculated values
-        valid_holdings = []
-        for i, holding in enumerate(holdings):
-            if isinstance(holding, dict):
-                continue  # Skip invalid entries
-
-            if i < len(df):
-                holding.current_value = df.iloc[i]['current_value']
-                holding.investment = df.iloc[i]['investment']
-                holding.return_percentage = df.iloc[i]['return_%']
-                holding.allocation_percentage = df.iloc[i]['allocation_%']
-                # Day change values are already set from the API
-                if not hasattr(holding, 'day_change'):
-                    holding.day_change = 0
-                if not hasattr(holding, 'day_change_percentage'):
-                    holding.day_change_percentage = 0
-                if not hasattr(holding, 'day_pnl'):
-                    holding.day_pnl = 0
-
-                valid_holdings.append(holding)
-
-        total_value = df['current_value'].sum()
-        total_investment = df['investment'].sum()
-        total_pnl = df['pnl'].sum()
+        # Calculate metrics column-wise and write them back to the records in one pass
+        columns = self.calculator.calculate_portfolio_arrays(
+            frame['quantity'], frame['last_price'], frame['average_price']
+        )
+        frame['current_value'] = columns['current_value']
+        frame['investment'] = columns['investment']
+        frame['return_percentage'] = columns['return_%']
+        frame['allocation_percentage'] = columns['allocation_%']
+        frame.write_back(valid_holdings, ('current_value', 'investment', 'return_percentage', 'allocation_percentage'))
+
+        total_value = float(frame['current_value'].sum())
+        total_investment = float(frame['investment'].sum())
+        total_pnl = float(frame['pnl'].sum())
         total_return_percentage = ((total_pnl / total_investment) * 100) if total_investment > 0 else 0
 
         # Calculate total day change metrics
-        total_day_pnl = df['day_pnl'].sum()
+        total_day_pnl = float(frame['day_pnl'].sum())
         total_day_change_percentage = (total_day_pnl / total_value) * 100 if total_value > 0 else 0
-        total_day_change = df['day_change'].sum()  # This is less meaningful but included for completeness
+        total_day_change = float(frame['day_change'].sum())  # This is less meaningful but included for completeness
 
         return PortfolioSummary(
             total_value=total_value,
@@ -123,9 +121,11 @@ class PortfolioService:
             holdings=valid_holdings,
             total_day_change=total_day_change,
             total_day_change_percentage=total_day_change_percentage,
-            total_day_pnl=total_day_pnl
+            total_day_pnl=total_day_pnl,
+            holdings_frame=frame
         )
 
+    @timed('portfolio.performance')
     def get_performance_analysis(self, start_date: datetime, end_date: datetime) -> Tuple[Optional[PerformanceMetrics], Optional[PerformanceMetrics], pd.DataFrame]:
         """Get portfolio performance analysis with benchmark comparison"""
         holdings = self._get_cached_holdings()
@@ -134,62 +134,172 @@ class PortfolioService:
         if not holdings:
             return None, None, pd.DataFrame()
 
-        # Build portfolio returns DataFrame
-        returns_df = pd.DataFrame()
-
-        for holding in holdings:
-            # Skip if holding is a dict (error case) or missing instrument_token
-            if isinstance(holding, dict):
-                continue
-
-            if not hasattr(holding, 'instrument_token') or not holding.instrument_token:
-                continue
-
-            hist_data = self._get_cached_historical_data(
-                holding.instrument_token, holding.tradingsymbol, start_date, end_date
-            )
-
-            if hist_data is not None:
-                # Calculate position value over time
-                position_value = hist_data['close'] * holding.quantity
-                returns_df[holding.tradingsymbol] = position_value
-
-        if returns_df.empty:
+        price_data = self._get_price_matrix(holdings, start_date, end_date)
+        if price_data is None:
             return None, None, pd.DataFrame()
 
-        # Calculate portfolio total value and returns
-        returns_df = returns_df.sort_index()
-        returns_df = returns_df.ffill().fillna(0)
-        returns_df['Portfolio Value'] = returns_df.sum(axis=1)
-        portfolio_returns = returns_df['Portfolio Value'].pct_change().fillna(0)
-
-        # Calculate portfolio metrics
-        portfolio_metrics_data = self.calculator.calculate_metrics(portfolio_returns)
-        portfolio_metrics = PerformanceMetrics(
-            volatility=portfolio_metrics_data['volatility'],
-            sharpe_ratio=portfolio_metrics_data['sharpe'],
-            max_drawdown=portfolio_metrics_data['max_drawdown'],
-            total_return=portfolio_metrics_data['total_return'],
-            cumulative_returns=portfolio_metrics_data['cumulative_returns']
+        price_matrix, quantity_vector, complete = price_data
+        returns_df = price_matrix.to_frame(quantity_vector)
+        portfolio_returns = price_matrix.portfolio_returns(quantity_vector)
+        if complete:
+            self._store_portfolio_returns(holdings, portfolio_returns.iloc[1:], start_date, end_date)
+
+        # Calculate portfolio metrics from the incremental accumulator
+        portfolio_metrics = self._get_streaming_metrics(
+            f"portfolio_{self._holdings_fingerprint(holdings)}", portfolio_returns, start_date, end_date
         )
 
         # Get benchmark data
         benchmark_metrics = None
-        benchmark_data = self.upstox_service.get_benchmark_data(start_date, end_date)
+        benchmark_data = self._get_cached_benchmark_data(start_date, end_date)
 
         if benchmark_data is not None:
             benchmark_returns = benchmark_data['close'].pct_change().fillna(0)
-            benchmark_metrics_data = self.calculator.calculate_metrics(benchmark_returns)
-            benchmark_metrics = PerformanceMetrics(
-                volatility=benchmark_metrics_data['volatility'],
-                sharpe_ratio=benchmark_metrics_data['sharpe'],
-                max_drawdown=benchmark_metrics_data['max_drawdown'],
-                total_return=benchmark_metrics_data['total_return'],
-                cumulative_returns=benchmark_metrics_data['cumulative_returns']
+            benchmark_metrics = self._get_streaming_metrics(
+                'benchmark', benchmark_returns, start_date, end_date
             )
 
         return portfolio_metrics, benchmark_metrics, returns_df
 
+    def _get_streaming_metrics(
+            self,
+            key: str,
+            returns: pd.Series,
+            start_date: datetime,
+            end_date: datetime
+    ) -> PerformanceMetrics:
+        """
+        Window metrics from a persisted StreamingMetrics accumulator
+
+        The accumulator is only advanced with bars newer than the last one it has
+        seen, so a refreshed window costs O(new bars) instead of recomputing the
+        whole history. It is rebuilt when it can't simply be extended: the request
+        reaches further back than the history it holds, has bars it is missing, or
+        starts after its last bar (which would leave a gap). Requests for the same
+        key are serialized: two requests extending one accumulator would otherwise
+        both append the same new bars.
+        """
+        with self._metrics_locks_guard:
+            lock = self._metrics_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            with self._metrics_locks_guard:
+                accumulator = self._metrics_store.get(key)
+                if accumulator is not None:
+                    self._metrics_store.move_to_end(key)
+
+            if accumulator is None or not accumulator.can_extend(returns):
+                accumulator = StreamingMetrics.from_returns(returns)
+                self._store_accumulator(key, accumulator)
+            else:
+                accumulator.extend(returns)
+
+            metrics = accumulator.window_metrics(start_date, end_date)
+        return PerformanceMetrics(
+            volatility=metrics['volatility'],
+            sharpe_ratio=metrics['sharpe'],
+            max_drawdown=metrics['max_drawdown'],
+            total_return=metrics['total_return'],
+            cumulative_returns=metrics['cumulative_returns']
+        )
+
+    def _store_accumulator(self, key: str, accumulator: StreamingMetrics):
+        """Keep an accumulator, evicting the least recently used beyond _metrics_store_size"""
+        with self._metrics_locks_guard:
+            self._metrics_store[key] = accumulator
+            self._metrics_store.move_to_end(key)
+            evicted = 0
+            while len(self._metrics_store) > self._metrics_store_size:
+                oldest, _ = self._metrics_store.popitem(last=False)
+                self._metrics_locks.pop(oldest, None)
+                evicted += 1
+        if evicted:
+            cache_evictions_total.inc(evicted, cache='metrics_store', reason='capacity')
+
+    @timed('portfolio.risk_attribution')
+    def get_risk_attribution(self, start_date: datetime, end_date: datetime) -> Optional[Dict]:
+        """
+        Per-holding risk breakdown for the analysis window
+
+        Reuses the cached price matrix and benchmark candles from
+        get_performance_analysis, so it adds no upstream calls.
+
+        Returns:
+            Dictionary with a 'holdings' list (symbol, weight, beta, volatility,
+            variance contribution, marginal/component VaR, max drawdown), sorted by
+            weight, plus portfolio-level daily VaR and annualized volatility; or
+            None if there is no price history.
+        """
+        holdings = self._get_cached_holdings()
+        price_data = self._get_price_matrix(holdings, start_date, end_date) if holdings else None
+        if price_data is None:
+            return None
+
+        price_matrix, quantity_vector, _ = price_data
+        if len(price_matrix) < 3:
+            return None
+
+        latest_values = price_matrix.position_values(quantity_vector)[-1]
+        portfolio_value = float(latest_values.sum())
+        if portfolio_value <= 0:
+            return None
+        weights = latest_values / portfolio_value
+
+        # Drop the first row: it has no prior close, so every return there is 0
+        asset_returns = price_matrix.asset_returns()[1:]
+
+        benchmark_returns = None
+        benchmark_data = self._get_cached_benchmark_data(start_date, end_date)
+        if benchmark_data is not None:
+            benchmark_close = benchmark_data['close'].reindex(price_matrix.dates, method='ffill')
+            benchmark_returns = benchmark_close.pct_change().fillna(0).to_numpy()[1:]
+
+        attribution = self.calculator.calculate_risk_attribution(asset_returns, weights, benchmark_returns)
+        drawdowns = self.calculator.calculate_metrics_batch(asset_returns)['max_drawdown']
+
+        rows = [
+            {
+                'tradingsymbol': symbol,
+                'weight': float(weights[i]),
+                'value': float(latest_values[i]),
+                'beta': None if np.isnan(attribution['beta'][i]) else float(attribution['beta'][i]),
+                'volatility': float(attribution['volatility'][i]),
+                'variance_contribution': float(attribution['variance_contribution'][i]),
+                'marginal_var': float(attribution['marginal_var'][i]),
+                'component_var': float(attribution['component_var'][i] * portfolio_value),
+                'max_drawdown': float(drawdowns[i])
+            }
+            for i, symbol in enumerate(price_matrix.symbols)
+        ]
+        rows.sort(key=lambda row: row['weight'], reverse=True)
+
+        return {
+            'holdings': rows,
+            'portfolio_value': portfolio_value,
+            'portfolio_var': float(attribution['portfolio_var'] * portfolio_value),
+            'portfolio_volatility': float(attribution['portfolio_volatility'])
+        }
+
+    @timed('portfolio.rolling_statistics')
+    def get_rolling_statistics(self, window_years: int = 1, include_portfolio: bool = True) -> pd.DataFrame:
+        """
+        Rolling benchmark statistics, with the portfolio's rolling beta if requested
+
+        Portfolio returns come from the cached price matrix over the same range the
+        market data service fetches for the benchmark.
+        """
+        portfolio_returns = None
+        if include_portfolio:
+            holdings = self._get_cached_holdings()
+            start_date, end_date = self.market_data_service.get_rolling_statistics_range(window_years)
+            price_data = self._get_price_matrix(holdings, start_date, end_date) if holdings else None
+            if price_data is not None:
+                price_matrix, quantity_vector, _ = price_data
+                portfolio_returns = price_matrix.portfolio_returns(quantity_vector)
+
+        return self.market_data_service.calculate_rolling_statistics(window_years, portfolio_returns)
+
+    @timed('portfolio.projections')
     def get_portfolio_projections(
             self,
             years: int = 5,
@@ -203,7 +313,7 @@ class PortfolioService:
         Args:
             years: Number of years to project
             simulations: Number of Monte Carlo simulations
-            method: 'historical' or 'parametric'
+            method: 'historical', 'correlated' (multi-asset) or 'parametric'
             use_historical: Whether to use historical data for calculations
 
         Returns:
@@ -218,17 +328,16 @@ class PortfolioService:
 
         # Calculate portfolio statistics
         try:
+            projections = None
+
             if use_historical and method == 'historical':
                 # Get historical returns for the portfolio
                 end_date = datetime.now()
                 start_date = end_date - timedelta(days=365 * 3)  # 3 years of data
 
-                portfolio_metrics, _, returns_df = self.get_performance_analysis(start_date, end_date)
-
-                if portfolio_metrics and not returns_df.empty:
-                    # Use historical portfolio returns
-                    portfolio_returns = returns_df['Portfolio Value'].pct_change().dropna()
+                portfolio_returns = self._get_portfolio_returns(self._get_cached_holdings(), start_date, end_date)
 
+                if portfolio_returns is not None and not portfolio_returns.empty:
                     projections = self.projector.monte_carlo_projection(
                         current_value=current_value,
                         historical_returns=portfolio_returns,
@@ -240,7 +349,25 @@ class PortfolioService:
                     # Fallback to parametric if no historical data
                     method = 'parametric'
 
-            if method == 'parametric' or not use_historical:
+            elif method == 'correlated':
+                # Simulate each holding with its own drift and the holdings' covariance
+                asset_inputs = self._get_multi_asset_inputs()
+
+                if asset_inputs is not None:
+                    asset_returns, weights = asset_inputs
+                    projections = self.projector.monte_carlo_projection(
+                        current_value=current_value,
+                        years=years,
+                        simulations=simulations,
+                        method='multi_asset',
+                        asset_returns=asset_returns,
+                        weights=weights
+                    )
+                else:
+                    # Fallback to parametric if no candle history
+                    method = 'parametric'
+
+            if projections is None:
                 # Use parametric method with market-derived parameters
                 market_params = self.market_data_service.get_market_parameters()
                 expected_return = market_params['expected_return']
@@ -248,13 +375,6 @@ class PortfolioService:
 
                 logger.info(f"Using market parameters: return={expected_return:.2%}, vol={volatility:.2%}")
 
-                # Optionally adjust based on portfolio allocation
-                # This is a simplified approach - you could make this more sophisticated
-                if portfolio_summary.holdings:
-                    # Could analyze holdings to adjust expectations
-                    # For example, if portfolio has small/mid-cap stocks, increase volatility
-                    pass
-
                 projections = self.projector.monte_carlo_projection(
                     current_value=current_value,
                     expected_return=expected_return,
@@ -279,6 +399,95 @@ class PortfolioService:
                 method='parametric'
             )
 
+    @timed('portfolio.sensitivity')
+    def get_projection_sensitivity(
+            self,
+            years: int = 10,
+            return_range: Tuple[float, float] = (0.0, 0.24),
+            volatility_range: Tuple[float, float] = (0.05, 0.40),
+            return_steps: int = 20,
+            volatility_steps: int = 20,
+            simulations: int = 10000
+    ) -> Dict[str, any]:
+        """
+        Projection sensitivity surface over expected return and volatility
+
+        Args:
+            years: Number of years to project
+            return_range: (min, max) annual expected return
+            volatility_range: (min, max) annual volatility
+            return_steps: Number of return grid points
+            volatility_steps: Number of volatility grid points
+            simulations: Number of shared Monte Carlo shocks
+
+        Returns:
+            Dictionary with the grid axes, 'median', 'percentile_5' and
+            'probability_of_loss' matrices (returns x volatilities) and the
+            current market parameters for reference
+        """
+        portfolio_summary = self.get_portfolio_summary()
+        current_value = portfolio_summary.total_value
+
+        if current_value <= 0:
+            raise ValueError("No portfolio value to project")
+
+        expected_returns = np.linspace(return_range[0], return_range[1], return_steps)
+        volatilities = np.linspace(volatility_range[0], volatility_range[1], volatility_steps)
+
+        grid = self.projector.sensitivity_grid(
+            current_value=current_value,
+            years=years,
+            expected_returns=expected_returns,
+            volatilities=volatilities,
+            simulations=simulations
+        )
+
+        market_params = self.market_data_service.get_market_parameters()
+
+        return {
+            'current_value': float(current_value),
+            'years': years,
+            'expected_returns': expected_returns.tolist(),
+            'volatilities': volatilities.tolist(),
+            'median': grid['median'].tolist(),
+            'percentile_5': grid['percentile_5'].tolist(),
+            'probability_of_loss': grid['probability_of_loss'].tolist(),
+            'market_expected_return': float(market_params.get('expected_return', 0.12)),
+            'market_volatility': float(market_params.get('volatility', 0.22))
+        }
+
+    def _get_multi_asset_inputs(self, lookback_years: int = 3) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Per-holding daily returns and current weights for the multi-asset simulation
+
+        Built from the cached price matrix over the lookback, so the candles are
+        shared with the performance view of the same window.
+
+        Returns:
+            Tuple of (returns matrix dates x holdings, weights) or None without history
+        """
+        holdings = self._get_cached_holdings()
+        if not holdings:
+            return None
+
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=365 * lookback_years)
+        price_data = self._get_price_matrix(holdings, start_date, end_date)
+        if price_data is None:
+            return None
+
+        price_matrix, quantity_vector, _ = price_data
+        if len(price_matrix) < 3:
+            return None
+
+        latest_values = price_matrix.position_values(quantity_vector)[-1]
+        if latest_values.sum() <= 0:
+            return None
+
+        # Drop the first row: it has no prior close, so every return there is 0
+        return price_matrix.asset_returns()[1:], latest_values / latest_values.sum()
+
+    @timed('portfolio.scenarios')
     def get_scenario_analysis(self, years: int = 5) -> List[ScenarioResult]:
         """
         Get scenario analysis for portfolio
@@ -333,12 +542,14 @@ class PortfolioService:
                 )
             ]
 
+    @timed('portfolio.fire')
     def get_fire_projections(
             self,
             annual_expenses: float,
             current_age: int,
             retirement_age: int,
-            life_expectancy: int = 90
+            life_expectancy: int = 90,
+            monthly_contribution: Optional[float] = None
     ) -> Dict[str, float]:
         """
         Get FIRE (Financial Independence) projections
@@ -348,9 +559,13 @@ class PortfolioService:
             current_age: Current age
             retirement_age: Target retirement age
             life_expectancy: Expected life span
+            monthly_contribution: Monthly SIP until retirement (defaults to the
+                savings needed to reach the FIRE number)
 
         Returns:
-            Dictionary with FIRE calculations
+            Dictionary with FIRE calculations, including the Monte Carlo
+            probability that savings last to life expectancy and the
+            distribution of ages at which they run out
         """
         try:
             portfolio_summary = self.get_portfolio_summary()
@@ -380,12 +595,26 @@ class PortfolioService:
                 years=years_to_retirement
             )
 
+            monthly_savings_needed = savings_calcs.get('monthly_savings_needed', 0)
+            if monthly_contribution is None:
+                monthly_contribution = monthly_savings_needed
+
+            # Simulate saving until retirement, then inflation-indexed withdrawals
+            cash_flow = self.projector.cash_flow_monte_carlo(
+                current_value=current_value,
+                accumulation_years=years_to_retirement,
+                retirement_years=life_expectancy - retirement_age,
+                monthly_contribution=max(0.0, monthly_contribution),
+                annual_withdrawal=annual_expenses
+            )
+
             # Combine results
             result = {
                 **fire_calcs,
                 'current_portfolio_value': float(current_value),
                 'gap_to_fire': float(fire_calcs['fire_number'] - current_value),
-                'monthly_savings_needed': savings_calcs.get('monthly_savings_needed', 0),
+                'monthly_savings_needed': monthly_savings_needed,
+                'monthly_contribution': monthly_contribution,
                 'on_track': current_value >= (fire_calcs['fire_number'] * 0.2)  # Simple check
             }
 
@@ -394,12 +623,99 @@ class PortfolioService:
                 if isinstance(value, (int, float)):
                     result[key] = float(value)
 
+            result['success_probability'] = cash_flow.success_probability
+            result['probability_of_ruin'] = cash_flow.probability_of_ruin
+            result['depletion_age_percentiles'] = {
+                percentile: current_age + years for percentile, years in cash_flow.depletion_percentiles.items()
+            }
+            result['median_value_at_retirement'] = cash_flow.value_at_retirement[50]
+            result['monthly_savings_by_confidence'] = self._savings_by_confidence(
+                current_value, fire_calcs['fire_number'], years_to_retirement
+            )
+
             return result
 
         except Exception as e:
             logger.error(f"Error in FIRE projections: {e}")
             raise ValueError(f"FIRE calculation failed: {str(e)}")
 
+    @timed('portfolio.fire_plan')
+    def get_fire_plan(
+            self,
+            annual_expenses: float,
+            current_age: int,
+            life_expectancy: int = 90,
+            monthly_contribution: float = 0,
+            withdrawal_rate: float = 0.03
+    ) -> Dict[str, any]:
+        """
+        FIRE feasibility for every retirement age and a range of withdrawal rates
+
+        Args:
+            annual_expenses: Current annual expenses
+            current_age: Current age
+            life_expectancy: Expected life span
+            monthly_contribution: Monthly SIP until retirement
+            withdrawal_rate: Withdrawal rate to report the earliest age for
+
+        Returns:
+            Dictionary with the age and withdrawal-rate axes, the feasibility and
+            funded-ratio matrices, the earliest feasible age per rate (None where
+            no age works) and the earliest age at the requested withdrawal rate
+        """
+        if annual_expenses <= 0:
+            raise ValueError("Annual expenses must be positive")
+        if current_age <= 0 or life_expectancy <= current_age + 1:
+            raise ValueError("Invalid age parameters")
+
+        portfolio_summary = self.get_portfolio_summary()
+        withdrawal_rates = np.union1d(np.round(np.arange(0.025, 0.05 + 1e-9, 0.0025), 4), [withdrawal_rate])
+
+        plan = self.projector.fire_planner(
+            current_value=portfolio_summary.total_value,
+            annual_expenses=annual_expenses,
+            current_age=current_age,
+            life_expectancy=life_expectancy,
+            monthly_contribution=max(0.0, monthly_contribution),
+            withdrawal_rates=withdrawal_rates
+        )
+
+        earliest_ages = [None if np.isnan(age) else int(age) for age in plan['earliest_ages']]
+
+        return {
+            'current_portfolio_value': float(portfolio_summary.total_value),
+            'monthly_contribution': float(monthly_contribution),
+            'ages': plan['ages'].tolist(),
+            'withdrawal_rates': plan['withdrawal_rates'].tolist(),
+            'projected_values': plan['projected_values'].tolist(),
+            'retirement_needs': plan['retirement_needs'].tolist(),
+            'funded_ratio': plan['funded_ratio'].tolist(),
+            'feasible': plan['feasible'].tolist(),
+            'earliest_ages': earliest_ages,
+            'withdrawal_rate': float(withdrawal_rate),
+            'earliest_feasible_age': earliest_ages[int(np.searchsorted(withdrawal_rates, withdrawal_rate))]
+        }
+
+    def _savings_by_confidence(self, current_value: float, target_value: float, years: float) -> Dict[int, float]:
+        """
+        Monthly SIP needed to reach a target with 50/75/90/95% Monte Carlo confidence
+
+        Args:
+            current_value: Current portfolio value
+            target_value: Target portfolio value
+            years: Years to reach target
+
+        Returns:
+            Dictionary mapping confidence percentage to monthly savings
+        """
+        solved = self.projector.required_savings_monte_carlo(
+            current_value=current_value,
+            target_value=target_value,
+            years=years
+        )
+        return {int(round(p * 100)): savings for p, savings in solved['monthly_savings'].items()}
+
+    @timed('portfolio.goal_progress')
     def calculate_goal_progress(
             self,
             goal_amount: float,
@@ -458,18 +774,15 @@ class PortfolioService:
                 monthly_needed = max(0, simple_gap / (years_to_goal * 12))
                 savings_needed = {'monthly_savings_needed': monthly_needed}
 
-            # Run simple projection for probability of success
+            # Simulate monthly contributions to get the probability of reaching the goal
             try:
-                market_params = self.market_data_service.get_market_parameters()
-                expected_return = market_params.get('expected_return', 0.12)
-
-                # Simple calculation: will current value + contributions reach goal?
-                total_contributions = monthly_contribution * 12 * years_to_goal
-                future_current_value = current_value * ((1 + expected_return) ** years_to_goal)
-                future_contributions_value = total_contributions * ((1 + expected_return) ** (years_to_goal / 2))
-
-                projected_total = future_current_value + future_contributions_value
-                probability_of_success = min(1.0, max(0.0, projected_total / goal_amount))
+                cash_flow = self.projector.cash_flow_monte_carlo(
+                    current_value=current_value,
+                    accumulation_years=years_to_goal,
+                    monthly_contribution=monthly_contribution,
+                    target_value=goal_amount
+                )
+                probability_of_success = cash_flow.success_probability
 
             except Exception as e:
                 logger.error(f"Error calculating success probability: {e}")
@@ -489,6 +802,14 @@ class PortfolioService:
                 'on_track': monthly_contribution >= monthly_savings_needed
             }
 
+            try:
+                result['monthly_savings_by_confidence'] = self._savings_by_confidence(
+                    current_value, goal_amount, years_to_goal
+                )
+            except Exception as e:
+                logger.error(f"Error calculating Monte Carlo savings targets: {e}")
+                result['monthly_savings_by_confidence'] = {}
+
             return result
 
         except Exception as e:
@@ -497,46 +818,211 @@ class PortfolioService:
 
     def _get_cached_holdings(self) -> List[Holding]:
         """Get holdings with caching (without day change data)"""
-        if not self._is_cache_valid():
-            try:
-                print("Regular cache invalid, fetching fresh holdings...")
-                self._holdings_cache = self.upstox_service.get_holdings()
-                self._cache_timestamp = datetime.now()
-                print(f"Cached {len(self._holdings_cache)} regular holdings")
-            except Exception as e:
-                print(f"Error fetching regular holdings: {str(e)}")
-                self._holdings_cache = []
+        if not self._check_holdings_cache():
+            # Same key as the day-change variant: both fill the one holdings cache
+            self._inflight.do('holdings', self._fetch_holdings)
 
         return self._holdings_cache or []
 
+    def _fetch_holdings(self):
+        """Fetch regular holdings into the cache (runs once per concurrent miss)"""
+        try:
+            print("Regular cache invalid, fetching fresh holdings...")
+            self._holdings_cache = self.upstox_service.get_holdings()
+            self._cache_timestamp = datetime.now()
+            print(f"Cached {len(self._holdings_cache)} regular holdings")
+        except Exception as e:
+            print(f"Error fetching regular holdings: {str(e)}")
+            self._holdings_cache = []
+
     def _get_cached_holdings_with_day_change(self) -> List[Holding]:
         """Get holdings with day change data and caching"""
-        if not self._is_cache_valid():
+        if not self._check_holdings_cache():
+            self._inflight.do('holdings', self._fetch_holdings_with_day_change)
+
+        return self._holdings_cache or []
+
+    def _fetch_holdings_with_day_change(self):
+        """Fetch holdings with day change into the cache (runs once per concurrent miss)"""
+        try:
+            print("Day change cache invalid, fetching fresh holdings with day change...")
+            self._holdings_cache = self.upstox_service.get_holdings_with_day_change()
+            self._cache_timestamp = datetime.now()
+            print(f"Cached {len(self._holdings_cache)} holdings with day change data")
+        except Exception as e:
+            print(f"Error fetching holdings with day change: {str(e)}")
+            # Fallback to regular holdings without day change
             try:
-                print("Day change cache invalid, fetching fresh holdings with day change...")
-                self._holdings_cache = self.upstox_service.get_holdings_with_day_change()
+                print("Falling back to regular holdings...")
+                holdings = self.upstox_service.get_holdings()
+                # Add default day change values
+                for holding in holdings:
+                    if isinstance(holding, Holding):
+                        holding.day_change = 0
+                        holding.day_change_percentage = 0
+                        holding.day_pnl = 0
+                self._holdings_cache = holdings
                 self._cache_timestamp = datetime.now()
-                print(f"Cached {len(self._holdings_cache)} holdings with day change data")
-            except Exception as e:
-                print(f"Error fetching holdings with day change: {str(e)}")
-                # Fallback to regular holdings without day change
-                try:
-                    print("Falling back to regular holdings...")
-                    holdings = self.upstox_service.get_holdings()
-                    # Add default day change values
-                    for holding in holdings:
-                        if hasattr(holding, 'tradingsymbol'):  # Ensure it's a valid Holding object
-                            holding.day_change = 0
-                            holding.day_change_percentage = 0
-                            holding.day_pnl = 0
-                    self._holdings_cache = holdings
-                    self._cache_timestamp = datetime.now()
-                    print(f"Fallback successful, cached {len(self._holdings_cache)} holdings")
-                except Exception as e2:
-                    print(f"Error fetching regular holdings: {str(e2)}")
-                    self._holdings_cache = []
+                print(f"Fallback successful, cached {len(self._holdings_cache)} holdings")
+            except Exception as e2:
+                print(f"Error fetching regular holdings: {str(e2)}")
+                self._holdings_cache = []
 
-        return self._holdings_cache or []
+    def _get_price_matrix(
+            self,
+            holdings: List[Holding],
+            start_date: datetime,
+            end_date: datetime
+    ) -> Optional[Tuple[PriceMatrix, List[float], bool]]:
+        """
+        Get the aligned price matrix and per-column quantities for the holdings
+
+        Cached alongside the candle data (same timeout), keyed by date range and
+        the holdings' instruments/quantities, so performance and risk views of the
+        same window share one build.
+
+        The third element says whether every holding had candle data; only
+        complete matrices are cached, and callers caching anything derived from
+        the matrix should do the same.
+        """
+        fingerprint = self._holdings_fingerprint(holdings)
+        cache_key = f"{fingerprint}_{start_date.date()}_{end_date.date()}"
+
+        if cache_key in self._price_matrix_cache:
+            cached, cache_time = self._price_matrix_cache[cache_key]
+            if datetime.now() - cache_time < self._historical_cache_timeout:
+                record_cache_lookup('price_matrix', True)
+                return (*cached, True)
+            self._price_matrix_cache.pop(cache_key, None)
+            cache_evictions_total.inc(cache='price_matrix', reason='expired')
+        record_cache_lookup('price_matrix', False)
+
+        # Collect close-price series from the candle cache
+        closes = {}
+        quantities = {}
+        missing_symbols = []
+
+        for holding in holdings:
+            # Skip error entries or holdings missing an instrument_token
+            if not isinstance(holding, Holding):
+                continue
+
+            if not holding.instrument_token:
+                continue
+
+            hist_data = self._get_cached_historical_data(
+                holding.instrument_token, holding.tradingsymbol, start_date, end_date
+            )
+
+            if isinstance(hist_data, pd.DataFrame):
+                # Holdings of the same symbol share one price column
+                closes.setdefault(holding.tradingsymbol, hist_data['close'])
+                quantities[holding.tradingsymbol] = quantities.get(holding.tradingsymbol, 0) + holding.quantity
+            else:
+                missing_symbols.append(holding.tradingsymbol)
+
+        if missing_symbols:
+            logger.warning(f"No historical data for {len(missing_symbols)} holdings: {', '.join(missing_symbols)}")
+
+        if not closes:
+            return None
+
+        # Align all instruments on one calendar
+        price_matrix = PriceMatrix.from_series(closes)
+        quantity_vector = [quantities[symbol] for symbol in price_matrix.symbols]
+
+        # Don't cache partial matrices so missing holdings are retried next time
+        if not missing_symbols:
+            self._prune_expired(self._price_matrix_cache, 'price_matrix')
+            self._price_matrix_cache[cache_key] = ((price_matrix, quantity_vector), datetime.now())
+
+        return price_matrix, quantity_vector, not missing_symbols
+
+    def _get_portfolio_returns(
+            self,
+            holdings: List[Holding],
+            start_date: datetime,
+            end_date: datetime
+    ) -> Optional[pd.Series]:
+        """
+        Daily portfolio returns over a window, cached per holdings fingerprint
+
+        A cached series covering the window (from an earlier projection or a
+        longer /portfolio range) is sliced instead of rebuilding the price matrix.
+        """
+        if not holdings:
+            return None
+
+        fingerprint = self._holdings_fingerprint(holdings)
+        entry = self._returns_cache.get(fingerprint)
+        if entry is not None:
+            (returns, covered_start, covered_end), cache_time = entry
+            if datetime.now() - cache_time >= self._historical_cache_timeout:
+                self._returns_cache.pop(fingerprint, None)
+                cache_evictions_total.inc(cache='portfolio_returns', reason='expired')
+            elif covered_start <= start_date.date() and covered_end >= end_date.date():
+                record_cache_lookup('portfolio_returns', True)
+                return self._slice_dates(returns, start_date, end_date)
+        record_cache_lookup('portfolio_returns', False)
+
+        price_data = self._get_price_matrix(holdings, start_date, end_date)
+        if price_data is None:
+            return None
+
+        price_matrix, quantity_vector, complete = price_data
+        # Drop the first date: it has no prior close
+        returns = price_matrix.portfolio_returns(quantity_vector).iloc[1:]
+        # Like partial price matrices, returns missing a holding aren't kept so the fetch is retried
+        if complete:
+            self._store_portfolio_returns(holdings, returns, start_date, end_date)
+        return returns
+
+    def _store_portfolio_returns(
+            self,
+            holdings: List[Holding],
+            returns: pd.Series,
+            start_date: datetime,
+            end_date: datetime
+    ):
+        """Keep a returns series unless a fresh cached one already covers its window"""
+        if returns.empty:
+            return
+
+        fingerprint = self._holdings_fingerprint(holdings)
+        entry = self._returns_cache.get(fingerprint)
+        if entry is not None:
+            (_, covered_start, covered_end), cache_time = entry
+            if (datetime.now() - cache_time < self._historical_cache_timeout
+                    and covered_start <= start_date.date() and covered_end >= end_date.date()):
+                return
+
+        self._prune_expired(self._returns_cache, 'portfolio_returns')
+        self._returns_cache[fingerprint] = ((returns, start_date.date(), end_date.date()), datetime.now())
+
+    @staticmethod
+    def _slice_dates(data, start_date: datetime, end_date: datetime):
+        """Rows of a date-indexed series/frame from start_date to end_date inclusive"""
+        start = pd.Timestamp(start_date.date())
+        end = pd.Timestamp(end_date.date()) + pd.Timedelta(days=1)
+        if data.index.tz is not None:
+            start, end = start.tz_localize(data.index.tz), end.tz_localize(data.index.tz)
+        return data[(data.index >= start) & (data.index < end)]
+
+    @staticmethod
+    def _holdings_fingerprint(holdings: List[Holding]) -> str:
+        """Stable hash of the instruments and quantities held"""
+        positions = sorted(
+            (holding.instrument_token or holding.tradingsymbol, float(holding.quantity))
+            for holding in holdings if isinstance(holding, Holding)
+        )
+        return hashlib.sha1(repr(positions).encode()).hexdigest()[:16]
+
+    def _get_cached_benchmark_data(self, start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
+        """Get benchmark (Nifty 50) candles through the historical data cache"""
+        benchmark_data = self._get_cached_historical_data(
+            Config.BENCHMARK_SYMBOL, 'NIFTY 50', start_date, end_date
+        )
+        return benchmark_data if isinstance(benchmark_data, pd.DataFrame) else None
 
     def _get_cached_historical_data(
             self,
@@ -552,30 +1038,109 @@ class PortfolioService:
         if cache_key in self._historical_cache:
             cached_data, cache_time = self._historical_cache[cache_key]
             if datetime.now() - cache_time < self._historical_cache_timeout:
+                record_cache_lookup('historical', True)
                 return cached_data
+            self._historical_cache.pop(cache_key, None)
+            cache_evictions_total.inc(cache='historical', reason='expired')
+
+        # A fresh cached range of the same instrument that covers this one is sliced
+        covering = self._find_covering_historical(instrument_key, start_date, end_date)
+        if covering is not None:
+            record_cache_lookup('historical', True)
+            return self._slice_dates(covering, start_date, end_date)
+        record_cache_lookup('historical', False)
+
+        # Fetch fresh data; concurrent misses for the same key share one request
+        return self._inflight.do(
+            cache_key,
+            lambda: self._fetch_historical_data(cache_key, instrument_key, start_date, end_date)
+        )
 
-        # Fetch fresh data
+    def _find_covering_historical(
+            self,
+            instrument_key: str,
+            start_date: datetime,
+            end_date: datetime
+    ) -> Optional[pd.DataFrame]:
+        """Fresh cached candles for instrument_key whose date range contains the requested one"""
+        prefix = f"{instrument_key}_"
+        now = datetime.now()
+        for cache_key, (cached_data, cache_time) in list(self._historical_cache.items()):
+            if not cache_key.startswith(prefix) or now - cache_time >= self._historical_cache_timeout:
+                continue
+            cached_start, cached_end = cache_key[len(prefix):].split('_')
+            if cached_start <= start_date.date().isoformat() and cached_end >= end_date.date().isoformat():
+                return cached_data
+        return None
+
+    def _fetch_historical_data(
+            self,
+            cache_key: str,
+            instrument_key: str,
+            start_date: datetime,
+            end_date: datetime
+    ) -> Optional[pd.DataFrame]:
+        """Fetch historical data from Upstox and store it in the cache"""
         hist_data = self.upstox_service.get_historical_data(
             instrument_key, start_date, end_date
         )
 
         # Cache the result
         if hist_data is not None:
+            self._prune_expired(self._historical_cache, 'historical')
             self._historical_cache[cache_key] = (hist_data, datetime.now())
 
         return hist_data
 
+    def _prune_expired(self, cache: Dict, name: str):
+        """
+        Drop entries older than the historical timeout from a (value, timestamp) cache
+
+        Called before each insert so caches keyed by date range don't keep every
+        window ever requested, only the ones still fresh.
+        """
+        now = datetime.now()
+        expired = [
+            key for key, (_, cache_time) in list(cache.items())
+            if now - cache_time >= self._historical_cache_timeout
+        ]
+        for key in expired:
+            cache.pop(key, None)
+        if expired:
+            cache_evictions_total.inc(len(expired), cache=name, reason='expired')
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get single-flight counters for the holdings/historical caches and market parameters"""
+        return {
+            'portfolio_service': self._inflight.stats(),
+            'market_data_service': self.market_data_service.get_inflight_stats()
+        }
+
     def refresh_cache(self):
         """Force refresh of holdings cache and clear all cached data"""
         print("Refreshing portfolio cache...")
+        if self._holdings_cache is not None:
+            cache_evictions_total.inc(cache='holdings', reason='refresh')
+        if self._historical_cache:
+            cache_evictions_total.inc(len(self._historical_cache), cache='historical', reason='refresh')
+        if self._price_matrix_cache:
+            cache_evictions_total.inc(len(self._price_matrix_cache), cache='price_matrix', reason='refresh')
+        if self._returns_cache:
+            cache_evictions_total.inc(len(self._returns_cache), cache='portfolio_returns', reason='refresh')
         self._holdings_cache = None
         self._cache_timestamp = None
         self._historical_cache.clear()  # Clear historical data cache too
+        self._price_matrix_cache.clear()
+        self._returns_cache.clear()
+        with self._metrics_locks_guard:
+            self._metrics_store.clear()
+        clear_request_memo()
         print("Cache cleared, next request will fetch fresh data")
 
     def force_refresh_day_change(self):
         """Force refresh of day change data specifically"""
         print("Force refreshing day change data...")
+        clear_request_memo()
         try:
             # Bypass cache and fetch fresh day change data
             self._holdings_cache = self.upstox_service.get_holdings_with_day_change()
@@ -586,7 +1151,7 @@ class PortfolioService:
             # Fallback to regular holdings
             self._holdings_cache = self.upstox_service.get_holdings()
             for holding in self._holdings_cache:
-                if hasattr(holding, 'tradingsymbol'):
+                if isinstance(holding, Holding):
                     holding.day_change = 0
                     holding.day_change_percentage = 0
                     holding.day_pnl = 0
@@ -1,3 +1,5 @@
+import logging
+import time
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict
 
@@ -8,6 +10,19 @@ from config import Config
 from models.portfolio import Holding
 from services.auth_service import AuthService
 from utils.decorators import handle_api_errors
+from utils.metrics import record_upstox_failure, record_upstox_request
+from utils.rate_limiter import RateLimiter, RETRYABLE_STATUS_CODES
+from utils.timing import span
+
+logger = logging.getLogger(__name__)
+
+# Shared by every UpstoxService instance so all callers draw from one budget
+rate_limiter = RateLimiter(
+    Config.UPSTOX_RATE_LIMITS,
+    max_retries=Config.UPSTOX_MAX_RETRIES,
+    backoff_base=Config.UPSTOX_BACKOFF_BASE,
+    backoff_max=Config.UPSTOX_BACKOFF_MAX
+)
 
 
 class UpstoxService:
@@ -16,6 +31,64 @@ class UpstoxService:
     def __init__(self):
         self.config = Config()
         self.auth_service = AuthService()
+        self.rate_limiter = rate_limiter
+
+    def _request(self, endpoint: str, url: str, headers: Dict[str, str],
+                 params: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        Rate-limited GET with retries
+
+        Waits for a token from the endpoint's budget before every attempt and
+        retries 429/5xx responses and connection errors with backoff, honouring
+        Retry-After. Raises the last error once retries are exhausted.
+        """
+        max_retries = self.rate_limiter.max_retries
+        for attempt in range(max_retries + 1):
+            with span('upstox.wait'):
+                self.rate_limiter.acquire(endpoint)
+            start = time.perf_counter()
+            try:
+                with span(f'upstox.{endpoint}'):
+                    response = requests.get(url, headers=headers, params=params)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                record_upstox_request(endpoint, 'error', time.perf_counter() - start)
+                if attempt >= max_retries:
+                    self._record_failure(endpoint, attempt + 1, 'error', detail=str(e))
+                    raise
+                with span('upstox.wait'):
+                    self.rate_limiter.backoff(endpoint, attempt)
+                continue
+            record_upstox_request(endpoint, response.status_code, time.perf_counter() - start)
+
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < max_retries:
+                with span('upstox.wait'):
+                    self.rate_limiter.backoff(
+                        endpoint, attempt, response.status_code, response.headers.get('Retry-After')
+                    )
+                continue
+
+            if response.status_code >= 400:
+                self._record_failure(
+                    endpoint, attempt + 1, response.status_code, response.headers.get('Retry-After')
+                )
+            else:
+                self.rate_limiter.record_success(endpoint)
+            response.raise_for_status()
+            return response
+
+    def _record_failure(self, endpoint: str, attempts: int, status, retry_after: Optional[str] = None,
+                        detail: str = ''):
+        """Log and count a call that is given up on (retries exhausted or a non-retryable status)"""
+        self.rate_limiter.record_failure(endpoint)
+        record_upstox_failure(endpoint, status)
+        logger.error(
+            f"Upstox {endpoint} request failed after {attempts} attempt(s): status {status}"
+            f"{f', Retry-After {retry_after}' if retry_after else ''}{f' ({detail})' if detail else ''}"
+        )
+
+    def get_rate_limit_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint request, throttle-wait and retry counters"""
+        return self.rate_limiter.stats()
 
     @handle_api_errors
     def get_holdings(self) -> List[Holding]:
@@ -23,8 +96,7 @@ class UpstoxService:
         headers = self.auth_service.get_headers()
 
         try:
-            response = requests.get(self.config.UPSTOX_HOLDINGS_URL, headers=headers)
-            response.raise_for_status()
+            response = self._request('holdings', self.config.UPSTOX_HOLDINGS_URL, headers)
 
             holdings_data = response.json().get('data', [])
             print(f"API returned {len(holdings_data)} holdings")
@@ -87,7 +159,7 @@ class UpstoxService:
         holdings_map = {}
 
         for holding in holdings:
-            if hasattr(holding, 'instrument_token') and holding.instrument_token:
+            if holding.instrument_token:
                 instrument_keys.append(holding.instrument_token)
                 holdings_map[holding.instrument_token] = holding
                 print(f"Added instrument key for {holding.tradingsymbol}: {holding.instrument_token}")
@@ -101,11 +173,11 @@ class UpstoxService:
 
         # Update holdings with day change information from market quotes
         print(f"\n=== MATCHING HOLDINGS WITH MARKET QUOTES ===")
-        print(f"Holdings instrument tokens: {[h.instrument_token for h in holdings if hasattr(h, 'instrument_token')]}")
+        print(f"Holdings instrument tokens: {[h.instrument_token for h in holdings]}")
         print(f"Market quotes keys: {list(market_quotes.keys())}")
 
         for holding in holdings:
-            if hasattr(holding, 'instrument_token') and holding.instrument_token:
+            if holding.instrument_token:
                 print(f"\nProcessing {holding.tradingsymbol} with token: {holding.instrument_token}")
 
                 # Try to find matching quote data using multiple strategies
@@ -214,8 +286,7 @@ class UpstoxService:
                 print(f"Fetching batch {i//batch_size + 1}: {len(batch)} instruments")
 
                 params = {'instrument_key': batch_str}
-                response = requests.get(url, headers=headers, params=params)
-                response.raise_for_status()
+                response = self._request('market_quotes', url, headers, params=params)
 
                 batch_data = response.json()
 
@@ -282,8 +353,7 @@ class UpstoxService:
         url = f"{self.config.UPSTOX_HISTORICAL_URL}/{instrument_key}/days/1/{end_date.date()}/{start_date.date()}"
 
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
+            response = self._request('historical', url, headers)
 
             hist_data = response.json().get('data', {})
             candles = hist_data.get('candles', [])
@@ -302,7 +372,10 @@ class UpstoxService:
             return df
 
         except Exception as e:
-            print(f"Error fetching historical data for {instrument_key}: {str(e)}")
+            logger.error(
+                f"Historical data for {instrument_key} ({start_date.date()} to {end_date.date()}) "
+                f"unavailable: {e}"
+            )
             return None
 
     @handle_api_errors
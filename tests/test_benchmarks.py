@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.runner import Benchmark, compare_results, measure
+from benchmarks.cases import stub_portfolio_service
+from devtools.synthetic_data import SyntheticUpstoxService
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+
+    def test_case_names(self):
+        """Test that every parameter combination becomes a named case"""
+        bench = Benchmark('example', lambda size, mode: None, {'size': [10, 100], 'mode': ['a']})
+
+        self.assertEqual(
+            [name for name, _ in bench.cases()],
+            ['example[size=10,mode=a]', 'example[size=100,mode=a]']
+        )
+        self.assertEqual(list(Benchmark('plain', lambda: None).cases()), [('plain', {})])
+
+    def test_measure(self):
+        """Test round counts and statistic ordering"""
+        calls = []
+        timing = measure(lambda: calls.append(1), min_rounds=3, max_rounds=5, budget=0.0)
+
+        self.assertEqual(timing['rounds'], 3)
+        self.assertEqual(len(calls), 4)  # Includes the warm-up call
+        self.assertLessEqual(timing['min'], timing['median'])
+
+    def test_compare_results(self):
+        """Test regression, improvement, new and missing classification"""
+        baseline = {'results': {'a': {'median': 1.0}, 'b': {'median': 1.0}, 'c': {'median': 1.0},
+                                'gone': {'median': 1.0}}}
+        current = {'results': {'a': {'median': 1.3}, 'b': {'median': 0.7}, 'c': {'median': 1.1},
+                               'added': {'median': 1.0}}}
+
+        statuses = {row['case']: row['status'] for row in compare_results(baseline, current, threshold=0.15)}
+
+        self.assertEqual(statuses, {'a': 'regression', 'b': 'improvement', 'c': 'ok',
+                                    'gone': 'missing', 'added': 'new'})
+
+
+class TestStubDataSource(unittest.TestCase):
+
+    def test_portfolio_service_on_stub(self):
+        """Test that the stubbed service produces a summary for every holding"""
+        service = stub_portfolio_service(holdings=25, years=1)
+        summary = service.get_portfolio_summary()
+
+        self.assertIsInstance(service.upstox_service, SyntheticUpstoxService)
+        self.assertEqual(len(summary.holdings), 25)
+        self.assertGreater(summary.total_value, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -59,6 +59,59 @@ class TestFinancialCalculator(unittest.TestCase):
         self.assertEqual(metrics['sharpe'], 0)
         self.assertGreaterEqual(metrics['total_return'], 0)
 
+    def test_calculate_metrics_batch_matches_single_series(self):
+        """Test that batched metrics agree with calculate_metrics column by column"""
+        np.random.seed(42)
+        returns = pd.DataFrame(np.random.normal(0.0005, 0.01, (500, 4)), columns=['A', 'B', 'C', 'D'])
+
+        batch = self.calculator.calculate_metrics_batch(returns)
+
+        for column in returns.columns:
+            single = self.calculator.calculate_metrics(returns[column])
+            self.assertAlmostEqual(batch['volatility'][column], single['volatility'])
+            self.assertAlmostEqual(batch['sharpe'][column], single['sharpe'])
+            self.assertAlmostEqual(batch['max_drawdown'][column], single['max_drawdown'])
+            self.assertAlmostEqual(batch['total_return'][column], single['total_return'])
+            np.testing.assert_array_almost_equal(batch['cumulative_returns'][column], single['cumulative_returns'])
+
+    def test_calculate_metrics_batch_float32_and_zero_std(self):
+        """Test float32 output and zeroed metrics for constant columns"""
+        returns = np.column_stack([
+            np.full(10, 0.01),
+            np.array([0.01, -0.02, 0.03, 0.0, 0.01, -0.01, 0.02, 0.0, 0.01, -0.03])
+        ])
+
+        batch = self.calculator.calculate_metrics_batch(returns, dtype=np.float32)
+
+        self.assertEqual(batch['volatility'].dtype, np.float32)
+        self.assertEqual(batch['cumulative_returns'].shape, (10, 2))
+        self.assertEqual(batch['volatility'][0], 0)
+        self.assertEqual(batch['sharpe'][0], 0)
+        self.assertGreater(batch['volatility'][1], 0)
+        self.assertLess(batch['max_drawdown'][1], 0)
+
+    def test_calculate_risk_attribution(self):
+        """Test beta, variance contributions and component VaR identities"""
+        np.random.seed(7)
+        benchmark = np.random.normal(0, 0.01, 750)
+        asset_returns = np.column_stack([
+            1.5 * benchmark + np.random.normal(0, 0.002, 750),
+            0.5 * benchmark + np.random.normal(0, 0.002, 750),
+            np.random.normal(0, 0.015, 750)
+        ])
+        weights = np.array([0.5, 0.3, 0.2])
+
+        risk = self.calculator.calculate_risk_attribution(asset_returns, weights, benchmark)
+
+        self.assertAlmostEqual(risk['beta'][0], 1.5, delta=0.05)
+        self.assertAlmostEqual(risk['beta'][1], 0.5, delta=0.05)
+        self.assertAlmostEqual(risk['beta'][2], 0.0, delta=0.3)
+        self.assertAlmostEqual(risk['variance_contribution'].sum(), 1.0)
+        self.assertAlmostEqual(risk['component_var'].sum(), risk['portfolio_var'])
+
+        portfolio_returns = asset_returns @ weights
+        self.assertAlmostEqual(risk['portfolio_volatility'], portfolio_returns.std(ddof=1) * np.sqrt(252))
+
     def test_calculate_portfolio_value(self):
         """Test portfolio value calculations"""
         # Create test holdings DataFrame
@@ -89,6 +142,58 @@ class TestFinancialCalculator(unittest.TestCase):
         total_allocation = result_df['allocation_%'].sum()
         self.assertAlmostEqual(total_allocation, 100.0, places=1)
 
+    def test_calculate_portfolio_arrays(self):
+        """Test columnar portfolio calculations on NumPy arrays"""
+        columns = self.calculator.calculate_portfolio_arrays(
+            np.array([10, 5, 20]),
+            np.array([100.0, 200.0, 50.0]),
+            np.array([90.0, 180.0, 0.0])
+        )
+
+        np.testing.assert_array_equal(columns['current_value'], [1000, 1000, 1000])
+        np.testing.assert_array_equal(columns['investment'], [900, 900, 0])
+        np.testing.assert_array_equal(columns['return_%'], [11.11, 11.11, 0])  # Zero cost basis gives 0, not inf
+        np.testing.assert_array_almost_equal(columns['allocation_%'], [33.33, 33.33, 33.33])
+
+    def test_calculate_rolling_metrics_matches_window_loop(self):
+        """Test rolling metrics against a per-window reference"""
+        dates = pd.bdate_range('2020-01-01', periods=120)
+        rng = np.random.default_rng(3)
+        returns = pd.Series(rng.normal(0.0005, 0.01, len(dates)), index=dates)
+        portfolio = 1.2 * returns + pd.Series(rng.normal(0, 0.004, len(dates)), index=dates)
+        window = 20
+
+        rolling = self.calculator.calculate_rolling_metrics(returns, window, portfolio_returns=portfolio)
+
+        expected_return = returns.rolling(window).apply(lambda x: (1 + x).prod() ** (252 / len(x)) - 1)
+        np.testing.assert_allclose(rolling['rolling_return'], expected_return, rtol=1e-9)
+        self.assertTrue(rolling.iloc[:window - 1].isna().all().all())
+
+        for end in (window - 1, 57, len(returns) - 1):
+            window_returns = returns.iloc[end - window + 1:end + 1]
+            growth = np.concatenate([[1.0], (1 + window_returns).cumprod()])
+            expected_drawdown = (growth / np.maximum.accumulate(growth) - 1).min()
+            self.assertAlmostEqual(rolling['rolling_max_drawdown'].iloc[end], expected_drawdown)
+            self.assertAlmostEqual(
+                rolling['rolling_sharpe'].iloc[end],
+                window_returns.mean() / window_returns.std() * np.sqrt(252)
+            )
+            window_portfolio = portfolio.iloc[end - window + 1:end + 1]
+            self.assertAlmostEqual(
+                rolling['rolling_beta'].iloc[end],
+                np.cov(window_portfolio, window_returns)[0, 1] / window_returns.var()
+            )
+        self.assertTrue((rolling['rolling_drawdown'].dropna() <= 0).all())
+
+    def test_calculate_rolling_metrics_short_series(self):
+        """Test that a series shorter than the window yields all-NaN columns"""
+        returns = pd.Series([0.01, -0.02, 0.03])
+        rolling = self.calculator.calculate_rolling_metrics(returns, 5)
+
+        self.assertEqual(len(rolling), 3)
+        self.assertTrue(rolling.isna().all().all())
+        self.assertNotIn('rolling_beta', rolling.columns)
+
     def test_format_currency(self):
         """Test currency formatting"""
         self.assertEqual(self.calculator.format_currency(1000), "₹1,000")
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+import pandas as pd
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from devtools.fake_upstox import create_fake_upstox_app
+
+AUTH = {'Authorization': 'Bearer test-token'}
+
+
+class TestFakeUpstox(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_fake_upstox_app(holdings=5, years=2, seed=1)
+        self.client = self.app.test_client()
+
+    def test_holdings(self):
+        """Test the long-term holdings payload"""
+        response = self.client.get('/v2/portfolio/long-term-holdings', headers=AUTH)
+        holdings = response.get_json()['data']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(holdings), 5)
+        for key in ('tradingsymbol', 'quantity', 'average_price', 'last_price', 'pnl', 'close_price',
+                    'instrument_token'):
+            self.assertIn(key, holdings[0])
+
+    def test_historical_candles_parse_like_upstox(self):
+        """Test that candles load with the schema get_historical_data expects"""
+        holding = self.app.config['SYNTHETIC_MARKET'].holding_records[0]
+        end = self.app.config['SYNTHETIC_MARKET'].end_date.date()
+        url = f"/v3/historical-candle/{holding['instrument_token']}/days/1/{end}/{end - pd.Timedelta(days=90)}"
+        candles = self.client.get(url, headers=AUTH).get_json()['data']['candles']
+
+        df = pd.DataFrame(candles, columns=['date', 'open', 'high', 'low', 'close', 'volume', 'unknown'])
+        df['date'] = pd.to_datetime(df['date'])
+        self.assertTrue(df['date'].is_monotonic_decreasing)
+        self.assertTrue((df['high'] >= df[['open', 'close']].max(axis=1)).all())
+        self.assertTrue((df['low'] <= df[['open', 'close']].min(axis=1)).all())
+        self.assertEqual(df['close'].iloc[0], holding['last_price'])
+        self.assertGreater(len(df), 55)
+
+    def test_quotes_match_candles(self):
+        """Test that quotes are keyed by exchange:symbol and agree with the candles"""
+        holding = self.app.config['SYNTHETIC_MARKET'].holding_records[1]
+        response = self.client.get('/v2/market-quote/quotes',
+                                   query_string={'instrument_key': holding['instrument_token']}, headers=AUTH)
+        quote = response.get_json()['data'][f"NSE_EQ:{holding['tradingsymbol']}"]
+
+        self.assertEqual(quote['symbol'], holding['tradingsymbol'])
+        self.assertEqual(quote['last_price'], holding['last_price'])
+        self.assertEqual(quote['ohlc']['close'], holding['close_price'])
+
+    def test_deterministic(self):
+        """Test that the same seed serves the same data"""
+        other = create_fake_upstox_app(holdings=5, years=2, seed=1).test_client()
+        first = self.client.get('/v2/portfolio/long-term-holdings', headers=AUTH).get_json()
+        second = other.get('/v2/portfolio/long-term-holdings', headers=AUTH).get_json()
+
+        self.assertEqual(first, second)
+
+    def test_fault_injection(self):
+        """Test missing-token, 429 and 500 responses"""
+        self.assertEqual(self.client.get('/v2/portfolio/long-term-holdings').status_code, 401)
+
+        throttled = create_fake_upstox_app(holdings=1, years=1, rate_limit_probability=1.0, retry_after=3)
+        response = throttled.test_client().get('/v2/portfolio/long-term-holdings', headers=AUTH)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '3')
+
+        failing = create_fake_upstox_app(holdings=1, years=1, error_probability=1.0)
+        self.assertEqual(failing.test_client().get('/v2/portfolio/long-term-holdings', headers=AUTH).status_code, 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+from unittest.mock import Mock
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.market_data_service import MarketDataService
+
+
+class TestMarketParameters(unittest.TestCase):
+
+    def setUp(self):
+        self.service = MarketDataService()
+        self.service.upstox_service = Mock()
+        self.service.upstox_service.get_historical_data.return_value = None  # No VIX data
+
+        end_date = datetime.now()
+        dates = pd.bdate_range(end_date - timedelta(days=365 * 10), end_date, tz='Asia/Kolkata')
+        close = 10000 * np.exp(np.cumsum(np.random.default_rng(11).normal(0.0004, 0.011, len(dates))))
+        self.benchmark = pd.DataFrame({'close': close}, index=dates)
+        self.service.upstox_service.get_benchmark_data.return_value = self.benchmark
+
+    def test_single_benchmark_download(self):
+        """Test that every window and the rolling statistics share one fetch"""
+        parameters = self.service.get_market_parameters()
+        self.service.calculate_rolling_statistics(window_years=1)
+
+        self.assertEqual(self.service.upstox_service.get_benchmark_data.call_count, 1)
+        self.assertEqual(set(parameters['windows']), {'3-year', '5-year', '10-year'})
+        self.assertEqual(parameters['expected_return'], parameters['windows']['10-year']['expected_return'])
+
+    def test_window_matches_direct_calculation(self):
+        """Test prefix-sum window estimates against a direct pandas calculation"""
+        parameters = self.service.get_market_parameters()
+        three_year = parameters['windows']['3-year']
+
+        start = pd.Timestamp(datetime.now() - timedelta(days=365 * 3)).tz_localize('Asia/Kolkata')
+        window = self.benchmark[self.benchmark.index >= start]['close']
+        daily_returns = window.pct_change().dropna()
+        period_years = 365 * 3 / 365.25
+        expected_cagr = (window.iloc[-1] / window.iloc[0]) ** (1 / period_years) - 1
+        cumulative = (1 + daily_returns).cumprod()
+
+        self.assertAlmostEqual(three_year['expected_return'], expected_cagr)
+        self.assertAlmostEqual(three_year['volatility'], daily_returns.std() * np.sqrt(252))
+        self.assertAlmostEqual(
+            three_year['sharpe_ratio'],
+            (daily_returns - 0.06 / 252).mean() / daily_returns.std() * np.sqrt(252)
+        )
+        self.assertAlmostEqual(three_year['max_drawdown'], min((cumulative / cumulative.cummax() - 1).min(), 0))
+        self.assertEqual(three_year['data_points'], len(daily_returns))
+
+    def test_blended_estimate(self):
+        """Test that the blend is a weighted average over windows with data"""
+        blended = self.service.get_market_parameters()['blended']
+        windows = self.service.get_market_parameters()['windows']
+
+        self.assertAlmostEqual(sum(blended['weights'].values()), 1.0)
+        expected = sum(windows[name]['expected_return'] * weight for name, weight in blended['weights'].items())
+        self.assertAlmostEqual(blended['expected_return'], expected)
+
+    def test_short_history_skips_long_windows(self):
+        """Test that windows without enough data are dropped from the blend"""
+        self.service.upstox_service.get_benchmark_data.return_value = self.benchmark.iloc[-900:]
+        parameters = self.service.get_market_parameters()
+
+        self.assertIsNone(parameters['windows']['10-year'])
+        self.assertIsNone(parameters['windows']['5-year'])
+        self.assertEqual(parameters['blended']['weights'], {'3-year': 1.0})
+
+
+class TestVixStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.service = MarketDataService()
+        self.service.upstox_service = Mock()
+
+        end_date = datetime.now()
+        dates = pd.bdate_range(end_date - timedelta(days=365 * 10), end_date, tz='Asia/Kolkata')
+        vix = 12 + 8 * np.abs(np.random.default_rng(5).standard_t(4, len(dates)))
+        self.vix = pd.DataFrame({'close': vix}, index=dates)
+        self.service.upstox_service.get_historical_data.return_value = self.vix
+
+    def test_lookbacks_share_one_fetch(self):
+        """Test that stats, sentiment and distribution slice one cached history"""
+        recent = self.service.get_volatility_index_stats(days_back=30)
+        long_run = self.service.get_volatility_index_stats(days_back=365 * 3)
+        self.service.get_current_market_sentiment()
+        self.service.get_vix_distribution(days_back=365 * 3)
+
+        self.assertEqual(self.service.upstox_service.get_historical_data.call_count, 1)
+        self.assertEqual(recent['current_vix'], self.vix['close'].iloc[-1])
+        self.assertLess(recent['data_points'], long_run['data_points'])
+
+    def test_exact_percentile_rank(self):
+        """Test binary-search percentile rank against a direct count"""
+        sorted_vix = np.array([10.0, 12.0, 12.0, 15.0, 20.0])
+
+        self.assertEqual(MarketDataService._calculate_vix_percentile(5.0, sorted_vix), 0.0)
+        self.assertEqual(MarketDataService._calculate_vix_percentile(25.0, sorted_vix), 100.0)
+        self.assertEqual(MarketDataService._calculate_vix_percentile(12.0, sorted_vix), 40.0)  # Mid-rank of ties
+        self.assertEqual(MarketDataService._calculate_vix_percentile(13.0, sorted_vix), 60.0)
+
+        sentiment = self.service.get_current_market_sentiment()
+        start = pd.Timestamp(datetime.now() - timedelta(days=365 * 3)).tz_localize('Asia/Kolkata')
+        window = self.vix[self.vix.index >= start]['close']
+        current = window.iloc[-1]
+        expected = ((window < current).sum() + (window <= current).sum()) / 2 / len(window) * 100
+        self.assertAlmostEqual(sentiment['vix_percentile'], expected)
+
+    def test_distribution(self):
+        """Test histogram counts and rank over time"""
+        distribution = self.service.get_vix_distribution(days_back=365, bins=20)
+
+        self.assertEqual(len(distribution['counts']), 20)
+        self.assertEqual(len(distribution['bin_edges']), 21)
+        self.assertEqual(sum(distribution['counts']), distribution['data_points'])
+        self.assertEqual(len(distribution['percentile_rank']), len(distribution['dates']))
+        self.assertEqual(distribution['current_percentile'], distribution['percentile_rank'][-1])
+
+    def test_distribution_rank_uses_only_past_data(self):
+        """Test that each day's rank is against the lookback ending that day"""
+        distribution = self.service.get_vix_distribution(days_back=365)
+        closes = self.vix['close']
+
+        for position in (0, len(distribution['dates']) // 2, -1):
+            date = pd.Timestamp(distribution['dates'][position]).tz_localize('Asia/Kolkata')
+            trailing = closes[(closes.index > date - pd.Timedelta(days=365)) & (closes.index <= date)]
+            value = trailing.iloc[-1]
+            expected = ((trailing < value).sum() + (trailing <= value).sum()) / 2 / len(trailing) * 100
+            self.assertAlmostEqual(distribution['percentile_rank'][position], expected)
+
+    def test_no_vix_data(self):
+        """Test fallbacks when the VIX history is unavailable"""
+        self.service.upstox_service.get_historical_data.return_value = None
+
+        self.assertEqual(self.service.get_volatility_index_stats()['data_points'], 0)
+        self.assertIsNone(self.service.get_vix_distribution())
+        self.assertEqual(self.service.get_current_market_sentiment()['vix_percentile'], 50.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
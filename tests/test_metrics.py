@@ -0,0 +1,138 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.cases import stub_portfolio_service
+from config import TestingConfig
+from utils.metrics import (MetricsRegistry, cache_evictions_total, cache_requests_total, chart_payload_bytes,
+                           monte_carlo_paths_total, observe_chart, observe_simulation, registry)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge_exposition(self):
+        """Test HELP/TYPE lines, label escaping and values"""
+        requests = self.registry.counter('requests_total', 'Requests', ('endpoint', 'status'))
+        requests.inc(endpoint='holdings', status=200)
+        requests.inc(2, endpoint='holdings', status=200)
+        self.registry.gauge('rate', 'Rate').set(1.5)
+        self.registry.counter('labels_total', 'Labels', ('name',)).inc(name='say "hi"')
+
+        text = self.registry.render()
+
+        self.assertIn('# HELP requests_total Requests\n# TYPE requests_total counter\n', text)
+        self.assertIn('requests_total{endpoint="holdings",status="200"} 3.0\n', text)
+        self.assertIn('# TYPE rate gauge\nrate 1.5\n', text)
+        self.assertIn('labels_total{name="say \\"hi\\""} 1.0\n', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket boundaries (inclusive upper bounds), sum and count"""
+        latency = self.registry.histogram('latency_seconds', 'Latency', ('endpoint',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, endpoint='quotes')
+
+        lines = self.registry.render().splitlines()
+
+        self.assertIn('latency_seconds_bucket{endpoint="quotes",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="quotes",le="1.0"} 3', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="quotes",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{endpoint="quotes"} 3.65', lines)
+        self.assertIn('latency_seconds_count{endpoint="quotes"} 4', lines)
+
+    def test_label_and_registration_errors(self):
+        """Test that wrong labels, negative increments and duplicate names are rejected"""
+        counter = self.registry.counter('errors_total', 'Errors', ('kind',))
+
+        with self.assertRaises(ValueError):
+            counter.inc(other='x')
+        with self.assertRaises(ValueError):
+            counter.inc(-1, kind='x')
+        with self.assertRaises(ValueError):
+            self.registry.counter('errors_total', 'Again')
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        registry.clear()
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_observe_simulation_reads_default_paths(self):
+        """Test that paths come from the simulations argument, defaulted or passed"""
+        @observe_simulation('example')
+        def simulate(value, simulations=500):
+            return value
+
+        simulate(1)
+        simulate(1, simulations=250)
+
+        self.assertEqual(monte_carlo_paths_total.value(simulation='example'), 750)
+
+    def test_observe_chart_sums_tuple_payloads(self):
+        """Test that multi-chart helpers report the combined HTML size"""
+        @observe_chart('example')
+        def charts():
+            return 'ab', 'cde'
+
+        charts()
+
+        self.assertEqual(chart_payload_bytes.stats(chart='example'), {'count': 1, 'sum': 5.0})
+
+    def test_cache_counters(self):
+        """Test hit, miss and refresh-eviction counts for the historical cache"""
+        service = stub_portfolio_service(holdings=3, years=1)
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=200)
+
+        service.get_performance_analysis(start_date, end_date)
+        misses = cache_requests_total.value(cache='historical', result='miss')
+        service.get_performance_analysis(start_date, end_date)
+        service.refresh_cache()
+
+        self.assertEqual(misses, 4)  # Three holdings and the benchmark
+        self.assertEqual(cache_requests_total.value(cache='historical', result='miss'), misses)
+        self.assertGreater(cache_requests_total.value(cache='price_matrix', result='hit'), 0)
+        self.assertEqual(cache_evictions_total.value(cache='historical', reason='refresh'), 4)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+
+    @staticmethod
+    def create_client(metrics_token=None, admin_token=None):
+        from app import create_app
+
+        with patch.object(TestingConfig, 'METRICS_TOKEN', metrics_token), \
+                patch.object(TestingConfig, 'ADMIN_TOKEN', admin_token):
+            return create_app('testing').test_client()
+
+    def test_metrics_route(self):
+        """Test that /metrics serves the registry to a scraper with the bearer token"""
+        client = self.create_client(metrics_token='scrape')
+        response = client.get('/metrics', headers={'Authorization': 'Bearer scrape'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE upstox_request_duration_seconds histogram', response.get_data(as_text=True))
+
+    def test_metrics_route_requires_token(self):
+        """Test that /metrics is hidden without tokens and rejects unauthenticated scrapes"""
+        self.assertEqual(self.create_client().get('/metrics').status_code, 404)
+
+        client = self.create_client(metrics_token='scrape', admin_token='secret')
+        self.assertEqual(client.get('/metrics').status_code, 403)
+        self.assertEqual(client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+        self.assertEqual(client.get('/metrics', headers={'X-Admin-Token': 'secret'}).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.portfolio import Holding, HoldingsFrame
+
+
+class TestHolding(unittest.TestCase):
+
+    def test_holding_is_slotted(self):
+        """Test that holdings have no per-instance __dict__"""
+        holding = Holding('INFY', 10, 90.0, 100.0, 100.0, 99.0)
+
+        self.assertFalse(hasattr(holding, '__dict__'))
+        with self.assertRaises(AttributeError):
+            holding.unknown_field = 1
+
+    def test_defaults_and_equality(self):
+        """Test default field values and value equality"""
+        holding = Holding('INFY', 10, 90.0, 100.0, 100.0, 99.0)
+
+        self.assertIsNone(holding.instrument_token)
+        self.assertEqual(holding.day_pnl, 0)
+        self.assertEqual(holding, Holding('INFY', 10, 90.0, 100.0, 100.0, 99.0))
+        self.assertNotEqual(holding, Holding('TCS', 10, 90.0, 100.0, 100.0, 99.0))
+
+
+class TestHoldingsFrame(unittest.TestCase):
+
+    def setUp(self):
+        self.holdings = [
+            Holding('INFY', 10, 90.0, 100.0, 100.0, 99.0, instrument_token='NSE_EQ|INE009A01021', day_pnl=10.0),
+            Holding('TCS', 5, 180.0, 200.0, 100.0, 205.0, instrument_token='NSE_EQ|INE467B01029', day_pnl=-25.0)
+        ]
+
+    def test_round_trip_through_holdings(self):
+        """Test conversion from records to columns and back"""
+        frame = HoldingsFrame.from_holdings(self.holdings)
+
+        self.assertEqual(len(frame), 2)
+        np.testing.assert_array_equal(frame['quantity'], [10, 5])
+        self.assertEqual(frame['tradingsymbol'].tolist(), ['INFY', 'TCS'])
+        self.assertEqual(frame.to_holdings(), self.holdings)
+
+    def test_write_back_updates_records(self):
+        """Test that computed columns are copied onto the source records"""
+        frame = HoldingsFrame.from_holdings(self.holdings)
+        frame['current_value'] = frame['quantity'] * frame['last_price']
+        frame.write_back(self.holdings, ['current_value'])
+
+        self.assertEqual([h.current_value for h in self.holdings], [1000.0, 1000.0])
+
+    def test_pandas_conversion_is_zero_copy(self):
+        """Test that DataFrame conversion shares the numeric arrays"""
+        frame = HoldingsFrame.from_holdings(self.holdings)
+        df = frame.to_dataframe()
+
+        self.assertIsInstance(df, pd.DataFrame)
+        self.assertTrue(np.shares_memory(df['last_price'].to_numpy(), frame['last_price']))
+
+        round_trip = HoldingsFrame.from_dataframe(df)
+        self.assertTrue(np.shares_memory(round_trip['last_price'], frame['last_price']))
+
+    def test_to_records_is_json_ready(self):
+        """Test that records contain plain Python values"""
+        import json
+
+        records = HoldingsFrame.from_holdings(self.holdings).to_records(['tradingsymbol', 'day_pnl'])
+
+        self.assertEqual(records, [
+            {'tradingsymbol': 'INFY', 'day_pnl': 10.0},
+            {'tradingsymbol': 'TCS', 'day_pnl': -25.0}
+        ])
+        json.dumps(records)
+
+    def test_rejects_misaligned_columns(self):
+        """Test that columns of the wrong length are refused"""
+        frame = HoldingsFrame.from_holdings(self.holdings)
+        with self.assertRaises(ValueError):
+            frame['last_price'] = [1.0]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,311 @@
+import unittest
+from unittest.mock import Mock, patch
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.portfolio import Holding
+from services.portfolio_service import PortfolioService
+from utils.streaming_metrics import StreamingMetrics
+
+
+def make_holding(symbol, quantity, average_price, last_price, day_pnl=0.0):
+    """Build a Holding with consistent P&L"""
+    holding = Holding(
+        tradingsymbol=symbol,
+        quantity=quantity,
+        average_price=average_price,
+        last_price=last_price,
+        pnl=(last_price - average_price) * quantity,
+        close_price=last_price,
+        instrument_token=f"NSE_EQ|{symbol}"
+    )
+    holding.day_pnl = day_pnl
+    return holding
+
+
+class TestPortfolioSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.service = PortfolioService()
+        self.service.upstox_service = Mock()
+
+    def _summary_for(self, holdings):
+        self.service.upstox_service.get_holdings_with_day_change.return_value = holdings
+        return self.service.get_portfolio_summary()
+
+    def test_summary_totals(self):
+        """Test aggregate values and per-holding write-back"""
+        summary = self._summary_for([
+            make_holding('INFY', 10, 90, 100, day_pnl=50),
+            make_holding('TCS', 5, 180, 200, day_pnl=-20)
+        ])
+
+        self.assertEqual(summary.total_value, 2000)
+        self.assertEqual(summary.total_investment, 1800)
+        self.assertEqual(summary.total_pnl, 200)
+        self.assertAlmostEqual(summary.total_return_percentage, 200 / 1800 * 100)
+        self.assertEqual(summary.total_day_pnl, 30)
+
+        infy, tcs = summary.holdings
+        self.assertEqual(infy.current_value, 1000)
+        self.assertEqual(tcs.investment, 900)
+        self.assertEqual(infy.allocation_percentage, 50.0)
+        self.assertEqual(tcs.return_percentage, 11.11)
+
+    def test_invalid_entries_do_not_shift_values(self):
+        """Test that skipped entries keep calculated values on the right holding"""
+        summary = self._summary_for([
+            {'error': 'bad row'},
+            make_holding('INFY', 10, 90, 100),
+            make_holding('TCS', 1, 100, 400)
+        ])
+
+        self.assertEqual([h.tradingsymbol for h in summary.holdings], ['INFY', 'TCS'])
+        infy, tcs = summary.holdings
+        self.assertEqual(infy.current_value, 1000)
+        self.assertEqual(tcs.current_value, 400)
+        self.assertEqual(tcs.return_percentage, 300.0)
+
+    def test_empty_holdings(self):
+        """Test that an empty portfolio yields a zero summary"""
+        summary = self._summary_for([])
+
+        self.assertEqual(summary.total_value, 0)
+        self.assertEqual(summary.holdings, [])
+
+    def test_concurrent_holdings_variants_share_one_fetch(self):
+        """Test that plain and day-change cache misses coalesce into one upstream fetch"""
+        def slow_holdings():
+            time.sleep(0.05)
+            return [make_holding('INFY', 10, 90, 100)]
+
+        upstox = self.service.upstox_service = Mock()
+        upstox.get_holdings.side_effect = slow_holdings
+        upstox.get_holdings_with_day_change.side_effect = slow_holdings
+        barrier = threading.Barrier(2)
+        results = []
+
+        def request(getter):
+            barrier.wait()
+            results.append(getter())
+
+        threads = [
+            threading.Thread(target=request, args=(self.service._get_cached_holdings,)),
+            threading.Thread(target=request, args=(self.service._get_cached_holdings_with_day_change,))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(upstox.get_holdings.call_count + upstox.get_holdings_with_day_change.call_count, 1)
+        self.assertIs(results[0], results[1])
+
+
+class TestRiskAttribution(unittest.TestCase):
+
+    def setUp(self):
+        self.service = PortfolioService()
+        self.service.upstox_service = Mock()
+        self.service.upstox_service.get_holdings.return_value = [
+            make_holding('INFY', 10, 90, 100),
+            make_holding('TCS', 5, 180, 200)
+        ]
+        self.service.upstox_service.get_historical_data.side_effect = self._candles
+        self.start_date = datetime(2024, 1, 1)
+        self.end_date = datetime(2024, 12, 31)
+
+    @staticmethod
+    def _candles(instrument_key, start_date, end_date):
+        dates = pd.bdate_range(start_date, end_date)
+        seed = sum(map(ord, instrument_key))
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, len(dates))))
+        return pd.DataFrame({'close': close}, index=dates)
+
+    def test_risk_attribution_rows(self):
+        """Test that every holding gets a row and contributions add up"""
+        risk = self.service.get_risk_attribution(self.start_date, self.end_date)
+
+        self.assertEqual({row['tradingsymbol'] for row in risk['holdings']}, {'INFY', 'TCS'})
+        self.assertAlmostEqual(sum(row['weight'] for row in risk['holdings']), 1.0)
+        self.assertAlmostEqual(sum(row['variance_contribution'] for row in risk['holdings']), 1.0)
+        self.assertAlmostEqual(sum(row['component_var'] for row in risk['holdings']), risk['portfolio_var'])
+        for row in risk['holdings']:
+            self.assertIsNotNone(row['beta'])
+            self.assertLessEqual(row['max_drawdown'], 0)
+
+    def test_shares_candles_with_performance_analysis(self):
+        """Test that risk attribution reuses the performance analysis fetches"""
+        self.service.get_performance_analysis(self.start_date, self.end_date)
+        calls_after_performance = self.service.upstox_service.get_historical_data.call_count
+
+        self.service.get_risk_attribution(self.start_date, self.end_date)
+
+        self.assertEqual(calls_after_performance, 3)  # Two holdings plus the benchmark
+        self.assertEqual(self.service.upstox_service.get_historical_data.call_count, calls_after_performance)
+
+    def test_narrower_window_reuses_metrics_accumulator(self):
+        """Test that a window inside the accumulated history is served without a rebuild"""
+        self.service.get_performance_analysis(self.start_date, self.end_date)
+        accumulators = dict(self.service._metrics_store)
+
+        portfolio_metrics, benchmark_metrics, _ = self.service.get_performance_analysis(
+            datetime(2024, 6, 1), self.end_date
+        )
+
+        self.assertEqual(len(accumulators), 2)  # Portfolio and benchmark
+        for key, accumulator in accumulators.items():
+            self.assertIs(self.service._metrics_store[key], accumulator)
+        self.assertGreater(portfolio_metrics.volatility, 0)
+        self.assertGreaterEqual(portfolio_metrics.cumulative_returns.index[0], pd.Timestamp('2024-06-01'))
+
+    def test_disjoint_windows_do_not_leave_gaps(self):
+        """Test that a window after the accumulated history rebuilds instead of leaving a gap"""
+        self.service.get_performance_analysis(datetime(2020, 1, 1), datetime(2020, 12, 31))
+        self.service.get_performance_analysis(datetime(2024, 12, 1), self.end_date)
+        portfolio_metrics, benchmark_metrics, _ = self.service.get_performance_analysis(self.start_date, self.end_date)
+
+        fresh = PortfolioService()
+        fresh.upstox_service = self.service.upstox_service
+        expected_portfolio, expected_benchmark, _ = fresh.get_performance_analysis(self.start_date, self.end_date)
+
+        self.assertEqual(len(portfolio_metrics.cumulative_returns), len(expected_portfolio.cumulative_returns))
+        self.assertAlmostEqual(portfolio_metrics.total_return, expected_portfolio.total_return)
+        self.assertAlmostEqual(benchmark_metrics.total_return, expected_benchmark.total_return)
+
+    def test_expired_entries_pruned_on_insert(self):
+        """Test that storing a new window drops expired price matrices and candles"""
+        self.service.get_performance_analysis(self.start_date, self.end_date)
+        stale = datetime.now() - timedelta(hours=2)
+        for cache in (self.service._price_matrix_cache, self.service._historical_cache):
+            for key, (value, _) in list(cache.items()):
+                cache[key] = (value, stale)
+
+        self.service.get_performance_analysis(datetime(2023, 1, 1), datetime(2023, 12, 31))
+
+        self.assertEqual(len(self.service._price_matrix_cache), 1)
+        self.assertEqual(len(self.service._historical_cache), 3)  # Only the 2023 fetches
+        for key in self.service._historical_cache:
+            self.assertTrue(key.endswith('_2023-01-01_2023-12-31'))
+
+    def test_metrics_store_evicts_least_recently_used(self):
+        """Test that the accumulator store is capped and keeps recently used series"""
+        self.service._metrics_store_size = 2
+        returns = pd.Series(0.001, index=pd.bdate_range('2024-01-01', periods=20))
+
+        for key in ('first', 'second', 'first', 'third'):
+            self.service._get_streaming_metrics(key, returns, self.start_date, self.end_date)
+
+        self.assertEqual(list(self.service._metrics_store), ['first', 'third'])
+        self.assertNotIn('second', self.service._metrics_locks)
+
+    def test_concurrent_requests_extend_accumulator_once(self):
+        """Test that concurrent requests adding the same new bars do not collide"""
+        returns = pd.Series(0.001, index=pd.bdate_range('2024-01-01', periods=60))
+        self.service._get_streaming_metrics('portfolio', returns.iloc[:40], self.start_date, self.end_date)
+
+        update = StreamingMetrics.update
+
+        def slow_update(accumulator, date, daily_return):
+            time.sleep(0.001)  # Widen the window between filtering and appending
+            update(accumulator, date, daily_return)
+
+        barrier = threading.Barrier(4)
+        errors = []
+
+        def request():
+            barrier.wait()
+            try:
+                self.service._get_streaming_metrics('portfolio', returns, self.start_date, self.end_date)
+            except Exception as e:
+                errors.append(e)
+
+        with patch.object(StreamingMetrics, 'update', slow_update):
+            threads = [threading.Thread(target=request) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.service._metrics_store['portfolio']), 60)
+
+
+
+class TestPortfolioReturnsReuse(unittest.TestCase):
+
+    def setUp(self):
+        self.service = PortfolioService()
+        self.service.upstox_service = Mock()
+        holdings = lambda: [make_holding('INFY', 10, 90, 100), make_holding('TCS', 5, 180, 200)]
+        self.service.upstox_service.get_holdings.side_effect = holdings
+        self.service.upstox_service.get_holdings_with_day_change.side_effect = holdings
+        self.service.upstox_service.get_historical_data.side_effect = TestRiskAttribution._candles
+        self.fetches = self.service.upstox_service.get_historical_data
+
+    def test_historical_projection_serves_portfolio_window(self):
+        """Test that /portfolio slices the candles a historical projection fetched"""
+        self.service.get_portfolio_projections(years=2, simulations=1000, method='historical')
+        self.assertEqual(self.fetches.call_count, 2)  # Holdings only, no benchmark
+
+        end_date = datetime.now()
+        portfolio_metrics, _, returns_df = self.service.get_performance_analysis(
+            end_date - timedelta(days=30), end_date
+        )
+
+        self.assertEqual(self.fetches.call_count, 3)  # Only the benchmark is new
+        self.assertIsNotNone(portfolio_metrics)
+        self.assertGreaterEqual(returns_df.index[0], pd.Timestamp((end_date - timedelta(days=30)).date()))
+
+    def test_projection_reuses_longer_performance_window(self):
+        """Test that a historical projection slices returns from a wider /portfolio range"""
+        end_date = datetime.now()
+        self.service.get_performance_analysis(end_date - timedelta(days=365 * 5), end_date)
+        calls = self.fetches.call_count
+
+        projector = self.service.projector
+        with patch.object(self.service, '_get_price_matrix') as build, \
+                patch.object(projector, 'monte_carlo_projection', wraps=projector.monte_carlo_projection) as simulate:
+            self.service.get_portfolio_projections(years=2, simulations=1000, method='historical')
+
+        build.assert_not_called()
+        self.assertEqual(self.fetches.call_count, calls)
+        self.assertEqual(simulate.call_args.kwargs['method'], 'historical')
+
+    def test_partial_returns_not_cached(self):
+        """Test that returns missing a holding's history are not cached, so the fetch is retried"""
+        def flaky_candles(instrument_key, start_date, end_date):
+            if instrument_key == 'NSE_EQ|TCS' and self.fetches.call_count <= 2:
+                return None
+            return TestRiskAttribution._candles(instrument_key, start_date, end_date)
+
+        self.fetches.side_effect = flaky_candles
+        end_date = datetime.now()
+        self.service.get_performance_analysis(end_date - timedelta(days=365 * 5), end_date)
+
+        self.assertEqual(self.service._returns_cache, {})
+
+        self.service.get_portfolio_projections(years=2, simulations=1000, method='historical')
+
+        tcs_fetches = [call for call in self.fetches.call_args_list if call.args[0] == 'NSE_EQ|TCS']
+        self.assertEqual(len(tcs_fetches), 2)
+        self.assertEqual(len(self.service._returns_cache), 1)
+
+    def test_refresh_clears_returns(self):
+        """Test that a cache refresh drops the cached returns series"""
+        self.service.get_portfolio_projections(years=2, simulations=1000, method='historical')
+        self.service.refresh_cache()
+
+        self.assertEqual(self.service._returns_cache, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
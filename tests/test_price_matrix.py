@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.price_matrix import PriceMatrix
+
+
+class TestPriceMatrix(unittest.TestCase):
+
+    def setUp(self):
+        dates = pd.date_range('2024-01-01', periods=5, freq='D')
+        # INFY misses a day in the middle, TCS only starts trading on day 3
+        self.closes = {
+            'INFY': pd.Series([100.0, 101.0, 103.0, 104.0], index=dates[[0, 1, 3, 4]]),
+            'TCS': pd.Series([200.0, 210.0, 220.0], index=dates[2:])
+        }
+        self.quantities = [10, 2]
+
+    def test_union_calendar_and_forward_fill(self):
+        """Test alignment on the union of dates with ffill and leading zeros"""
+        matrix = PriceMatrix.from_series(self.closes)
+
+        self.assertEqual(len(matrix), 5)
+        self.assertEqual(matrix.symbols, ['INFY', 'TCS'])
+        np.testing.assert_array_equal(matrix.prices[:, 0], [100, 101, 101, 103, 104])
+        np.testing.assert_array_equal(matrix.prices[:, 1], [0, 0, 200, 210, 220])
+
+    def test_matches_pandas_union_frame(self):
+        """Test parity with an outer-joined, forward-filled pandas frame"""
+        expected = pd.concat(
+            {symbol: self.closes[symbol] * quantity for symbol, quantity in zip(self.closes, self.quantities)},
+            axis=1,
+            sort=True
+        )
+        expected = expected.sort_index().ffill().fillna(0)
+        expected['Portfolio Value'] = expected.sum(axis=1)
+
+        frame = PriceMatrix.from_series(self.closes).to_frame(self.quantities)
+
+        pd.testing.assert_frame_equal(frame, expected, check_freq=False)
+
+    def test_portfolio_value_and_returns(self):
+        """Test matrix-vector valuation and returns"""
+        matrix = PriceMatrix.from_series(self.closes)
+        value = matrix.portfolio_value(self.quantities)
+
+        np.testing.assert_array_equal(value, [1000, 1010, 1410, 1450, 1480])
+        returns = matrix.portfolio_returns(self.quantities)
+        self.assertEqual(returns.iloc[0], 0)
+        self.assertAlmostEqual(returns.iloc[1], 0.01)
+        self.assertAlmostEqual(returns.iloc[4], 1480 / 1450 - 1)
+
+    def test_asset_returns_ignore_leading_zeros(self):
+        """Test that instruments without history yet get 0 returns, not inf"""
+        returns = PriceMatrix.from_series(self.closes).asset_returns()
+
+        self.assertTrue(np.isfinite(returns).all())
+        self.assertEqual(returns[2, 1], 0)
+        self.assertAlmostEqual(returns[3, 1], 0.05)
+
+    def test_empty_input(self):
+        """Test that no series yields an empty matrix"""
+        matrix = PriceMatrix.from_series({})
+        self.assertEqual(len(matrix), 0)
+        self.assertEqual(matrix.symbols, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+from flask import Flask
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import TestingConfig
+from utils.profiling import ProfileStore, RequestProfile, init_profiling
+
+ADMIN = {'X-Admin-Token': 'secret'}
+
+
+def slow_sum(n):
+    return sum(i * i for i in range(n))
+
+
+class TestRequestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ProfileStore(self.directory.name, max_profiles=2)
+        self.app = Flask(__name__)
+        self.app.config['ADMIN_TOKEN'] = 'secret'
+        init_profiling(self.app, self.store)
+
+        @self.app.route('/work')
+        def work():
+            return str(slow_sum(10000))
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_flagged_admin_request_is_profiled(self):
+        """Test that ?profile=1 with the admin token saves a profile and report"""
+        response = self.client.get('/work?profile=1', headers=ADMIN)
+        profile_id = response.headers['X-Profile-Id']
+
+        with open(self.store.path(profile_id, 'txt')) as report_file:
+            report = report_file.read()
+
+        self.assertIsNotNone(self.store.path(profile_id, 'prof'))
+        self.assertTrue(report.startswith('Request: GET /work?profile=1\n'))
+        self.assertIn('slow_sum', report)
+        self.assertIn('== tracemalloc', report)
+
+    def test_unflagged_or_unauthorised_requests_are_not_profiled(self):
+        """Test that the flag alone (wrong or missing token) does nothing"""
+        for headers in ({}, {'X-Admin-Token': 'wrong'}):
+            response = self.client.get('/work?profile=1', headers=headers)
+            self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertNotIn('X-Profile-Id', self.client.get('/work', headers=ADMIN).headers)
+        self.assertEqual(self.store.list(), [])
+
+    def test_token_only_accepted_from_header(self):
+        """Test that an admin_token query parameter does not authorise profiling"""
+        response = self.client.get('/work?profile=1&admin_token=secret')
+
+        self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertEqual(self.store.list(), [])
+
+    def test_store_prunes_oldest(self):
+        """Test that only the newest max_profiles are kept"""
+        ids = [self.client.get('/work?profile=1', headers=ADMIN).headers['X-Profile-Id'] for _ in range(3)]
+
+        self.assertEqual(len(self.store.list()), 2)
+        self.assertIsNone(self.store.path(ids[0], 'txt'))
+        self.assertIsNone(self.store.path('../etc/passwd', 'txt'))
+
+    def test_sampling(self):
+        """Test that a sample rate of 1 profiles every request"""
+        app = Flask(__name__)
+        init_profiling(app, self.store, sample_rate=1.0)
+        app.add_url_rule('/work', 'work', lambda: 'ok')
+
+        self.assertIn('X-Profile-Id', app.test_client().get('/work').headers)
+
+    def test_profile_outside_flask(self):
+        """Test that a profile can be captured around plain code"""
+        profile = RequestProfile('benchmark')
+        profile.start()
+        slow_sum(1000)
+        profile.stop()
+
+        self.assertGreater(profile.elapsed, 0)
+        self.assertIn('slow_sum', profile.report())
+
+
+class TestAdminRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_client(self, admin_token):
+        from app import create_app
+
+        with patch.object(TestingConfig, 'ADMIN_TOKEN', admin_token), \
+                patch.object(TestingConfig, 'PROFILING_DIR', self.directory.name):
+            return create_app('testing').test_client()
+
+    def test_admin_routes_hidden_without_token(self):
+        """Test that admin routes 404 when no admin token is configured"""
+        client = self.create_client(None)
+
+        self.assertEqual(client.get('/admin/profiles', headers=ADMIN).status_code, 404)
+
+    def test_profile_listing_and_download(self):
+        """Test listing and downloading a profile captured on a real route"""
+        client = self.create_client('secret')
+
+        self.assertEqual(client.get('/admin/profiles').status_code, 403)
+        profile_id = client.get('/?profile=1', headers=ADMIN).headers['X-Profile-Id']
+
+        listing = client.get('/admin/profiles', headers=ADMIN).get_json()
+        download = client.get(f'/admin/profiles/{profile_id}/prof', headers=ADMIN)
+
+        self.assertEqual(listing['profiles'][0]['id'], profile_id)
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment', download.headers['Content-Disposition'])
+        self.assertEqual(client.get(f'/admin/profiles/{profile_id}/exe', headers=ADMIN).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -302,6 +302,346 @@ class TestIntegrationScenarios(unittest.TestCase):
         self.assertGreater(results.expected_return, 0.06)
 
 
+class TestMultiAssetMonteCarlo(unittest.TestCase):
+    """Test cases for the correlated multi-asset simulation"""
+
+    def setUp(self):
+        self.projector = PortfolioProjector()
+        rng = np.random.default_rng(1)
+        common = rng.normal(0.0004, 0.01, (750, 1))
+        self.asset_returns = common + rng.normal(0, 0.006, (750, 4))
+        self.weights = np.array([0.4, 0.3, 0.2, 0.1])
+
+    def test_multi_asset_projection(self):
+        """Test that the multi-asset method returns ordered results"""
+        results = self.projector.monte_carlo_projection(
+            current_value=1000000,
+            expected_return=0.12,
+            years=10,
+            simulations=5000,
+            method='multi_asset',
+            asset_returns=self.asset_returns,
+            weights=self.weights,
+            random_seed=7
+        )
+
+        self.assertEqual(len(results.final_values), 5000)
+        self.assertLess(results.percentiles[5], results.percentiles[50])
+        self.assertLess(results.percentiles[50], results.percentiles[95])
+        self.assertTrue(np.all(results.final_values > 0))
+
+    def test_chunking_does_not_change_paths(self):
+        """Test that batch size only bounds memory"""
+        def run(chunk_size):
+            np.random.seed(3)
+            return PortfolioProjector._multi_asset_monte_carlo(
+                1000, self.asset_returns, self.weights, 5, 1000, drift_prior=0.1, chunk_size=chunk_size
+            )
+
+        np.testing.assert_allclose(run(64), run(1000))
+
+    def test_correlation_widens_distribution(self):
+        """Test that correlated holdings diversify less than independent ones"""
+        rng = np.random.default_rng(2)
+        independent = rng.normal(0.0004, 0.012, (750, 5))
+        correlated = np.repeat(independent[:, :1], 5, axis=1) + rng.normal(0, 0.001, (750, 5))
+        weights = np.full(5, 0.2)
+
+        np.random.seed(4)
+        spread_independent = np.std(PortfolioProjector._multi_asset_monte_carlo(
+            1000, independent, weights, 5, 5000, drift_prior=0.1))
+        np.random.seed(4)
+        spread_correlated = np.std(PortfolioProjector._multi_asset_monte_carlo(
+            1000, correlated, weights, 5, 5000, drift_prior=0.1))
+
+        self.assertGreater(spread_correlated, 1.5 * spread_independent)
+
+    def test_shrunk_covariance(self):
+        """Test shrinkage keeps a short, wide sample positive definite"""
+        returns = np.random.default_rng(5).normal(0, 0.01, (20, 40))  # Fewer dates than holdings
+        covariance, shrinkage = PortfolioProjector._shrunk_covariance(returns)
+
+        self.assertGreater(shrinkage, 0)
+        self.assertLessEqual(shrinkage, 1)
+        np.linalg.cholesky(covariance)  # Raises if not positive definite
+
+    def test_requires_asset_inputs(self):
+        """Test validation of the multi-asset inputs"""
+        with self.assertRaises(ValueError):
+            self.projector.monte_carlo_projection(current_value=1000, method='multi_asset')
+
+
+class TestBlockBootstrap(unittest.TestCase):
+    """Test cases for the block-bootstrap historical simulation"""
+
+    def setUp(self):
+        self.projector = PortfolioProjector()
+        dates = pd.bdate_range('2021-01-01', periods=756)
+        self.returns = pd.Series(np.random.default_rng(8).normal(0.0005, 0.01, len(dates)), index=dates)
+
+    def test_blocks_cover_exact_horizon(self):
+        """Test that trimmed, wrapped blocks sum exactly steps returns"""
+        constant = np.full(50, 0.001)
+        for stationary in (True, False):
+            np.random.seed(0)
+            growth = PortfolioProjector._block_bootstrap_log_growth(constant, 200, 252, 21, stationary)
+            np.testing.assert_allclose(growth, 0.252)
+
+        # Any two-period circular block covers both alternating values, even when it wraps
+        alternating = np.array([0.01, -0.02])
+        growth = PortfolioProjector._block_bootstrap_log_growth(alternating, 100, 40, 2, stationary=False)
+        np.testing.assert_allclose(growth, 20 * -0.01)
+
+    def test_blocks_longer_than_series(self):
+        """Test that blocks wrapping the whole series more than once are summed correctly"""
+        log_returns = np.array([0.01, 0.02, 0.03])
+        growth = PortfolioProjector._block_bootstrap_log_growth(log_returns, 10, 12, 12, stationary=False)
+        np.testing.assert_allclose(growth, 0.24)
+
+    def test_historical_bootstrap_matches_drift(self):
+        """Test that bootstrapped paths keep the series' average growth"""
+        expected = 5 * 252 * np.log1p(self.returns).mean()
+        for bootstrap in ('stationary', 'circular'):
+            np.random.seed(9)
+            final_values = PortfolioProjector._historical_monte_carlo(
+                1.0, self.returns, 5, 20000, bootstrap=bootstrap
+            )
+            self.assertAlmostEqual(np.mean(np.log(final_values)), expected, delta=0.02)
+
+    def test_historical_projection_daily_and_monthly(self):
+        """Test the historical method at both frequencies"""
+        for frequency in ('daily', 'monthly'):
+            results = self.projector.monte_carlo_projection(
+                current_value=1000000,
+                historical_returns=self.returns,
+                years=10,
+                simulations=2000,
+                method='historical',
+                frequency=frequency,
+                random_seed=42
+            )
+            self.assertEqual(len(results.final_values), 2000)
+            self.assertLess(results.percentiles[5], results.percentiles[95])
+
+    def test_monthly_without_date_index(self):
+        """Test monthly aggregation falls back to 21-day groups"""
+        monthly = PortfolioProjector._monthly_log_returns(pd.Series(np.full(63, 0.001)))
+        self.assertEqual(len(monthly), 3)
+        np.testing.assert_allclose(monthly, 21 * np.log1p(0.001))
+
+
+class TestCashFlowMonteCarlo(unittest.TestCase):
+    """Test cases for the monthly cash-flow simulation"""
+
+    def setUp(self):
+        self.projector = PortfolioProjector()
+
+    def test_contributions_without_volatility(self):
+        """Test that zero volatility reproduces the deterministic SIP value"""
+        result = self.projector.cash_flow_monte_carlo(
+            current_value=100000,
+            accumulation_years=10,
+            monthly_contribution=1000,
+            expected_return=0.0,
+            volatility=0.0,
+            simulations=100
+        )
+
+        self.assertAlmostEqual(result.value_at_retirement[50], 100000 + 1000 * 120)
+        self.assertEqual(result.success_probability, 1.0)
+        self.assertEqual(len(result.yearly_percentiles[50]), 10)
+
+    def test_ruin_detection(self):
+        """Test that withdrawals exhausting the portfolio are flagged at the right time"""
+        result = self.projector.cash_flow_monte_carlo(
+            current_value=120000,
+            accumulation_years=0,
+            retirement_years=20,
+            annual_withdrawal=12000,
+            expected_return=0.0,
+            volatility=0.0,
+            inflation_rate=0.0,
+            simulations=50
+        )
+
+        self.assertEqual(result.probability_of_ruin, 1.0)
+        self.assertEqual(result.success_probability, 0.0)
+        self.assertAlmostEqual(result.depletion_percentiles[50], 10.0)
+
+    def test_zero_start_not_ruined_before_withdrawals(self):
+        """Test that an empty portfolio with no contributions is not depleted while accumulating"""
+        result = self.projector.cash_flow_monte_carlo(
+            current_value=0,
+            accumulation_years=5,
+            retirement_years=5,
+            expected_return=0.08,
+            volatility=0.2,
+            simulations=100,
+            random_seed=1
+        )
+
+        self.assertEqual(result.probability_of_ruin, 0.0)
+        self.assertEqual(result.success_probability, 1.0)
+
+        with_withdrawals = self.projector.cash_flow_monte_carlo(
+            current_value=0, accumulation_years=5, retirement_years=5, annual_withdrawal=12000,
+            expected_return=0.08, volatility=0.2, inflation_rate=0.0, simulations=100, random_seed=1
+        )
+        self.assertEqual(with_withdrawals.probability_of_ruin, 1.0)
+        self.assertAlmostEqual(with_withdrawals.depletion_percentiles[50], 5 + 1 / 12)
+
+    def test_target_probability(self):
+        """Test that the goal probability counts paths reaching the target"""
+        kwargs = dict(current_value=1000000, accumulation_years=5, expected_return=0.1,
+                      volatility=0.2, simulations=5000, random_seed=1)
+        easy = self.projector.cash_flow_monte_carlo(target_value=500000, **kwargs)
+        median = self.projector.cash_flow_monte_carlo(target_value=1000000 * np.exp(0.08 * 5), **kwargs)
+
+        self.assertGreater(easy.success_probability, 0.95)
+        self.assertAlmostEqual(median.success_probability, 0.5, delta=0.05)
+
+    def test_sequence_risk_with_volatility(self):
+        """Test that volatility lowers success for a plan that works on average"""
+        kwargs = dict(current_value=2500000, accumulation_years=0, retirement_years=30,
+                      annual_withdrawal=100000, expected_return=0.06, inflation_rate=0.04,
+                      simulations=4000, random_seed=2)
+        calm = self.projector.cash_flow_monte_carlo(volatility=0.0, **kwargs)
+        volatile = self.projector.cash_flow_monte_carlo(volatility=0.25, **kwargs)
+
+        self.assertEqual(calm.success_probability, 1.0)
+        self.assertLess(volatile.success_probability, 0.9)
+        self.assertTrue(volatile.depletion_percentiles)
+
+
+class TestRequiredSavingsMonteCarlo(unittest.TestCase):
+
+    def setUp(self):
+        self.projector = PortfolioProjector()
+
+    def test_zero_volatility_matches_annuity(self):
+        """Test that without volatility every confidence level gives the closed-form SIP"""
+        result = self.projector.required_savings_monte_carlo(
+            current_value=500000, target_value=5000000, years=10,
+            expected_return=0.1, volatility=0.0, simulations=100, random_seed=1
+        )
+
+        monthly_growth = np.exp(0.1 / 12)
+        annuity = sum(monthly_growth ** k for k in range(120))
+        expected = (5000000 - 500000 * monthly_growth ** 120) / annuity
+        for savings in result['monthly_savings'].values():
+            self.assertAlmostEqual(savings, expected, places=4)
+
+    def test_solution_hits_success_probability(self):
+        """Test that simulating the solved SIP reaches the requested success rate"""
+        kwargs = dict(current_value=1000000, expected_return=0.12, volatility=0.2)
+        result = self.projector.required_savings_monte_carlo(
+            target_value=10000000, years=15, simulations=10000, random_seed=3, **kwargs
+        )
+        savings = result['monthly_savings']
+
+        self.assertLess(savings[0.5], savings[0.75])
+        self.assertLess(savings[0.9], savings[0.95])
+
+        check = self.projector.cash_flow_monte_carlo(
+            accumulation_years=15, monthly_contribution=savings[0.9], target_value=10000000,
+            simulations=10000, random_seed=4, **kwargs
+        )
+        self.assertAlmostEqual(check.success_probability, 0.9, delta=0.015)
+
+    def test_already_funded_goal(self):
+        """Test that a goal the current value already covers needs no savings"""
+        result = self.projector.required_savings_monte_carlo(
+            current_value=5000000, target_value=1000000, years=5,
+            expected_return=0.1, volatility=0.15, simulations=1000, random_seed=1
+        )
+
+        self.assertGreater(result['probability_without_savings'], 0.95)
+        self.assertEqual(result['monthly_savings'][0.5], 0.0)
+
+
+class TestSensitivityGrid(unittest.TestCase):
+
+    def setUp(self):
+        self.projector = PortfolioProjector()
+
+    def test_grid_matches_per_cell_simulation(self):
+        """Test each cell against a direct simulation with the same shocks"""
+        returns = np.array([0.02, 0.1, 0.18])
+        volatilities = np.array([0.1, 0.25])
+        grid = self.projector.sensitivity_grid(1000000, 10, returns, volatilities, simulations=5000, random_seed=9)
+
+        np.random.seed(9)
+        shocks = np.random.standard_normal(5000)
+        for i, mu in enumerate(returns):
+            for j, sigma in enumerate(volatilities):
+                values = 1000000 * np.exp(10 * (mu - 0.5 * sigma ** 2) + sigma * np.sqrt(10) * shocks)
+                self.assertAlmostEqual(grid['median'][i, j], np.median(values), delta=1e-6 * np.median(values))
+                self.assertAlmostEqual(grid['percentile_5'][i, j], np.percentile(values, 5),
+                                       delta=1e-6 * np.median(values))
+                self.assertAlmostEqual(grid['probability_of_loss'][i, j], np.mean(values < 1000000))
+
+    def test_grid_shape_and_monotonicity(self):
+        """Test grid orientation and that higher returns lower the loss probability"""
+        grid = self.projector.sensitivity_grid(
+            500000, 5, np.linspace(0, 0.2, 20), np.linspace(0.0, 0.4, 15), random_seed=1
+        )
+
+        self.assertEqual(grid['median'].shape, (20, 15))
+        self.assertTrue(np.all(np.diff(grid['probability_of_loss'], axis=0) <= 0))
+        self.assertTrue(np.all(np.diff(grid['median'], axis=0) > 0))
+        self.assertEqual(grid['probability_of_loss'][-1, 0], 0.0)  # No volatility, positive return
+
+
+class TestFirePlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.projector = PortfolioProjector()
+
+    def test_matches_single_queries(self):
+        """Test planner cells against calculate_fire_number and calculate_required_savings"""
+        plan = self.projector.fire_planner(
+            current_value=2000000, annual_expenses=600000, current_age=35, life_expectancy=85,
+            monthly_contribution=50000, withdrawal_rates=[0.03, 0.04], expected_return=0.1, inflation_rate=0.06
+        )
+
+        for row in (0, 9, 20):
+            age = plan['ages'][row]
+            fire = self.projector.calculate_fire_number(
+                600000, 35, age, life_expectancy=85, inflation_rate=0.06, withdrawal_rate=0.04
+            )
+            self.assertAlmostEqual(plan['fire_numbers'][row, 1], fire['fire_number'], places=2)
+
+            savings = self.projector.calculate_required_savings(
+                2000000, fire['fire_number'], age - 35, expected_return=0.1
+            )
+            funded = savings['monthly_savings_needed'] <= 50000
+            self.assertEqual(bool(plan['feasible'][row, 1]), funded)
+
+    def test_earliest_age(self):
+        """Test the earliest feasible age per rate and that higher rates retire no later"""
+        plan = self.projector.fire_planner(
+            current_value=1000000, annual_expenses=500000, current_age=30, life_expectancy=90,
+            monthly_contribution=40000, expected_return=0.11, inflation_rate=0.05
+        )
+
+        self.assertEqual(plan['feasible'].shape, (len(plan['ages']), len(plan['withdrawal_rates'])))
+        for column, age in enumerate(plan['earliest_ages']):
+            row = int(age) - 31
+            self.assertTrue(plan['feasible'][row, column])
+            self.assertFalse(plan['feasible'][:row, column].any())
+        self.assertTrue(np.all(np.diff(plan['earliest_ages']) <= 0))
+
+    def test_infeasible_rate(self):
+        """Test NaN earliest age when no retirement age is funded"""
+        plan = self.projector.fire_planner(
+            current_value=0, annual_expenses=1000000, current_age=60, life_expectancy=70,
+            withdrawal_rates=[0.03], expected_return=0.08, inflation_rate=0.06
+        )
+
+        self.assertTrue(np.isnan(plan['earliest_ages'][0]))
+        self.assertEqual(len(plan['retirement_needs']), 9)
+
+
 if __name__ == '__main__':
     unittest.main()
     
\ No newline at end of file
@@ -0,0 +1,177 @@
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    """Deterministic clock whose sleep just advances time"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_refill_is_capped_at_capacity(self):
+        """Test that idle time never accrues more than capacity tokens"""
+        clock = FakeClock()
+        bucket = TokenBucket(10, 1, clock)
+        bucket.tokens = 0
+        clock.now = 100
+        bucket.refill()
+        self.assertEqual(bucket.tokens, 10)
+
+    def test_throttle_and_recover(self):
+        """Test adaptive rate reduction after 429 and additive recovery"""
+        bucket = TokenBucket(10, 1, FakeClock())
+        bucket.throttle()
+        self.assertAlmostEqual(bucket.rate, 5.0)
+        for _ in range(20):
+            bucket.recover()
+        self.assertAlmostEqual(bucket.rate, bucket.base_rate)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = RateLimiter(
+            {'default': [(5, 1)], 'historical': [(2, 1), (3, 60)]},
+            max_retries=3,
+            backoff_base=0.5,
+            backoff_max=10,
+            clock=self.clock,
+            sleep=self.clock.sleep
+        )
+
+    def test_burst_within_budget_does_not_wait(self):
+        """Test that calls inside the bucket capacity proceed immediately"""
+        for _ in range(5):
+            self.assertEqual(self.limiter.acquire('holdings'), 0.0)
+        self.assertEqual(self.clock.slept, [])
+
+    def test_acquire_waits_for_token(self):
+        """Test that exceeding the per-second budget waits for the refill"""
+        self.limiter.acquire('historical')
+        self.limiter.acquire('historical')
+        waited = self.limiter.acquire('historical')
+
+        self.assertAlmostEqual(waited, 0.5)
+        stats = self.limiter.stats()['historical']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['throttled'], 1)
+        self.assertAlmostEqual(stats['throttle_wait_seconds'], 0.5)
+
+    def test_every_window_is_enforced(self):
+        """Test that the per-minute window applies on top of the per-second one"""
+        for _ in range(4):
+            self.limiter.acquire('historical')
+        # Fourth call must wait for the 3-per-minute bucket (20s per token)
+        self.assertGreaterEqual(self.clock.now, 19.9)
+
+    def test_endpoints_have_independent_budgets(self):
+        """Test that draining one endpoint does not throttle another"""
+        for _ in range(2):
+            self.limiter.acquire('historical')
+        self.assertEqual(self.limiter.acquire('market_quotes'), 0.0)
+
+    @patch('utils.rate_limiter.random.uniform', return_value=0.0)
+    def test_backoff_honours_retry_after(self, _):
+        """Test that Retry-After seconds drive the delay and 429 slows the bucket"""
+        delay = self.limiter.backoff('historical', attempt=0, status_code=429, retry_after='3')
+
+        self.assertEqual(delay, 3.0)
+        stats = self.limiter.stats()['historical']
+        self.assertEqual(stats['rate_limited'], 1)
+        self.assertEqual(stats['retries'], 1)
+        self.assertLess(stats['rate_multiplier'], 1.0)
+
+    @patch('utils.rate_limiter.random.uniform', side_effect=lambda low, high: high)
+    def test_backoff_is_exponential_and_capped(self, _):
+        """Test exponential growth of the jitter ceiling up to backoff_max"""
+        delays = [self.limiter.backoff('default', attempt=i) for i in range(7)]
+        self.assertEqual(delays, [0.5, 1.0, 2.0, 4.0, 8.0, 10, 10])
+
+
+class TestUpstoxServiceRetries(unittest.TestCase):
+
+    def setUp(self):
+        from services.upstox_service import UpstoxService
+
+        self.clock = FakeClock()
+        self.service = UpstoxService()
+        self.service.rate_limiter = RateLimiter(
+            {'default': [(100, 1)]}, max_retries=2, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    @staticmethod
+    def _response(status_code, headers=None):
+        response = Mock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.raise_for_status = Mock()
+        if status_code >= 400:
+            response.raise_for_status.side_effect = Exception(f"HTTP {status_code}")
+        return response
+
+    @patch('services.upstox_service.requests.get')
+    def test_request_retries_429_then_succeeds(self, mock_get):
+        """Test that a rate-limited call is retried instead of dropped"""
+        mock_get.side_effect = [
+            self._response(429, {'Retry-After': '1'}),
+            self._response(200)
+        ]
+
+        response = self.service._request('historical', 'http://upstox/test', {})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertGreaterEqual(self.clock.now, 1.0)
+
+    @patch('services.upstox_service.requests.get')
+    def test_request_raises_after_exhausting_retries(self, mock_get):
+        """Test that persistent 429s surface as an error after max_retries"""
+        mock_get.return_value = self._response(429)
+
+        with self.assertRaises(Exception):
+            self.service._request('historical', 'http://upstox/test', {})
+
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(self.service.get_rate_limit_stats()['historical']['failures'], 1)
+
+    @patch('services.upstox_service.requests.get')
+    def test_historical_data_failure_is_logged_and_counted(self, mock_get):
+        """Test that get_historical_data reports a final 429 instead of failing silently"""
+        from datetime import datetime
+        from utils.metrics import upstox_failures_total
+
+        mock_get.return_value = self._response(429, {'Retry-After': '2'})
+        self.service.auth_service = Mock()
+        self.service.auth_service.get_headers.return_value = {}
+        failures = upstox_failures_total.value(endpoint='historical', status=429)
+
+        with self.assertLogs('services.upstox_service', level='ERROR') as logs:
+            data = self.service.get_historical_data('NSE_EQ|INFY', datetime(2024, 1, 1), datetime(2024, 6, 30))
+
+        self.assertIsNone(data)
+        self.assertEqual(upstox_failures_total.value(endpoint='historical', status=429), failures + 1)
+        self.assertIn('failed after 3 attempt(s): status 429, Retry-After 2', logs.output[0])
+        self.assertIn('NSE_EQ|INFY (2024-01-01 to 2024-06-30)', logs.output[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
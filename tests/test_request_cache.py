@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+
+from flask import Flask
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.cases import stub_portfolio_service
+from utils.request_cache import clear_request_memo, request_memoized
+from utils.timing import end_trace, start_trace
+
+
+class Counter:
+
+    def __init__(self):
+        self.calls = 0
+
+    @request_memoized(bypass='force_refresh')
+    def compute(self, value, scale=1, force_refresh=False):
+        self.calls += 1
+        return value * scale
+
+
+class TestRequestMemoized(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.counter = Counter()
+
+    def test_memoized_within_request(self):
+        """Test that equivalent calls share one computation per request"""
+        with self.app.test_request_context():
+            self.assertEqual(self.counter.compute(2), 2)
+            self.assertEqual(self.counter.compute(2, scale=1), 2)  # Same call once defaults are applied
+            self.assertEqual(self.counter.compute(2, 3), 6)
+        self.assertEqual(self.counter.calls, 2)
+
+        with self.app.test_request_context():
+            self.counter.compute(2)
+        self.assertEqual(self.counter.calls, 3)
+
+    def test_instances_and_outside_requests_are_separate(self):
+        """Test that memo keys include the instance and nothing is kept without a request"""
+        other = Counter()
+        with self.app.test_request_context():
+            self.counter.compute(1)
+            other.compute(1)
+        self.counter.compute(1)
+        self.counter.compute(1)
+
+        self.assertEqual((self.counter.calls, other.calls), (3, 1))
+
+    def test_bypass_and_clear(self):
+        """Test that force_refresh recomputes and later calls see the fresh result"""
+        with self.app.test_request_context():
+            self.counter.compute(1)
+            self.counter.compute(1, force_refresh=True)
+            self.counter.compute(1)
+            clear_request_memo()
+            self.counter.compute(1)
+        self.assertEqual(self.counter.calls, 4)
+
+    def test_unhashable_arguments_pass_through(self):
+        """Test that calls with unhashable arguments are not memoized"""
+        with self.app.test_request_context():
+            self.counter.compute([1])
+            self.counter.compute([1])
+        self.assertEqual(self.counter.calls, 2)
+
+
+class TestServiceMemoization(unittest.TestCase):
+
+    def test_projection_page_inputs_computed_once(self):
+        """Test that summary, market parameters and VIX stats are computed once per request"""
+        service = stub_portfolio_service(holdings=5, years=1)
+        market = service.market_data_service
+
+        token = start_trace()
+        try:
+            with Flask(__name__).test_request_context():
+                service.get_portfolio_projections(years=2, simulations=1000)
+                service.get_portfolio_summary()
+                market.get_market_parameters()
+                market.get_current_market_sentiment()
+                market.get_volatility_index_stats(days_back=30)
+        finally:
+            trace = end_trace(token)
+
+        # Timing spans sit inside the memo, so they count real computations
+        self.assertEqual(trace.spans['portfolio.summary'][0], 1)
+        self.assertEqual(trace.spans['market.parameters'][0], 1)
+        self.assertEqual(trace.spans['market.vix_stats'][0], 1)
+
+if __name__ == '__main__':
+    unittest.main()
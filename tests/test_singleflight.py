@@ -0,0 +1,87 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight('test')
+
+    def _run_concurrently(self, key, fn, callers=8):
+        """Start several callers for the same key and collect their results"""
+        results = []
+        errors = []
+        start = threading.Barrier(callers)
+
+        def worker():
+            start.wait()
+            try:
+                results.append(self.flight.do(key, fn))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_calls_are_coalesced(self):
+        """Test that concurrent callers for one key share a single execution"""
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'holdings'
+
+        results, errors = self._run_concurrently('holdings', slow_fetch)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, ['holdings'] * 8)
+        self.assertEqual(len(calls), 1)
+
+        stats = self.flight.stats()
+        self.assertEqual(stats['executed'], 1)
+        self.assertEqual(stats['coalesced'], 7)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_errors_are_shared_with_waiters(self):
+        """Test that a failed fetch raises in every coalesced caller"""
+        def failing_fetch():
+            time.sleep(0.1)
+            raise ValueError("upstream down")
+
+        results, errors = self._run_concurrently('quotes', failing_fetch, callers=4)
+
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(all(isinstance(e, ValueError) for e in errors))
+
+    def test_sequential_calls_execute_again(self):
+        """Test that a key is not memoized once its flight has landed"""
+        self.assertEqual(self.flight.do('key', lambda: 1), 1)
+        self.assertEqual(self.flight.do('key', lambda: 2), 2)
+
+        stats = self.flight.stats()
+        self.assertEqual(stats['executed'], 2)
+        self.assertEqual(stats['coalesced'], 0)
+
+    def test_different_keys_do_not_wait_on_each_other(self):
+        """Test that distinct keys run independently"""
+        self.assertEqual(self.flight.do('a', lambda: 'a'), 'a')
+        self.assertEqual(self.flight.do('b', lambda: 'b'), 'b')
+        self.assertEqual(self.flight.stats()['executed'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.calculations import FinancialCalculator
+from utils.streaming_metrics import StreamingMetrics
+
+
+class TestStreamingMetrics(unittest.TestCase):
+
+    def setUp(self):
+        dates = pd.bdate_range('2020-01-01', periods=800, tz='Asia/Kolkata')
+        values = np.random.default_rng(7).normal(0.0004, 0.012, len(dates))
+        values[0] = 0.0
+        self.returns = pd.Series(values, index=dates)
+
+    def _reference(self, window: pd.Series):
+        """Batch metrics for the bars after the window's first close"""
+        expected = FinancialCalculator.calculate_metrics(window.iloc[1:])
+        growth = np.concatenate([[1.0], (1 + window.iloc[1:]).cumprod().to_numpy()])
+        expected['max_drawdown'] = (growth / np.maximum.accumulate(growth) - 1).min()
+        return expected
+
+    def test_full_history_matches_batch(self):
+        """Test that window metrics over all bars match the batch calculation"""
+        accumulator = StreamingMetrics.from_returns(self.returns)
+        metrics = accumulator.window_metrics()
+        expected = self._reference(self.returns)
+
+        for key in ('volatility', 'sharpe', 'max_drawdown', 'total_return'):
+            self.assertAlmostEqual(metrics[key], expected[key], places=9)
+        self.assertEqual(len(metrics['cumulative_returns']), len(self.returns))
+
+    def test_window_matches_batch(self):
+        """Test that a sub-window is answered from prefix sums"""
+        accumulator = StreamingMetrics.from_returns(self.returns)
+        start, end = self.returns.index[300], self.returns.index[550]
+        metrics = accumulator.window_metrics(start.tz_localize(None).to_pydatetime(), end)
+        expected = self._reference(self.returns.loc[start:end])
+
+        for key in ('volatility', 'sharpe', 'max_drawdown', 'total_return'):
+            self.assertAlmostEqual(metrics[key], expected[key], places=9)
+        self.assertEqual(metrics['cumulative_returns'].index[0], start)
+
+    def test_window_variance_of_nearly_constant_returns(self):
+        """Test that a tiny window variance survives a large common return"""
+        dates = pd.bdate_range('2015-01-01', periods=2500)
+        values = 0.05 + 1e-9 * np.random.default_rng(3).standard_normal(len(dates))
+        accumulator = StreamingMetrics.from_returns(pd.Series(values, index=dates))
+
+        metrics = accumulator.window_metrics(dates[2000], dates[-1])
+        expected = np.std(values[2001:], ddof=1) * np.sqrt(252)
+
+        self.assertAlmostEqual(metrics['volatility'] / expected, 1.0, places=6)
+
+    def test_incremental_extend(self):
+        """Test that extending with overlapping data only appends new bars"""
+        accumulator = StreamingMetrics.from_returns(self.returns.iloc[:500])
+        added = accumulator.extend(self.returns.iloc[400:])
+
+        self.assertEqual(added, 300)
+        self.assertEqual(len(accumulator), len(self.returns))
+        full = StreamingMetrics.from_returns(self.returns)
+        self.assertAlmostEqual(accumulator.window_metrics()['sharpe'], full.window_metrics()['sharpe'])
+
+    def test_can_extend_only_without_gaps(self):
+        """Test that only series continuing the stored bars can be appended"""
+        accumulator = StreamingMetrics.from_returns(self.returns.iloc[100:500])
+
+        self.assertTrue(accumulator.can_extend(self.returns.iloc[200:700]))   # Overlaps and continues
+        self.assertTrue(accumulator.can_extend(self.returns.iloc[150:300]))   # Inside the history
+        self.assertFalse(accumulator.can_extend(self.returns.iloc[50:300]))   # Reaches further back
+        self.assertFalse(accumulator.can_extend(self.returns.iloc[550:700]))  # Starts after the last bar
+        self.assertFalse(accumulator.can_extend(self.returns.iloc[100:700].drop(self.returns.index[499])))
+
+    def test_welford_totals(self):
+        """Test the all-history Welford accumulators"""
+        accumulator = StreamingMetrics.from_returns(self.returns)
+        metrics = accumulator.metrics()
+
+        self.assertAlmostEqual(accumulator.mean, self.returns.mean())
+        self.assertAlmostEqual(metrics['volatility'], self.returns.std() * np.sqrt(252))
+        self.assertAlmostEqual(metrics['total_return'], (1 + self.returns).prod() - 1)
+
+    def test_rejects_out_of_order_bars(self):
+        """Test that bars must arrive in date order"""
+        accumulator = StreamingMetrics.from_returns(self.returns.iloc[:10])
+        with self.assertRaises(ValueError):
+            accumulator.update(self.returns.index[5], 0.01)
+
+    def test_round_trip(self):
+        """Test persistence through to_dict/from_dict"""
+        accumulator = StreamingMetrics.from_returns(self.returns)
+        restored = StreamingMetrics.from_dict(accumulator.to_dict())
+
+        self.assertEqual(restored.last_date, accumulator.last_date)
+        self.assertAlmostEqual(restored.window_metrics()['volatility'], accumulator.window_metrics()['volatility'])
+
+    def test_short_window(self):
+        """Test that windows with too few bars return zero metrics"""
+        metrics = StreamingMetrics.from_returns(self.returns.iloc[:2]).window_metrics()
+        self.assertEqual(metrics['volatility'], 0)
+        self.assertTrue(metrics['cumulative_returns'].empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
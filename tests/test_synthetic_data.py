@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from devtools.synthetic_data import SyntheticMarket, SyntheticUpstoxService
+from services.market_data_service import MarketDataService, VIX_INSTRUMENT_TOKEN
+
+
+class TestSyntheticMarket(unittest.TestCase):
+
+    def setUp(self):
+        self.market = SyntheticMarket(seed=3, years=5, holdings=20)
+
+    def test_deterministic_and_order_independent(self):
+        """Test that a series depends only on the seed and instrument key"""
+        key = self.market.holding_records[7]['instrument_token']
+        other = SyntheticMarket(seed=3, years=5, holdings=0)
+        other.candles(Config.BENCHMARK_SYMBOL)
+
+        pd.testing.assert_frame_equal(self.market.candles(key), other.candles(key))
+        self.assertFalse(SyntheticMarket(seed=4, years=5, holdings=0).candles(key).equals(other.candles(key)))
+
+    def test_candle_payload_matches_parsed_frame(self):
+        """Test that raw candles parse exactly like get_historical_data parses them"""
+        key = self.market.holding_records[0]['instrument_token']
+        start, end = self.market.end_date - pd.Timedelta(days=200), self.market.end_date
+
+        df = pd.DataFrame(self.market.candle_payload(key, start, end),
+                          columns=['date', 'open', 'high', 'low', 'close', 'volume', 'unknown'])
+        df['date'] = pd.to_datetime(df['date'])
+        df.set_index('date', inplace=True)
+        df.sort_index(inplace=True)
+
+        pd.testing.assert_frame_equal(df, self.market.historical_frame(key, start, end))
+
+    def test_market_realism(self):
+        """Test fat tails, VIX leverage effect and positive stock correlation"""
+        index_returns = np.log(self.market.candles(Config.BENCHMARK_SYMBOL)['close']).diff().dropna()
+        vix_changes = self.market.candles(VIX_INSTRUMENT_TOKEN)['close'].diff().dropna()
+
+        self.assertGreater(index_returns.kurt(), 1.0)
+        self.assertLess(np.corrcoef(index_returns, vix_changes)[0, 1], -0.2)
+
+        stock_returns = pd.DataFrame({
+            record['tradingsymbol']: np.log(self.market.candles(record['instrument_token'])['close']).diff()
+            for record in self.market.holding_records
+        }).dropna()
+        correlations = stock_returns.corr().to_numpy()[np.triu_indices(20, 1)]
+        self.assertGreater(correlations.mean(), 0.1)
+
+    def test_holdings_agree_with_quotes(self):
+        """Test that holdings, quotes and candles tell the same story"""
+        holding = self.market.holdings()[2]
+        quote = self.market.quotes_payload([holding.instrument_token])[f"NSE_EQ:{holding.tradingsymbol}"]
+
+        self.assertEqual(quote['last_price'], holding.last_price)
+        self.assertEqual(quote['ohlc']['close'], holding.previous_close)
+        self.assertAlmostEqual(holding.day_pnl, (holding.last_price - holding.close_price) * holding.quantity)
+
+    def test_services_run_on_synthetic_data(self):
+        """Test that market parameters and VIX stats come out of the synthetic service"""
+        service = MarketDataService()
+        service.upstox_service = SyntheticUpstoxService(years=10, holdings=1)
+
+        parameters = service.get_market_parameters()
+        vix_stats = service.get_volatility_index_stats()
+
+        self.assertIsNotNone(parameters['windows']['10-year'])
+        self.assertGreater(vix_stats['data_points'], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
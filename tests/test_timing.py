@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+
+from flask import Flask, render_template_string
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.timing import (RouteTimings, _current_trace, end_trace, init_timing, route_timings,
+                          server_timing_header, span, start_trace, timed)
+
+
+@timed('example.work')
+def work(value):
+    with span('example.inner'):
+        return value * 2
+
+
+class TestSpans(unittest.TestCase):
+
+    def test_no_trace_is_a_no_op(self):
+        """Test that spans run the wrapped code without a trace active"""
+        self.assertEqual(work(21), 42)
+        self.assertEqual(work.__name__, 'work')
+
+    def test_trace_collects_calls(self):
+        """Test call counts and inclusive durations"""
+        token = start_trace()
+        try:
+            work(1)
+            work(2)
+        finally:
+            trace = end_trace(token)
+
+        self.assertEqual(trace.spans['example.work'][0], 2)
+        self.assertEqual(trace.spans['example.inner'][0], 2)
+        self.assertGreaterEqual(trace.spans['example.work'][1], trace.spans['example.inner'][1])
+        self.assertEqual(work(3), 6)  # Trace ended, back to the no-op path
+
+    def test_server_timing_header(self):
+        """Test header formatting, slowest span first"""
+        token = start_trace()
+        trace = end_trace(token)
+        trace.spans = {'fast': [1, 0.001], 'slow': [3, 0.25]}
+
+        self.assertEqual(
+            server_timing_header(trace, 0.3),
+            'total;dur=300.0, slow;dur=250.0;desc="3 calls", fast;dur=1.0'
+        )
+
+
+class TestRouteTimings(unittest.TestCase):
+
+    def test_breakdown(self):
+        """Test percentiles, per-request span means and the rolling window"""
+        timings = RouteTimings(window=3)
+        for total in (0.1, 0.2, 0.3, 0.4):
+            timings.record('/page', total, {'upstox.holdings': [2, total / 2]})
+
+        page = timings.breakdown()['/page']
+
+        self.assertEqual(page['requests'], 3)
+        self.assertAlmostEqual(page['total_ms']['p50'], 300.0)
+        self.assertAlmostEqual(page['spans']['upstox.holdings']['mean_ms'], 150.0)
+        self.assertAlmostEqual(page['spans']['upstox.holdings']['calls_per_request'], 2.0)
+        self.assertAlmostEqual(page['spans']['upstox.holdings']['share'], 0.5)
+
+
+class TestInitTiming(unittest.TestCase):
+
+    def setUp(self):
+        route_timings.clear()
+        self.app = Flask(__name__)
+        init_timing(self.app)
+
+        @self.app.route('/items/<int:item_id>')
+        def item(item_id):
+            return render_template_string('{{ value }}', value=work(item_id))
+
+        @self.app.route('/broken')
+        def broken():
+            raise RuntimeError('boom')
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        route_timings.clear()
+
+    def test_server_timing_and_breakdown(self):
+        """Test that responses carry spans and are recorded under the route rule"""
+        response = self.client.get('/items/4')
+        header = response.headers['Server-Timing']
+
+        self.assertEqual(response.get_data(as_text=True), '8')
+        for name in ('total;dur=', 'example.work;dur=', 'example.inner;dur=', 'template;dur='):
+            self.assertIn(name, header)
+        self.assertEqual(route_timings.breakdown()['/items/<int:item_id>']['requests'], 1)
+
+    def test_failed_request_leaves_no_trace(self):
+        """Test that an exception in the view does not leak the trace into later work"""
+        self.app.config['PROPAGATE_EXCEPTIONS'] = False
+        self.assertEqual(self.client.get('/broken').status_code, 500)
+
+        self.assertIsNone(_current_trace.get())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -32,15 +32,242 @@ class FinancialCalculator:
             'cumulative_returns': cumulative - 1
         }
 
+    @staticmethod
+    def calculate_metrics_batch(returns_matrix, dtype=np.float64):
+        """
+        Calculate financial metrics for many return series in one vectorized pass
+
+        Args:
+            returns_matrix: 2-D array or DataFrame of returns (dates x series).
+                NaNs are ignored in mean/std and treated as 0 returns in the curves.
+            dtype: np.float64 (default) or np.float32 for large matrices
+
+        Returns:
+            Dict with per-column 'volatility', 'sharpe', 'max_drawdown' and
+            'total_return' (arrays, or Series for DataFrame input) and
+            'cumulative_returns' (dates x series). Columns with zero or undefined
+            volatility get 0 for every scalar metric, like calculate_metrics.
+        """
+        is_frame = isinstance(returns_matrix, pd.DataFrame)
+        returns = np.asarray(returns_matrix, dtype=dtype)
+        if returns.ndim == 1:
+            returns = returns[:, None]
+        n_columns = returns.shape[1]
+
+        if returns.shape[0] == 0:
+            zeros = np.zeros(n_columns, dtype=dtype)
+            volatility = sharpe = max_drawdown = total_return = zeros
+            cumulative = np.empty((0, n_columns), dtype=dtype)
+        else:
+            counts = np.sum(~np.isnan(returns), axis=0)
+            clean = np.nan_to_num(returns, nan=0.0)
+            mean = clean.sum(axis=0) / np.maximum(counts, 1)
+            squared = np.where(np.isnan(returns), 0.0, (clean - mean) ** 2)
+            std = np.sqrt(squared.sum(axis=0) / np.maximum(counts - 1, 1)).astype(dtype)
+            # Treat std within rounding noise of the mean as zero (constant series)
+            valid = (counts > 1) & (std > 64 * np.finfo(dtype).eps * np.abs(mean))
+
+            # Cumulative curves and drawdown for every column at once
+            growth = np.cumprod(1 + clean, axis=0)
+            drawdown = growth / np.maximum.accumulate(growth, axis=0) - 1
+            cumulative = growth - 1
+
+            safe_std = np.where(valid, std, 1)
+            volatility = np.where(valid, std * np.sqrt(252), 0).astype(dtype)
+            sharpe = np.where(valid, mean / safe_std * np.sqrt(252), 0).astype(dtype)
+            max_drawdown = np.where(valid, drawdown.min(axis=0), 0).astype(dtype)
+            total_return = np.where(valid, cumulative[-1], 0).astype(dtype)
+
+        if is_frame:
+            columns = returns_matrix.columns
+            return {
+                'volatility': pd.Series(volatility, index=columns),
+                'sharpe': pd.Series(sharpe, index=columns),
+                'max_drawdown': pd.Series(max_drawdown, index=columns),
+                'total_return': pd.Series(total_return, index=columns),
+                'cumulative_returns': pd.DataFrame(cumulative, index=returns_matrix.index, columns=columns)
+            }
+
+        return {
+            'volatility': volatility,
+            'sharpe': sharpe,
+            'max_drawdown': max_drawdown,
+            'total_return': total_return,
+            'cumulative_returns': cumulative
+        }
+
+    @staticmethod
+    def calculate_risk_attribution(asset_returns, weights, benchmark_returns=None, confidence_z=1.645):
+        """
+        Per-holding risk attribution from an aligned returns matrix
+
+        Args:
+            asset_returns: 2-D array of daily returns (dates x holdings)
+            weights: Portfolio weight of each holding (summing to 1)
+            benchmark_returns: Optional 1-D array of benchmark returns on the same dates
+            confidence_z: Normal quantile for parametric VaR (1.645 = 95%)
+
+        Returns:
+            Dict of per-holding arrays: 'beta' (to the benchmark, NaN without one),
+            'volatility' (annualized), 'variance_contribution' (share of portfolio
+            variance, sums to 1), 'marginal_var' (daily VaR change per unit of
+            weight) and 'component_var' (daily VaR share, sums to portfolio VaR),
+            plus the portfolio's daily 'portfolio_var' and 'portfolio_volatility'.
+        """
+        returns = np.asarray(asset_returns, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        n_dates, n_assets = returns.shape
+
+        if n_dates < 2:
+            zeros = np.zeros(n_assets)
+            return {
+                'beta': np.full(n_assets, np.nan),
+                'volatility': zeros,
+                'variance_contribution': zeros,
+                'marginal_var': zeros,
+                'component_var': zeros,
+                'portfolio_var': 0.0,
+                'portfolio_volatility': 0.0
+            }
+
+        # One covariance matrix drives volatility, variance contribution and VaR
+        covariance = np.atleast_2d(np.cov(returns, rowvar=False))
+        sigma_w = covariance @ weights
+        portfolio_variance = float(weights @ sigma_w)
+        portfolio_std = np.sqrt(max(portfolio_variance, 0.0))
+
+        if portfolio_std > 0:
+            variance_contribution = weights * sigma_w / portfolio_variance
+            marginal_var = confidence_z * sigma_w / portfolio_std
+        else:
+            variance_contribution = np.zeros(n_assets)
+            marginal_var = np.zeros(n_assets)
+
+        beta = np.full(n_assets, np.nan)
+        if benchmark_returns is not None:
+            benchmark = np.asarray(benchmark_returns, dtype=float)
+            benchmark_centered = benchmark - benchmark.mean()
+            benchmark_variance = benchmark_centered @ benchmark_centered / (n_dates - 1)
+            if benchmark_variance > 0:
+                centered = returns - returns.mean(axis=0)
+                beta = (benchmark_centered @ centered) / (n_dates - 1) / benchmark_variance
+
+        return {
+            'beta': beta,
+            'volatility': np.sqrt(np.diag(covariance)) * np.sqrt(252),
+            'variance_contribution': variance_contribution,
+            'marginal_var': marginal_var,
+            'component_var': weights * marginal_var,
+            'portfolio_var': confidence_z * portfolio_std,
+            'portfolio_volatility': portfolio_std * np.sqrt(252)
+        }
+
+    @staticmethod
+    def calculate_rolling_metrics(returns_series, window, risk_free_rate=0.0, portfolio_returns=None,
+                                  chunk_size=512):
+        """
+        Rolling-window metrics for a daily returns series, computed in O(n) passes
+
+        Args:
+            returns_series: Daily returns (NaNs treated as 0)
+            window: Rolling window length in trading days
+            risk_free_rate: Annual risk-free rate used for the rolling Sharpe ratio
+            portfolio_returns: Optional portfolio returns; adds the portfolio's
+                rolling beta against returns_series
+            chunk_size: Windows processed per block for the max drawdown
+
+        Returns:
+            DataFrame on the returns index with 'rolling_return' (annualized, from
+            cumulative log-returns), 'rolling_volatility', 'rolling_sharpe',
+            'rolling_drawdown' (current level vs the trailing-window peak),
+            'rolling_max_drawdown' (worst peak-to-trough inside each window) and
+            'rolling_beta' when portfolio returns are given. Rows before the first
+            full window are NaN.
+        """
+        returns = returns_series.astype(float).fillna(0)
+        values = returns.to_numpy()
+        n = len(values)
+        result = pd.DataFrame(index=returns.index)
+        columns = ['rolling_return', 'rolling_volatility', 'rolling_sharpe',
+                   'rolling_drawdown', 'rolling_max_drawdown']
+        if portfolio_returns is not None:
+            columns.append('rolling_beta')
+        if window < 2 or n < window:
+            for column in columns:
+                result[column] = np.nan
+            return result
+
+        # Cumulative log-growth with a 0 baseline before the first bar
+        log_growth = np.concatenate([[0.0], np.cumsum(np.log1p(np.maximum(values, -0.999999)))])
+
+        window_log_return = np.full(n, np.nan)
+        window_log_return[window - 1:] = log_growth[window:] - log_growth[:-window]
+        result['rolling_return'] = np.expm1(window_log_return * 252 / window)
+
+        rolling_mean = returns.rolling(window).mean()
+        rolling_std = returns.rolling(window).std()
+        result['rolling_volatility'] = rolling_std * np.sqrt(252)
+        excess_mean = rolling_mean - risk_free_rate / 252
+        result['rolling_sharpe'] = (excess_mean / rolling_std.where(rolling_std > 0)) * np.sqrt(252)
+
+        # Drawdown of today's level from the peak inside the trailing window
+        levels = pd.Series(log_growth[1:], index=returns.index)
+        result['rolling_drawdown'] = np.expm1(levels - levels.rolling(window).max())
+
+        # Worst drawdown inside each window (window + 1 levels including its baseline),
+        # evaluated block by block so memory stays at chunk_size x window
+        windows = np.lib.stride_tricks.sliding_window_view(log_growth, window + 1)
+        max_drawdown = np.full(n, np.nan)
+        for start in range(0, len(windows), chunk_size):
+            block = windows[start:start + chunk_size]
+            drawdown = (block - np.maximum.accumulate(block, axis=1)).min(axis=1)
+            max_drawdown[window - 1 + start:window - 1 + start + len(block)] = np.expm1(drawdown)
+        result['rolling_max_drawdown'] = max_drawdown
+
+        if portfolio_returns is not None:
+            portfolio = portfolio_returns.astype(float).reindex(returns.index).fillna(0)
+            benchmark_variance = returns.rolling(window).var()
+            result['rolling_beta'] = portfolio.rolling(window).cov(returns) / benchmark_variance.where(benchmark_variance > 0)
+
+        return result
+
+    @staticmethod
+    def calculate_portfolio_arrays(quantity, last_price, average_price):
+        """
+        Calculate per-holding value metrics on NumPy arrays
+
+        Returns a dict of arrays aligned with the inputs: current_value, investment,
+        return_% and allocation_% (percentages rounded to 2 decimals, 0 where undefined).
+        """
+        quantity = np.asarray(quantity, dtype=float)
+        last_price = np.asarray(last_price, dtype=float)
+        average_price = np.asarray(average_price, dtype=float)
+
+        current_value = quantity * last_price
+        investment = quantity * average_price
+
+        return_pct = np.divide(last_price - average_price, average_price,
+                               out=np.zeros_like(last_price), where=average_price != 0)
+        total_value = current_value.sum()
+        allocation_pct = current_value / total_value if total_value != 0 else np.zeros_like(current_value)
+
+        return {
+            'current_value': current_value,
+            'investment': investment,
+            'return_%': np.round(return_pct * 100, 2),
+            'allocation_%': np.round(allocation_pct * 100, 2)
+        }
+
     @staticmethod
     def calculate_portfolio_value(holdings_df):
         """Calculate portfolio value from holdings DataFrame"""
-        holdings_df['current_value'] = holdings_df['quantity'] * holdings_df['last_price']
-        holdings_df['investment'] = holdings_df['quantity'] * holdings_df['average_price']
-        holdings_df['return_%'] = ((holdings_df['last_price'] - holdings_df['average_price']) / holdings_df['average_price'] * 100).round(2)
-
-        total_value = holdings_df['current_value'].sum()
-        holdings_df['allocation_%'] = (holdings_df['current_value'] / total_value * 100).round(2)
+        columns = FinancialCalculator.calculate_portfolio_arrays(
+            holdings_df['quantity'].to_numpy(),
+            holdings_df['last_price'].to_numpy(),
+            holdings_df['average_price'].to_numpy()
+        )
+        for column, values in columns.items():
+            holdings_df[column] = values
 
         return holdings_df
 
@@ -1,6 +1,7 @@
+import hmac
 from functools import wraps
 
-from flask import redirect, url_for, session
+from flask import abort, current_app, redirect, request, url_for, session
 
 
 def login_required(f):
@@ -12,6 +13,45 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def is_admin_request() -> bool:
+    """Check the request's X-Admin-Token header against ADMIN_TOKEN (never a query parameter, which ends up in logs)"""
+    expected = current_app.config.get('ADMIN_TOKEN')
+    if not expected:
+        return False
+    provided = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(provided.encode(), expected.encode())
+
+def admin_required(f):
+    """Decorator to require the admin token; admin routes 404 when no token is configured"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_app.config.get('ADMIN_TOKEN'):
+            abort(404)
+        if not is_admin_request():
+            abort(403)
+        return f(*args, **kwargs)
+    return decorated_function
+
+def is_metrics_request() -> bool:
+    """Check for the scrape token (Authorization: Bearer METRICS_TOKEN) or the admin token"""
+    expected = current_app.config.get('METRICS_TOKEN')
+    if expected:
+        scheme, _, provided = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(provided.encode(), expected.encode()):
+            return True
+    return is_admin_request()
+
+def metrics_token_required(f):
+    """Decorator for scrape endpoints; they 404 unless METRICS_TOKEN or ADMIN_TOKEN is configured"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not (current_app.config.get('METRICS_TOKEN') or current_app.config.get('ADMIN_TOKEN')):
+            abort(404)
+        if not is_metrics_request():
+            abort(403)
+        return f(*args, **kwargs)
+    return decorated_function
+
 def handle_api_errors(f):
     """Decorator to handle API errors gracefully"""
     @wraps(f)
@@ -0,0 +1,287 @@
+"""
+Process-wide operational metrics in Prometheus text format.
+
+A small registry of counters, gauges and histograms with labels, rendered by
+the /metrics route. The metrics below cover Upstox calls, the holdings,
+historical, price-matrix and market-parameter caches, Monte Carlo throughput
+and chart rendering; updating one is a dict lookup under a lock.
+"""
+
+import inspect
+import math
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, from a fast cache-backed call to a slow paginated fetch
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes, from an empty chart to a multi-megabyte Plotly figure
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Metric:
+    """Base class holding one value per label combination"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames) or set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key: Tuple[str, ...], extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def _samples(self, key: Tuple[str, ...], value) -> List[str]:
+        return [f'{self.name}{self._label_text(key)} {_format_value(value)}']
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, self._copy(value)) for key, value in self._values.items())
+
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+
+    type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError(f"{self.name}: counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative upper-bound buckets"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets if not math.isinf(bound)))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]  # Bucket counts, sum, count
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def stats(self, **labels) -> Dict[str, float]:
+        """Observation count and sum for one label combination"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return {'count': state[2], 'sum': state[1]} if state else {'count': 0, 'sum': 0.0}
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1], value[2]]
+
+    def _samples(self, key: Tuple[str, ...], value) -> List[str]:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{self._label_text(key, [("le", _format_value(bound))])} {cumulative}')
+        lines.append(f'{self.name}_bucket{self._label_text(key, [("le", "+Inf")])} {count}')
+        lines.append(f'{self.name}_sum{self._label_text(key)} {_format_value(total)}')
+        lines.append(f'{self.name}_count{self._label_text(key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        """Reset every metric's values (the metrics stay registered)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+# Shared by every service instance in the process
+registry = MetricsRegistry()
+
+upstox_requests_total = registry.counter(
+    'upstox_requests_total', 'Upstox API requests by endpoint and HTTP status (error: no response)',
+    ('endpoint', 'status')
+)
+upstox_failures_total = registry.counter(
+    'upstox_failures_total', 'Upstox API calls given up on, by endpoint and final status (error: no response)',
+    ('endpoint', 'status')
+)
+upstox_request_duration_seconds = registry.histogram(
+    'upstox_request_duration_seconds', 'Upstox API request latency, excluding rate-limit waits', ('endpoint',)
+)
+cache_requests_total = registry.counter(
+    'cache_requests_total', 'Cache lookups by cache and result (hit or miss)', ('cache', 'result')
+)
+cache_evictions_total = registry.counter(
+    'cache_evictions_total', 'Cache entries dropped by cache and reason (expired, refresh or capacity)', ('cache', 'reason')
+)
+monte_carlo_paths_total = registry.counter(
+    'monte_carlo_paths_total', 'Monte Carlo paths simulated', ('simulation',)
+)
+monte_carlo_seconds_total = registry.counter(
+    'monte_carlo_seconds_total', 'Time spent simulating Monte Carlo paths', ('simulation',)
+)
+monte_carlo_paths_per_second = registry.gauge(
+    'monte_carlo_paths_per_second', 'Monte Carlo throughput of the most recent run', ('simulation',)
+)
+chart_render_seconds = registry.histogram(
+    'chart_render_seconds', 'Time to build and serialize a Plotly chart', ('chart',)
+)
+chart_payload_bytes = registry.histogram(
+    'chart_payload_bytes', 'Size of the HTML a chart helper returns', ('chart',), buckets=BYTES_BUCKETS
+)
+
+
+def record_upstox_request(endpoint: str, status, seconds: float):
+    """Count one Upstox request attempt and its latency"""
+    upstox_requests_total.inc(endpoint=endpoint, status=status)
+    upstox_request_duration_seconds.observe(seconds, endpoint=endpoint)
+
+
+def record_upstox_failure(endpoint: str, status):
+    """Count an Upstox call that failed after its last attempt"""
+    upstox_failures_total.inc(endpoint=endpoint, status=status)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    cache_requests_total.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def observe_simulation(simulation: str) -> Callable:
+    """Decorator recording paths and throughput of a function taking `simulations`"""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            paths = bound.arguments['simulations']
+            monte_carlo_paths_total.inc(paths, simulation=simulation)
+            monte_carlo_seconds_total.inc(elapsed, simulation=simulation)
+            if elapsed > 0:
+                monte_carlo_paths_per_second.set(paths / elapsed, simulation=simulation)
+            return result
+        return wrapper
+    return decorator
+
+
+def observe_chart(chart: str) -> Callable:
+    """Decorator recording render time and HTML size of a chart helper"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            chart_render_seconds.observe(time.perf_counter() - start, chart=chart)
+
+            parts = result if isinstance(result, tuple) else (result,)
+            size = sum(len(part.encode()) for part in parts if isinstance(part, str))
+            chart_payload_bytes.observe(size, chart=chart)
+            return result
+        return wrapper
+    return decorator
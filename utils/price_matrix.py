@@ -0,0 +1,91 @@
+"""
+Aligned price-matrix engine for portfolio performance analysis.
+
+Builds one (dates x instruments) float matrix over the union of all candle
+calendars, so position values, portfolio value and returns come out of a few
+array operations instead of growing a DataFrame one column at a time.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class PriceMatrix:
+    """Close prices for many instruments aligned on a shared date index"""
+
+    def __init__(self, dates: pd.DatetimeIndex, symbols: List[str], prices: np.ndarray):
+        if prices.shape != (len(dates), len(symbols)):
+            raise ValueError(f"Price matrix shape {prices.shape} does not match "
+                             f"{len(dates)} dates x {len(symbols)} instruments")
+        self.dates = dates
+        self.symbols = symbols
+        self.prices = prices
+
+    @classmethod
+    def from_series(cls, closes: Dict[str, pd.Series], dtype=np.float64) -> 'PriceMatrix':
+        """
+        Align close-price series on the union of their calendars
+
+        Each column is forward-filled across dates where that instrument did not
+        trade, and is 0 before its first bar (matching ffill().fillna(0)).
+        """
+        symbols = list(closes.keys())
+        if not symbols:
+            return cls(pd.DatetimeIndex([]), [], np.empty((0, 0), dtype=dtype))
+
+        series_list = [closes[symbol] for symbol in symbols]
+        dates = series_list[0].index.append([s.index for s in series_list[1:]]).unique().sort_values()
+
+        prices = np.full((len(dates), len(symbols)), np.nan, dtype=dtype)
+        for column, series in enumerate(series_list):
+            prices[dates.get_indexer(series.index), column] = series.to_numpy(dtype=dtype)
+
+        return cls(dates, symbols, cls._forward_fill(prices))
+
+    @staticmethod
+    def _forward_fill(prices: np.ndarray) -> np.ndarray:
+        """Forward-fill NaNs down each column, leaving leading gaps as 0"""
+        if prices.size == 0:
+            return prices
+        valid = ~np.isnan(prices)
+        rows = np.where(valid, np.arange(prices.shape[0])[:, None], 0)
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        filled = prices[rows, np.arange(prices.shape[1])]
+        filled[~np.maximum.accumulate(valid, axis=0)] = 0.0
+        return filled
+
+    def __len__(self):
+        return len(self.dates)
+
+    def position_values(self, quantities: Sequence[float]) -> np.ndarray:
+        """Value of every position on every date (dates x instruments)"""
+        return self.prices * np.asarray(quantities, dtype=self.prices.dtype)
+
+    def portfolio_value(self, quantities: Sequence[float]) -> np.ndarray:
+        """Total portfolio value per date as a matrix-vector product"""
+        return self.prices @ np.asarray(quantities, dtype=self.prices.dtype)
+
+    def portfolio_returns(self, quantities: Sequence[float]) -> pd.Series:
+        """Daily portfolio returns (0 on the first date and wherever the prior value is 0)"""
+        value = self.portfolio_value(quantities)
+        returns = np.zeros_like(value)
+        if len(value) > 1:
+            np.divide(value[1:] - value[:-1], value[:-1], out=returns[1:], where=value[:-1] != 0)
+        return pd.Series(returns, index=self.dates)
+
+    def asset_returns(self) -> np.ndarray:
+        """Per-instrument daily returns (dates x instruments), 0 where undefined"""
+        returns = np.zeros_like(self.prices)
+        if len(self.prices) > 1:
+            previous = self.prices[:-1]
+            np.divide(self.prices[1:] - previous, previous, out=returns[1:], where=previous != 0)
+        return returns
+
+    def to_frame(self, quantities: Sequence[float]) -> pd.DataFrame:
+        """Position values per instrument plus a 'Portfolio Value' column"""
+        positions = self.position_values(quantities)
+        frame = pd.DataFrame(positions, index=self.dates, columns=self.symbols)
+        frame['Portfolio Value'] = positions.sum(axis=1)
+        return frame
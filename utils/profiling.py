@@ -0,0 +1,223 @@
+"""
+On-demand request profiling.
+
+A request is profiled when it is sampled (PROFILING_SAMPLE_RATE) or when an
+admin flags it with `?profile=1` (or an `X-Profile: 1` header) alongside the
+admin token. The whole request - route, services, projector and charts - runs
+under cProfile with tracemalloc tracing, and the pstats dump plus a text report
+are written to PROFILING_DIR for download from /admin/profiles.
+
+cProfile is deterministic rather than sampling, so a profiled request runs
+noticeably slower; only one request per process is profiled at a time.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import secrets
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from flask import Flask, g, request
+
+from utils.decorators import is_admin_request
+
+logger = logging.getLogger(__name__)
+
+TRACEMALLOC_FRAMES = 10
+PROFILE_ID_PATTERN = re.compile(r'^[\w-]+$')
+PROFILE_KINDS = ('prof', 'txt')
+
+# cProfile and tracemalloc are process-wide, so profiles never overlap
+_profiling_lock = threading.Lock()
+
+
+class RequestProfile:
+    """cProfile and tracemalloc capture for one request"""
+
+    def __init__(self, description: str):
+        self.description = description
+        self.started_at = datetime.now()
+        self.profiler = cProfile.Profile()
+        self._owns_tracemalloc = False
+        self._start = None
+        self.elapsed = None
+        self.snapshot = None
+        self.peak_memory = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.elapsed = time.perf_counter() - self._start
+        self.snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ))
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    def report(self, functions: int = 40, allocations: int = 25) -> str:
+        """Text report: request summary, top functions and top live allocations"""
+        stats_output = io.StringIO()
+        pstats.Stats(self.profiler, stream=stats_output).sort_stats('cumulative').print_stats(functions)
+
+        allocation_lines = [
+            str(stat) for stat in self.snapshot.statistics('lineno')[:allocations]
+        ]
+
+        return '\n'.join([
+            f"Request: {self.description}",
+            f"Started: {self.started_at:%Y-%m-%d %H:%M:%S}",
+            f"Duration: {self.elapsed * 1000:.1f} ms",
+            f"Peak traced memory: {self.peak_memory / 2 ** 20:.1f} MiB",
+            '',
+            f"== cProfile: top {functions} functions by cumulative time ==",
+            stats_output.getvalue(),
+            f"== tracemalloc: top {allocations} allocation sites still alive at the end of the request ==",
+            *allocation_lines,
+            ''
+        ])
+
+
+class ProfileStore:
+    """Directory of saved profiles, pruned to the newest max_profiles"""
+
+    def __init__(self, directory: str, max_profiles: int = 50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, profile: RequestProfile, slug: str) -> str:
+        """
+        Write the pstats dump and text report for a finished profile
+
+        Returns:
+            Profile id, the common stem of the .prof and .txt files
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', slug).strip('_') or 'root'
+        profile_id = f"{profile.started_at:%Y%m%d-%H%M%S-%f}-{slug[:40]}-{secrets.token_hex(3)}"
+
+        profile.profiler.dump_stats(os.path.join(self.directory, f"{profile_id}.prof"))
+        with open(os.path.join(self.directory, f"{profile_id}.txt"), 'w') as report_file:
+            report_file.write(profile.report())
+
+        self._prune()
+        return profile_id
+
+    def list(self) -> List[Dict]:
+        """Saved profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+
+        profiles = []
+        for name in os.listdir(self.directory):
+            stem, _, kind = name.rpartition('.')
+            if kind != 'txt' or not PROFILE_ID_PATTERN.match(stem):
+                continue
+            path = os.path.join(self.directory, name)
+            with open(path) as report_file:
+                description = report_file.readline().partition(': ')[2].strip()
+            profiles.append({
+                'id': stem,
+                'request': description,
+                'created': datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S'),
+                'sizes': {
+                    kind: os.path.getsize(os.path.join(self.directory, f"{stem}.{kind}"))
+                    for kind in PROFILE_KINDS if os.path.exists(os.path.join(self.directory, f"{stem}.{kind}"))
+                }
+            })
+        return sorted(profiles, key=lambda entry: entry['id'], reverse=True)
+
+    def path(self, profile_id: str, kind: str) -> Optional[str]:
+        """Path of a saved profile file, or None if the id/kind is invalid or missing"""
+        if kind not in PROFILE_KINDS or not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.{kind}")
+        return path if os.path.exists(path) else None
+
+    def _prune(self):
+        for entry in self.list()[self.max_profiles:]:
+            for kind in PROFILE_KINDS:
+                try:
+                    os.remove(os.path.join(self.directory, f"{entry['id']}.{kind}"))
+                except FileNotFoundError:
+                    pass
+
+
+def _should_profile(sample_rate: float) -> bool:
+    if request.endpoint in (None, 'static') or request.endpoint.startswith('admin_'):
+        return False
+    flagged = request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+    if flagged and is_admin_request():
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def init_profiling(app: Flask, store: ProfileStore, sample_rate: float = 0.0):
+    """
+    Profile sampled or admin-flagged requests of app into store
+
+    Profiled responses carry an X-Profile-Id header naming the saved profile.
+    """
+    def _finish(profile: RequestProfile) -> Optional[str]:
+        try:
+            profile.stop()
+            profile_id = store.save(profile, request.path)
+            logger.info(f"Saved profile {profile_id} ({profile.elapsed * 1000:.0f} ms)")
+            return profile_id
+        except Exception as e:
+            logger.error(f"Error saving request profile: {e}")
+            return None
+        finally:
+            _profiling_lock.release()
+
+    @app.before_request
+    def _start_request_profile():
+        if not _should_profile(sample_rate):
+            return
+        if not _profiling_lock.acquire(blocking=False):
+            logger.info(f"Skipping profile of {request.path}: another request is being profiled")
+            return
+
+        profile = RequestProfile(f"{request.method} {request.full_path.rstrip('?')}")
+        try:
+            profile.start()
+        except Exception as e:
+            _profiling_lock.release()
+            logger.error(f"Could not start profiler: {e}")
+            return
+        g._request_profile = profile
+
+    @app.after_request
+    def _save_request_profile(response):
+        profile = g.pop('_request_profile', None)
+        if profile is not None:
+            profile_id = _finish(profile)
+            if profile_id:
+                response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _save_failed_request_profile(exc):
+        # after_request is skipped when the view raises
+        profile = g.pop('_request_profile', None)
+        if profile is not None:
+            _finish(profile)
+
+    logger.info(f"Request profiling enabled (sample rate {sample_rate}, saving to {store.directory})")
@@ -7,11 +7,14 @@ import logging
 import math
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from utils.metrics import observe_simulation
+from utils.timing import timed
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,6 +45,35 @@ class ProjectionResults:
         }
 
 
+@dataclass
+class CashFlowProjection:
+    """Results from a monthly cash-flow Monte Carlo (contributions, then withdrawals)"""
+    success_probability: float  # Share of paths never depleted (and reaching the target, if any)
+    probability_of_ruin: float  # Share of paths depleted before the horizon
+    depletion_years: np.ndarray  # Years from now at which each path was depleted (NaN if never)
+    depletion_percentiles: Dict[int, float]  # Percentiles of depletion time among depleted paths
+    value_at_retirement: Dict[int, float]  # Percentiles of wealth when contributions stop
+    final_value: Dict[int, float]  # Percentiles of wealth at the horizon
+    yearly_percentiles: Dict[int, List[float]]  # Wealth percentiles at the end of each year
+    accumulation_months: int
+    decumulation_months: int
+    simulations: int
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'success_probability': self.success_probability,
+            'probability_of_ruin': self.probability_of_ruin,
+            'depletion_percentiles': self.depletion_percentiles,
+            'value_at_retirement': self.value_at_retirement,
+            'final_value': self.final_value,
+            'yearly_percentiles': self.yearly_percentiles,
+            'accumulation_months': self.accumulation_months,
+            'decumulation_months': self.decumulation_months,
+            'simulations': self.simulations
+        }
+
+
 @dataclass
 class ScenarioResult:
     """Results for a single scenario"""
@@ -100,6 +132,8 @@ class PortfolioProjector:
                 'inflation_rate': 0.046
             }
 
+    @timed('projector.monte_carlo')
+    @observe_simulation('projection')
     def monte_carlo_projection(
             self,
             current_value: float,
@@ -109,7 +143,13 @@ class PortfolioProjector:
             years: int = 5,
             simulations: int = 10000,
             method: str = 'parametric',
-            random_seed: Optional[int] = None
+            random_seed: Optional[int] = None,
+            asset_returns: Optional[np.ndarray] = None,
+            weights: Optional[np.ndarray] = None,
+            chunk_size: Optional[int] = None,
+            block_length: Optional[int] = None,
+            bootstrap: str = 'stationary',
+            frequency: str = 'daily'
     ) -> ProjectionResults:
         """
         Run Monte Carlo simulation for portfolio projections
@@ -117,12 +157,19 @@ class PortfolioProjector:
         Args:
             current_value: Current portfolio value
             historical_returns: Historical returns series (for historical method)
-            expected_return: Expected annual return (for parametric method)
+            expected_return: Expected annual return (for parametric method; the
+                drift prior for multi_asset)
             volatility: Annual volatility (for parametric method)
             years: Number of years to project
             simulations: Number of Monte Carlo simulations
-            method: 'historical' or 'parametric'
+            method: 'historical', 'parametric' or 'multi_asset'
             random_seed: Random seed for reproducibility
+            asset_returns: Daily returns per holding, dates x holdings (for multi_asset)
+            weights: Current portfolio weight of each holding (for multi_asset)
+            chunk_size: Paths simulated per batch (for multi_asset and historical)
+            block_length: Bootstrap block length in periods (for historical)
+            bootstrap: 'stationary' or 'circular' block bootstrap (for historical)
+            frequency: 'daily' or 'monthly' returns to resample (for historical)
 
         Returns:
             ProjectionResults object with simulation results
@@ -146,10 +193,21 @@ class PortfolioProjector:
         if method == 'historical' and historical_returns is None:
             raise ValueError("Historical returns required for historical method")
 
+        if method == 'multi_asset' and (asset_returns is None or weights is None):
+            raise ValueError("Asset returns and weights required for multi_asset method")
+
         # Run appropriate simulation
         if method == 'historical':
             final_values = self._historical_monte_carlo(
-                current_value, historical_returns, years, simulations
+                current_value, historical_returns, years, simulations,
+                block_length=block_length, bootstrap=bootstrap, frequency=frequency, chunk_size=chunk_size
+            )
+        elif method == 'multi_asset':
+            if expected_return is None:
+                expected_return = self._get_market_parameters()['expected_return']
+            final_values = self._multi_asset_monte_carlo(
+                current_value, asset_returns, weights, years, simulations,
+                drift_prior=expected_return, chunk_size=chunk_size
             )
         else:  # parametric
             final_values = self._parametric_monte_carlo(
@@ -222,17 +280,122 @@ class PortfolioProjector:
 
         return final_values
 
+    @staticmethod
+    def _shrunk_covariance(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Ledoit-Wolf shrinkage of the sample covariance toward a scaled identity
+
+        Short histories of many holdings give noisy, often singular sample
+        covariances; shrinking keeps the matrix well-conditioned for Cholesky.
+
+        Returns:
+            Tuple of (shrunk covariance, shrinkage intensity in [0, 1])
+        """
+        n_obs, n_assets = returns.shape
+        centered = returns - returns.mean(axis=0)
+        sample = centered.T @ centered / n_obs
+
+        mu = np.trace(sample) / n_assets
+        target = mu * np.eye(n_assets)
+        distance = np.sum((sample - target) ** 2)
+        if distance <= 0:
+            return sample, 0.0
+
+        # Average squared distance of the per-observation outer products from the sample
+        row_norms = np.sum(centered ** 2, axis=1)
+        spread = (np.sum(row_norms ** 2) / n_obs - np.sum(sample ** 2)) / n_obs
+        shrinkage = min(max(spread, 0.0), distance) / distance
+
+        return shrinkage * target + (1 - shrinkage) * sample, float(shrinkage)
+
+    @staticmethod
+    def _multi_asset_monte_carlo(
+            current_value: float,
+            asset_returns: np.ndarray,
+            weights: np.ndarray,
+            years: int,
+            simulations: int,
+            drift_prior: Optional[float] = None,
+            drift_shrinkage: float = 0.5,
+            chunk_size: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Correlated multi-asset Monte Carlo from per-holding daily returns
+
+        Each holding follows GBM with its own drift and a shrunk covariance shared
+        across holdings. For buy-and-hold GBM the horizon log-return of every
+        holding is exactly N(years * (mu - sigma^2 / 2), years * Sigma), so each
+        path needs one correlated draw per holding. Paths are simulated in
+        batches so memory stays at chunk_size x holdings.
+        """
+        returns = np.nan_to_num(np.asarray(asset_returns, dtype=float))
+        weights = np.asarray(weights, dtype=float)
+        if returns.ndim != 2 or returns.shape[1] != len(weights):
+            raise ValueError("Asset returns must be a dates x holdings matrix matching the weights")
+        if len(returns) < 2:
+            raise ValueError("At least two return observations required for multi_asset method")
+
+        if weights.sum() <= 0:
+            raise ValueError("Weights must sum to a positive value")
+        weights = weights / weights.sum()
+        n_assets = len(weights)
+
+        # Annualized per-holding drift, shrunk toward the market prior (sample means are noisy)
+        drift = returns.mean(axis=0) * 252
+        if drift_prior is not None:
+            drift = (1 - drift_shrinkage) * drift + drift_shrinkage * drift_prior
+
+        covariance, shrinkage = PortfolioProjector._shrunk_covariance(returns)
+        covariance = covariance * 252
+        logger.info(f"Multi-asset Monte Carlo: {n_assets} holdings, covariance shrinkage {shrinkage:.2f}")
+
+        horizon_drift = years * (drift - 0.5 * np.diag(covariance))
+        try:
+            cholesky = np.linalg.cholesky(covariance * years)
+        except np.linalg.LinAlgError:
+            # Nudge the diagonal when the matrix is only semi-definite
+            jitter = 1e-10 * max(np.trace(covariance) / n_assets, 1e-12)
+            cholesky = np.linalg.cholesky(covariance * years + jitter * np.eye(n_assets))
+
+        if chunk_size is None:
+            chunk_size = max(1, 1_000_000 // n_assets)
+
+        final_values = np.empty(simulations)
+        for start in range(0, simulations, chunk_size):
+            stop = min(start + chunk_size, simulations)
+            shocks = np.random.standard_normal((stop - start, n_assets))
+            growth = np.exp(horizon_drift + shocks @ cholesky.T)
+            final_values[start:stop] = current_value * (growth @ weights)
+
+        return final_values
+
     @staticmethod
     def _historical_monte_carlo(
             current_value: float,
             historical_returns: pd.Series,
             years: int,
-            simulations: int
+            simulations: int,
+            block_length: Optional[int] = None,
+            bootstrap: str = 'stationary',
+            frequency: str = 'daily',
+            chunk_size: Optional[int] = None
     ) -> np.ndarray:
         """
-        Historical Monte Carlo using bootstrapped returns
+        Historical Monte Carlo using a block bootstrap
+
+        Resamples blocks of consecutive daily (or monthly) returns so
+        autocorrelation and volatility clustering survive into the simulated
+        paths. Block starts and lengths for a batch of paths are drawn as index
+        arrays, and each block's log return is read off a prefix sum of the
+        (circularly extended) series, so the cost scales with the number of
+        blocks rather than the number of simulated days.
 
-        Randomly samples from historical returns with replacement
+        Args:
+            block_length: Mean (stationary) or fixed (circular) block length in
+                periods; defaults to 21 days or 3 months
+            bootstrap: 'stationary' (geometric block lengths) or 'circular'
+            frequency: 'daily' or 'monthly' returns to resample
+            chunk_size: Paths per batch
         """
         # Clean historical returns
         returns_clean = historical_returns.dropna()
@@ -240,26 +403,273 @@ class PortfolioProjector:
         if len(returns_clean) < 30:
             logger.warning(f"Limited historical data: only {len(returns_clean)} returns available")
 
-        # Convert to annual returns if daily
-        if len(returns_clean) > 250:  # Likely daily data
-            # Group into annual returns
-            annual_returns = (1 + returns_clean).resample('Y').prod() - 1
-            returns_to_sample = annual_returns.values
+        if frequency == 'monthly':
+            log_returns = PortfolioProjector._monthly_log_returns(returns_clean)
+            steps_per_year = 12
+            default_block = 3
         else:
-            returns_to_sample = returns_clean.values
+            log_returns = np.log1p(returns_clean.to_numpy(dtype=float))
+            steps_per_year = 252
+            default_block = 21
+
+        if len(log_returns) == 0:
+            raise ValueError("No historical returns to bootstrap")
+
+        block_length = max(1, min(block_length or default_block, len(log_returns)))
+        steps = years * steps_per_year
+        if chunk_size is None:
+            chunk_size = max(1, 1_000_000 // (2 * steps // block_length + 8))
+
+        final_values = np.empty(simulations)
+        for start in range(0, simulations, chunk_size):
+            stop = min(start + chunk_size, simulations)
+            log_growth = PortfolioProjector._block_bootstrap_log_growth(
+                log_returns, stop - start, steps, block_length, stationary=(bootstrap != 'circular')
+            )
+            final_values[start:stop] = current_value * np.exp(log_growth)
 
-        # Bootstrap returns
-        final_values = np.zeros(simulations)
+        return final_values
 
-        for i in range(simulations):
-            # Randomly sample returns with replacement
-            sampled_returns = np.random.choice(returns_to_sample, size=years, replace=True)
+    @staticmethod
+    def _monthly_log_returns(daily_returns: pd.Series) -> np.ndarray:
+        """Monthly log returns from daily returns (21-day groups without a date index)"""
+        log_returns = np.log1p(daily_returns.astype(float))
+        if isinstance(log_returns.index, pd.DatetimeIndex):
+            return log_returns.resample('ME').sum().to_numpy()
+        values = log_returns.to_numpy()
+        return np.add.reduceat(values, np.arange(0, len(values), 21)) if len(values) else values
 
-            # Calculate final value
-            final_values[i] = current_value * np.prod(1 + sampled_returns)
+    @staticmethod
+    def _block_bootstrap_log_growth(
+            log_returns: np.ndarray,
+            paths: int,
+            steps: int,
+            block_length: int,
+            stationary: bool = True
+    ) -> np.ndarray:
+        """
+        Total log return of block-bootstrapped paths
 
-        return final_values
+        Stationary bootstrap (Politis-Romano) blocks have geometric lengths with
+        mean block_length; circular blocks have a fixed length. Blocks start at
+        uniform random positions and wrap around the end of the series. The last
+        block of each path is trimmed so every path is exactly `steps` long.
+        """
+        n_returns = len(log_returns)
+        prefix = np.concatenate([[0.0], np.cumsum(np.concatenate([log_returns, log_returns]))])
+        cycle_total = prefix[n_returns]
+
+        if stationary:
+            blocks = int(np.ceil(1.5 * steps / block_length)) + 8
+            lengths = np.random.geometric(1.0 / block_length, size=(paths, blocks))
+            # Top up the rare paths whose blocks fall short of the horizon
+            while (lengths.sum(axis=1) < steps).any():
+                lengths = np.hstack([lengths, np.random.geometric(1.0 / block_length, size=(paths, blocks))])
+        else:
+            blocks = -(-steps // block_length)
+            lengths = np.full((paths, blocks), block_length)
+
+        block_ends = np.cumsum(lengths, axis=1)
+        lengths = np.clip(steps - (block_ends - lengths), 0, lengths)
+
+        starts = np.random.randint(0, n_returns, size=lengths.shape)
+        full_cycles, remainder = np.divmod(lengths, n_returns)
+        block_sums = full_cycles * cycle_total + prefix[starts + remainder] - prefix[starts]
+        return block_sums.sum(axis=1)
+
+    @timed('projector.cash_flow_monte_carlo')
+    @observe_simulation('cash_flow')
+    def cash_flow_monte_carlo(
+            self,
+            current_value: float,
+            accumulation_years: float,
+            retirement_years: float = 0,
+            monthly_contribution: float = 0,
+            contribution_growth: float = 0,
+            annual_withdrawal: float = 0,
+            target_value: Optional[float] = None,
+            expected_return: Optional[float] = None,
+            volatility: Optional[float] = None,
+            inflation_rate: Optional[float] = None,
+            simulations: int = 10000,
+            random_seed: Optional[int] = None
+    ) -> CashFlowProjection:
+        """
+        Monthly-step Monte Carlo with SIP contributions and retirement withdrawals
+
+        Wealth compounds with lognormal monthly returns. During accumulation a
+        contribution is added each month (stepped up yearly by
+        contribution_growth); afterwards an inflation-indexed withdrawal is taken
+        each month. A path is ruined the first month a withdrawal exhausts its
+        wealth (an empty portfolio during accumulation is not ruin). All
+        paths advance together, one vectorized step per month.
+
+        Args:
+            current_value: Current portfolio value
+            accumulation_years: Years of contributions before withdrawals start
+            retirement_years: Years of withdrawals after accumulation
+            monthly_contribution: SIP amount per month during accumulation
+            contribution_growth: Yearly step-up of the SIP amount
+            annual_withdrawal: Withdrawal per year in today's money, indexed to
+                inflation from today
+            target_value: Optional wealth required when accumulation ends for a
+                path to count as a success
+            expected_return: Expected annual return (uses market data if not provided)
+            volatility: Annual volatility (uses market data if not provided)
+            inflation_rate: Annual inflation (uses market data if not provided)
+            simulations: Number of paths
+            random_seed: Random seed for reproducibility
+
+        Returns:
+            CashFlowProjection with success/ruin probabilities and distributions
+        """
+        if random_seed is not None:
+            np.random.seed(random_seed)
+
+        if current_value < 0 or monthly_contribution < 0 or annual_withdrawal < 0:
+            raise ValueError("Values and cash flows must not be negative")
+
+        market_params = self._get_market_parameters()
+        if expected_return is None:
+            expected_return = market_params.get('expected_return', 0.12)
+        if volatility is None:
+            volatility = market_params.get('volatility', 0.22)
+        if inflation_rate is None:
+            inflation_rate = market_params.get('inflation_rate', 0.05)
+
+        accumulation_months = max(0, int(round(accumulation_years * 12)))
+        decumulation_months = max(0, int(round(retirement_years * 12)))
+        total_months = accumulation_months + decumulation_months
+        if total_months == 0:
+            raise ValueError("Projection horizon must be at least one month")
+
+        # Monthly lognormal growth parameters
+        monthly_drift = (expected_return - 0.5 * volatility ** 2) / 12
+        monthly_vol = volatility / np.sqrt(12)
+
+        # Cash flow per month: + contributions, then - inflation-indexed withdrawals
+        month = np.arange(total_months)
+        year = month // 12
+        cash_flows = np.where(
+            month < accumulation_months,
+            monthly_contribution * (1 + contribution_growth) ** year,
+            -annual_withdrawal / 12 * (1 + inflation_rate) ** year
+        )
+
+        wealth = np.full(simulations, float(current_value))
+        depletion_month = np.full(simulations, -1)
+        value_at_retirement = wealth.copy()
+        yearly_values = np.empty((-(-total_months // 12), simulations))
+
+        for t in range(total_months):
+            if t == accumulation_months:
+                value_at_retirement = wealth.copy()
+
+            wealth *= np.exp(monthly_drift + monthly_vol * np.random.standard_normal(simulations))
+            wealth += cash_flows[t]
+
+            # Only a withdrawal can exhaust a path; contributions never make wealth negative
+            ruined = wealth <= 0 if cash_flows[t] < 0 else None
+            if ruined is not None and ruined.any():
+                depletion_month[ruined & (depletion_month < 0)] = t + 1
+                wealth[ruined] = 0.0
+
+            if (t + 1) % 12 == 0 or t + 1 == total_months:
+                yearly_values[t // 12] = wealth
+
+        if accumulation_months == total_months:
+            value_at_retirement = wealth.copy()
+
+        depleted = depletion_month > 0
+        success = ~depleted
+        if target_value is not None:
+            success &= value_at_retirement >= target_value
+
+        depletion_years = np.where(depleted, depletion_month / 12, np.nan)
+        percentile_levels = [5, 25, 50, 75, 95]
+
+        return CashFlowProjection(
+            success_probability=float(success.mean()),
+            probability_of_ruin=float(depleted.mean()),
+            depletion_years=depletion_years,
+            depletion_percentiles=(
+                {p: float(np.percentile(depletion_years[depleted], p)) for p in percentile_levels}
+                if depleted.any() else {}
+            ),
+            value_at_retirement={p: float(np.percentile(value_at_retirement, p)) for p in percentile_levels},
+            final_value={p: float(np.percentile(wealth, p)) for p in percentile_levels},
+            yearly_percentiles={
+                p: np.percentile(yearly_values, p, axis=1).tolist() for p in percentile_levels
+            },
+            accumulation_months=accumulation_months,
+            decumulation_months=decumulation_months,
+            simulations=simulations
+        )
+
+    @timed('projector.sensitivity_grid')
+    @observe_simulation('sensitivity_grid')
+    def sensitivity_grid(
+            self,
+            current_value: float,
+            years: float,
+            expected_returns: np.ndarray,
+            volatilities: np.ndarray,
+            simulations: int = 10000,
+            random_seed: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Median, 5th percentile and probability of loss over a return x volatility grid
+
+        Under geometric Brownian motion the terminal log growth is
+        years * (mu - sigma^2 / 2) + sigma * sqrt(years) * Z, so every cell is a
+        monotone transform of the same standard-normal shocks. The shocks are
+        drawn and sorted once; percentiles are broadcast over the grid and the
+        loss probability is a binary search for each cell's break-even shock.
+
+        Args:
+            current_value: Current portfolio value
+            years: Projection horizon in years
+            expected_returns: Annual expected returns (grid rows)
+            volatilities: Annual volatilities (grid columns)
+            simulations: Number of shared shocks
+            random_seed: Random seed for reproducibility
+
+        Returns:
+            Dictionary with 'median', 'percentile_5' and 'probability_of_loss'
+            arrays of shape (len(expected_returns), len(volatilities))
+        """
+        if random_seed is not None:
+            np.random.seed(random_seed)
+
+        if current_value <= 0 or years <= 0:
+            raise ValueError("Current value and years must be positive")
+
+        expected_returns = np.asarray(expected_returns, dtype=float)[:, None]
+        volatilities = np.asarray(volatilities, dtype=float)[None, :]
+        if np.any(volatilities < 0):
+            raise ValueError("Volatilities must be non-negative")
 
+        shocks = np.sort(np.random.standard_normal(simulations))
+        shock_median, shock_p5 = np.quantile(shocks, [0.5, 0.05])
+
+        drift = years * (expected_returns - 0.5 * volatilities ** 2)
+        scale = volatilities * np.sqrt(years)
+
+        median = current_value * np.exp(drift + scale * shock_median)
+        percentile_5 = current_value * np.exp(drift + scale * shock_p5)
+
+        # A path loses money when its shock is below -drift / scale
+        with np.errstate(divide='ignore', invalid='ignore'):
+            break_even = np.where(scale > 0, -drift / scale, np.where(drift < 0, np.inf, -np.inf))
+        probability_of_loss = np.searchsorted(shocks, break_even) / simulations
+
+        return {
+            'median': median,
+            'percentile_5': percentile_5,
+            'probability_of_loss': probability_of_loss
+        }
+
+    @timed('projector.scenarios')
     def scenario_analysis(
             self,
             current_value: float,
@@ -495,43 +905,217 @@ class PortfolioProjector:
             logger.error(f"Error in savings calculation: {e}")
             raise ValueError(f"Savings calculation failed: {str(e)}")
 
+    @timed('projector.required_savings')
+    @observe_simulation('required_savings')
+    def required_savings_monte_carlo(
+            self,
+            current_value: float,
+            target_value: float,
+            years: float,
+            success_probabilities: Tuple[float, ...] = (0.5, 0.75, 0.9, 0.95),
+            contribution_growth: float = 0,
+            expected_return: Optional[float] = None,
+            volatility: Optional[float] = None,
+            simulations: int = 10000,
+            random_seed: Optional[int] = None,
+            chunk_size: Optional[int] = None
+    ) -> Dict[str, Dict[float, float]]:
+        """
+        Monthly SIP needed to reach a target with given Monte Carlo confidence
+
+        On every simulated path the terminal value is linear in the monthly
+        contribution c: V_T = A + c * B, where A is the grown current value and B
+        the grown sum of one rupee contributed each month. A path succeeds iff
+        c >= (target - A) / B, so the SIP for a success probability p is the
+        p-quantile of that per-path requirement. One set of paths (common random
+        numbers) answers every confidence level.
+
+        Args:
+            current_value: Current portfolio value
+            target_value: Target portfolio value
+            years: Years to reach target
+            success_probabilities: Confidence levels to solve for
+            contribution_growth: Yearly step-up of the SIP amount
+            expected_return: Expected annual return (uses market data if not provided)
+            volatility: Annual volatility (uses market data if not provided)
+            simulations: Number of paths
+            random_seed: Random seed for reproducibility
+            chunk_size: Paths per batch
+
+        Returns:
+            Dictionary with 'monthly_savings' per success probability and the
+            'probability_without_savings' of reaching the target on the current
+            value alone
+        """
+        if random_seed is not None:
+            np.random.seed(random_seed)
+
+        if current_value < 0 or target_value <= 0 or years <= 0:
+            raise ValueError("All values must be positive")
+
+        market_params = self._get_market_parameters()
+        if expected_return is None:
+            expected_return = market_params.get('expected_return', 0.12)
+        if volatility is None:
+            volatility = market_params.get('volatility', 0.22)
+
+        months = max(1, int(round(years * 12)))
+        monthly_drift = (expected_return - 0.5 * volatility ** 2) / 12
+        monthly_vol = volatility / np.sqrt(12)
+        step_up = (1 + contribution_growth) ** (np.arange(months) // 12)
+
+        if chunk_size is None:
+            chunk_size = max(1, 1_000_000 // months)
+
+        required = np.empty(simulations)
+        for start in range(0, simulations, chunk_size):
+            stop = min(start + chunk_size, simulations)
+            log_returns = monthly_drift + monthly_vol * np.random.standard_normal((stop - start, months))
+            cumulative = np.cumsum(log_returns, axis=1)
+            total = cumulative[:, -1:]
+
+            # Contribution at the end of month t grows over the months after it
+            grown_current = current_value * np.exp(total[:, 0])
+            grown_contributions = (step_up * np.exp(total - cumulative)).sum(axis=1)
+            required[start:stop] = (target_value - grown_current) / grown_contributions
+
+        required = np.maximum(required, 0.0)
+
+        return {
+            'monthly_savings': {
+                p: float(np.quantile(required, p, method='inverted_cdf')) for p in success_probabilities
+            },
+            'probability_without_savings': float(np.mean(required == 0)),
+            'months': months,
+            'simulations': simulations
+        }
+
+    @timed('projector.fire_planner')
+    def fire_planner(
+            self,
+            current_value: float,
+            annual_expenses: float,
+            current_age: int,
+            life_expectancy: int = 90,
+            monthly_contribution: float = 0,
+            withdrawal_rates: Optional[np.ndarray] = None,
+            expected_return: Optional[float] = None,
+            inflation_rate: Optional[float] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Evaluate every retirement age against a range of withdrawal rates at once
+
+        Portfolio growth follows calculate_required_savings (annual compounding
+        of the current value plus a monthly SIP annuity), and the FIRE number
+        for each cell follows calculate_fire_number: inflated expenses divided
+        by the withdrawal rate.
+
+        Args:
+            current_value: Current portfolio value
+            annual_expenses: Current annual expenses
+            current_age: Current age
+            life_expectancy: Expected life span
+            monthly_contribution: Monthly SIP until retirement
+            withdrawal_rates: Withdrawal rates to evaluate (default: 2.5% to 5%)
+            expected_return: Expected annual return (uses market data if not provided)
+            inflation_rate: Expected inflation rate (uses market data if not provided)
+
+        Returns:
+            Dictionary with 'ages', 'withdrawal_rates', 'projected_values' and
+            'retirement_needs' per age, 'fire_numbers', 'funded_ratio' and
+            'feasible' matrices (ages x rates), and 'earliest_ages' per rate
+            (NaN where no age is feasible)
+        """
+        if annual_expenses <= 0:
+            raise ValueError("Annual expenses must be positive")
+
+        ages = np.arange(current_age + 1, life_expectancy)
+        if len(ages) == 0:
+            raise ValueError("Life expectancy must be greater than current age")
+
+        if withdrawal_rates is None:
+            withdrawal_rates = np.arange(0.025, 0.05 + 1e-9, 0.0025)
+        withdrawal_rates = np.asarray(withdrawal_rates, dtype=float)
+        if np.any(withdrawal_rates <= 0):
+            raise ValueError("Withdrawal rates must be positive")
+
+        market_params = self._get_market_parameters()
+        if expected_return is None:
+            expected_return = market_params.get('expected_return', 0.12)
+        if inflation_rate is None:
+            inflation_rate = market_params.get('inflation_rate', 0.05)
+
+        years = ages - current_age
+        monthly_return = expected_return / 12
+        if monthly_return == 0:
+            contributions = monthly_contribution * years * 12
+        else:
+            contributions = monthly_contribution * ((1 + monthly_return) ** (years * 12) - 1) / monthly_return
+        projected_values = current_value * (1 + expected_return) ** years + contributions
+
+        expenses_at_retirement = annual_expenses * (1 + inflation_rate) ** years
+        fire_numbers = expenses_at_retirement[:, None] / withdrawal_rates[None, :]
+        funded_ratio = projected_values[:, None] / fire_numbers
+        feasible = funded_ratio >= 1
+
+        # First feasible row per column; argmax returns 0 for all-False columns
+        earliest_ages = np.where(feasible.any(axis=0), ages[feasible.argmax(axis=0)], np.nan)
+
+        retirement_needs = self._calculate_retirement_needs(
+            expenses_at_retirement,
+            life_expectancy - ages,
+            inflation_rate,
+            expected_return
+        )
+
+        return {
+            'ages': ages,
+            'withdrawal_rates': withdrawal_rates,
+            'projected_values': projected_values,
+            'retirement_needs': retirement_needs,
+            'fire_numbers': fire_numbers,
+            'funded_ratio': funded_ratio,
+            'feasible': feasible,
+            'earliest_ages': earliest_ages
+        }
+
     @staticmethod
     def _calculate_retirement_needs(
-            annual_expenses: float,
-            years: int,
+            annual_expenses,
+            years,
             inflation_rate: float,
             return_rate: float
-    ) -> float:
-        """Calculate total retirement needs considering inflation"""
-        try:
-            # Validate inputs
-            if annual_expenses <= 0 or years <= 0:
-                return annual_expenses * years
+    ):
+        """
+        Calculate total retirement needs considering inflation
 
-            # Real return rate
+        annual_expenses and years may be scalars or equal-length arrays; the
+        result has the same shape.
+        """
+        expenses = np.asarray(annual_expenses, dtype=float)
+        years = np.asarray(years, dtype=float)
+        try:
             if return_rate <= inflation_rate:
                 # If real return is negative or zero, sum up inflated expenses
-                total = sum(annual_expenses * (1 + inflation_rate) ** i for i in range(int(years)))
+                whole_years = np.floor(years)
+                if inflation_rate == 0:
+                    total = expenses * whole_years
+                else:
+                    total = expenses * ((1 + inflation_rate) ** whole_years - 1) / inflation_rate
             else:
                 # Present value of growing annuity
-                real_return = (1 + return_rate) / (1 + inflation_rate) - 1
+                growth_factor = (1 + inflation_rate) / (1 + return_rate)
+                total = expenses * (1 - growth_factor ** years) / (1 - growth_factor)
 
-                if real_return <= 0:
-                    total = annual_expenses * years * (1 + inflation_rate) ** (years / 2)
-                else:
-                    # Growing annuity formula
-                    growth_factor = (1 + inflation_rate) / (1 + return_rate)
-                    if abs(growth_factor - 1.0) < 1e-10:  # Avoid division by zero
-                        total = annual_expenses * years
-                    else:
-                        total = annual_expenses * (1 - growth_factor ** years) / (1 - growth_factor)
-
-            return max(total, annual_expenses * years)  # Ensure minimum reasonable value
+            total = np.maximum(total, expenses * years)  # Ensure minimum reasonable value
+            total = np.where((expenses <= 0) | (years <= 0), expenses * years, total)
 
         except Exception as e:
             logger.error(f"Error calculating retirement needs: {e}")
             # Fallback calculation
-            return annual_expenses * years * (1 + inflation_rate) ** (years / 2)
+            total = expenses * years * (1 + inflation_rate) ** (years / 2)
+
+        return float(total) if total.ndim == 0 else total
 
 
 # Additional utility functions that might be needed
@@ -0,0 +1,205 @@
+"""
+Client-side rate limiting for Upstox API calls.
+
+A token bucket per (endpoint, window) keeps every UpstoxService call inside the
+published Upstox limits, and an adaptive multiplier backs the refill rate off
+whenever the server still answers with HTTP 429.
+"""
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limited or transient server errors
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Token bucket allowing `capacity` requests per `period` seconds"""
+
+    def __init__(self, capacity: int, period: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(capacity)
+        self.period = float(period)
+        self.base_rate = self.capacity / self.period  # Tokens per second
+        self.rate = self.base_rate
+        self.tokens = self.capacity
+        self._clock = clock
+        self._last_refill = clock()
+
+    def refill(self):
+        """Add tokens accrued since the last refill"""
+        now = self._clock()
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available (0 if available now)"""
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def throttle(self, factor: float = 0.5, min_fraction: float = 0.05):
+        """Multiplicatively reduce the refill rate after a 429"""
+        self.rate = max(self.base_rate * min_fraction, self.rate * factor)
+        self.tokens = min(self.tokens, 0.0)
+
+    def recover(self, step_fraction: float = 0.1):
+        """Additively restore the refill rate after a successful call"""
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * step_fraction)
+
+
+class RateLimiter:
+    """
+    Per-endpoint token-bucket rate limiter with adaptive backoff
+
+    Budgets map an endpoint name to a list of (requests, period_seconds) windows;
+    a call must fit inside every window of its endpoint. Endpoints without an
+    explicit budget fall back to the 'default' entry.
+    """
+
+    def __init__(
+            self,
+            budgets: Dict[str, Sequence[Tuple[int, float]]],
+            max_retries: int = 5,
+            backoff_base: float = 0.5,
+            backoff_max: float = 30.0,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep
+    ):
+        self.budgets = dict(budgets)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[TokenBucket]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _get_buckets(self, endpoint: str) -> List[TokenBucket]:
+        """Get (or lazily create) the buckets for an endpoint; caller holds the lock"""
+        if endpoint not in self._buckets:
+            windows = self.budgets.get(endpoint) or self.budgets.get('default') or []
+            self._buckets[endpoint] = [TokenBucket(limit, period, self._clock) for limit, period in windows]
+            self._stats[endpoint] = {
+                'requests': 0,
+                'throttled': 0,
+                'throttle_wait_seconds': 0.0,
+                'max_throttle_wait_seconds': 0.0,
+                'rate_limited': 0,
+                'retries': 0,
+                'backoff_seconds': 0.0,
+                'failures': 0
+            }
+        return self._buckets[endpoint]
+
+    def acquire(self, endpoint: str) -> float:
+        """
+        Block until a request to endpoint fits in its budget
+
+        Returns:
+            Seconds spent waiting for a token
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                buckets = self._get_buckets(endpoint)
+                for bucket in buckets:
+                    bucket.refill()
+                wait = max((bucket.wait_time() for bucket in buckets), default=0.0)
+                if wait <= 0:
+                    for bucket in buckets:
+                        bucket.tokens -= 1
+                    stats = self._stats[endpoint]
+                    stats['requests'] += 1
+                    if waited > 0:
+                        stats['throttled'] += 1
+                        stats['throttle_wait_seconds'] += waited
+                        stats['max_throttle_wait_seconds'] = max(stats['max_throttle_wait_seconds'], waited)
+                    return waited
+            self._sleep(wait)
+            waited += wait
+
+    def record_success(self, endpoint: str):
+        """Let the endpoint's refill rate creep back after a 429 backoff"""
+        with self._lock:
+            for bucket in self._get_buckets(endpoint):
+                bucket.recover()
+
+    def record_failure(self, endpoint: str):
+        """Count a call that failed after exhausting its retries"""
+        with self._lock:
+            self._get_buckets(endpoint)
+            self._stats[endpoint]['failures'] += 1
+
+    def backoff(self, endpoint: str, attempt: int, status_code: Optional[int] = None,
+                retry_after: Optional[str] = None) -> float:
+        """
+        Sleep before retrying a failed call
+
+        Honours Retry-After when the server sends one, otherwise uses jittered
+        exponential backoff. A 429 also halves the endpoint's refill rate so the
+        following calls slow down rather than immediately tripping the limit again.
+
+        Returns:
+            Seconds slept
+        """
+        delay = self._parse_retry_after(retry_after)
+        if delay is None:
+            # Full jitter: uniform in [0, base * 2^attempt], capped
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        else:
+            # Small jitter on top of the server's hint so waiters don't retry in lockstep
+            delay = min(self.backoff_max, delay) + random.uniform(0, self.backoff_base)
+
+        with self._lock:
+            buckets = self._get_buckets(endpoint)
+            stats = self._stats[endpoint]
+            stats['retries'] += 1
+            stats['backoff_seconds'] += delay
+            if status_code == 429:
+                stats['rate_limited'] += 1
+                for bucket in buckets:
+                    bucket.throttle()
+
+        logger.warning(f"Retrying {endpoint} in {delay:.2f}s (attempt {attempt + 1}, status {status_code})")
+        self._sleep(delay)
+        return delay
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given either as seconds or as an HTTP date"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            if retry_at.tzinfo is None:
+                retry_at = retry_at.replace(tzinfo=timezone.utc)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint request, throttle and retry counters"""
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._stats.items():
+                result[endpoint] = dict(stats)
+                buckets = self._buckets[endpoint]
+                result[endpoint]['rate_multiplier'] = (
+                    min(b.rate / b.base_rate for b in buckets) if buckets else 1.0
+                )
+            return result
@@ -0,0 +1,66 @@
+"""
+Request-scoped memoization of service results.
+
+A page render asks for the same data through several layers (the projections
+view and get_portfolio_projections both want the portfolio summary, and every
+projection helper wants the market parameters). Methods decorated with
+`request_memoized` compute each distinct call once per request and hand the
+same result to every later caller; the memo lives on flask.g and disappears
+with the request. Outside a request the decorator is a pass-through.
+"""
+
+import inspect
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import g, has_request_context
+
+from utils.metrics import record_cache_lookup
+
+_MISSING = object()
+
+
+def request_memoized(bypass: Optional[str] = None) -> Callable:
+    """
+    Decorator memoizing a method per request, keyed by instance and arguments
+
+    Args:
+        bypass: Name of a boolean argument (e.g. force_refresh) that skips the
+            memo when true and clears it, so later calls see the fresh result
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not has_request_context():
+                return func(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = tuple(bound.arguments.items())[1:]
+
+            if bypass and bound.arguments.get(bypass):
+                clear_request_memo()
+                return func(self, *args, **kwargs)
+
+            key = (func.__qualname__, id(self), arguments)
+            try:
+                hash(key)
+            except TypeError:
+                return func(self, *args, **kwargs)
+
+            memo = g.setdefault('_request_memo', {})
+            result = memo.get(key, _MISSING)
+            record_cache_lookup('request_memo', result is not _MISSING)
+            if result is _MISSING:
+                result = memo[key] = func(self, *args, **kwargs)
+            return result
+        return wrapper
+    return decorator
+
+
+def clear_request_memo():
+    """Drop everything memoized in the current request (after a cache refresh)"""
+    if has_request_context():
+        g.pop('_request_memo', None)
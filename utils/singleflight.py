@@ -0,0 +1,89 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one in-flight call instead of
+each hitting the upstream API (the "thundering herd" on a cold cache).
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight call that followers wait on"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single execution"""
+
+    def __init__(self, name: str = 'singleflight'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, _Call] = {}
+        self.executed = 0   # Calls that actually ran the function
+        self.coalesced = 0  # Calls that waited on another caller's result
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn for key, or wait for an identical in-flight call to finish
+
+        Args:
+            key: Hashable key identifying the logical call (usually the cache key)
+            fn: Zero-argument callable performing the fetch
+
+        Returns:
+            The result of fn, shared by every caller that joined the flight.
+            Exceptions raised by fn are re-raised in every waiting caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"{self.name}: joined in-flight call for {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Number of keys currently being fetched"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring how much work was coalesced"""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls)
+            }
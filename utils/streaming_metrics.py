@@ -0,0 +1,240 @@
+"""
+Incremental return metrics that advance one daily bar at a time.
+
+A StreamingMetrics accumulator keeps Welford mean/variance, the running peak and
+drawdown, and the returns, prefix sums and log growth of every bar it has seen.
+New bars are O(1) to add, and any date window (1M ... 10Y) is answered from
+prefix-sum differences and the window's slice instead of recomputing returns,
+cumprod and std over the whole history.
+"""
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+class StreamingMetrics:
+    """Incremental volatility, Sharpe, drawdown and cumulative return for one return series"""
+
+    def __init__(self, capacity: int = 256):
+        self._capacity = max(1, capacity)
+        self._size = 0
+        self._dates = np.empty(self._capacity, dtype='datetime64[ns]')
+        self._log_growth = np.empty(self._capacity)   # Cumulative log(1 + r) up to each bar
+        self._sum = np.empty(self._capacity)          # Prefix sum of returns
+        self._returns = np.empty(self._capacity)      # Daily return of each bar
+        self.tz = None
+
+        # Welford accumulators and running drawdown over all bars
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.peak_log_growth = 0.0
+        self.max_drawdown_log = 0.0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def first_date(self) -> Optional[pd.Timestamp]:
+        return self._timestamp(self._dates[0]) if self._size else None
+
+    @property
+    def last_date(self) -> Optional[pd.Timestamp]:
+        return self._timestamp(self._dates[self._size - 1]) if self._size else None
+
+    def _timestamp(self, value) -> pd.Timestamp:
+        timestamp = pd.Timestamp(value)
+        return timestamp.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else timestamp
+
+    def _grow(self):
+        """Double the buffers when full"""
+        self._capacity *= 2
+        for name in ('_dates', '_log_growth', '_sum', '_returns'):
+            old = getattr(self, name)
+            new = np.empty(self._capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def update(self, date, daily_return: float):
+        """Advance the accumulator by one bar"""
+        timestamp = pd.Timestamp(date)
+        if self._size == 0:
+            self.tz = timestamp.tz
+        if timestamp.tz is not None:
+            timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+        value = np.datetime64(timestamp.to_datetime64(), 'ns')
+        if self._size and value <= self._dates[self._size - 1]:
+            raise ValueError(f"Bar for {date} is not after the last bar {self.last_date}")
+        if self._size == self._capacity:
+            self._grow()
+
+        r = float(daily_return)
+        index = self._size
+        previous_log = self._log_growth[index - 1] if index else 0.0
+        previous_sum = self._sum[index - 1] if index else 0.0
+
+        log_growth = previous_log + math.log1p(max(r, -0.999999))
+        self._dates[index] = value
+        self._log_growth[index] = log_growth
+        self._sum[index] = previous_sum + r
+        self._returns[index] = r
+        self._size += 1
+
+        # Welford update
+        self.count += 1
+        delta = r - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (r - self.mean)
+
+        # Running peak and drawdown
+        self.peak_log_growth = max(self.peak_log_growth, log_growth)
+        self.max_drawdown_log = min(self.max_drawdown_log, log_growth - self.peak_log_growth)
+
+    def extend(self, returns: pd.Series) -> int:
+        """
+        Append the bars of a returns series that are newer than the last bar seen
+
+        Returns:
+            Number of bars added
+        """
+        if self._size:
+            last = self.last_date
+            returns = returns[returns.index > last]
+        for date, value in zip(returns.index, returns.to_numpy(dtype=float)):
+            self.update(date, 0.0 if np.isnan(value) else value)
+        return len(returns)
+
+    def can_extend(self, returns: pd.Series) -> bool:
+        """
+        Whether extend(returns) leaves the accumulator holding every bar of returns
+
+        True only if the bars of returns up to last_date are all stored already
+        and any newer bars continue from last_date (returns includes it), so
+        appending them leaves no gap. Otherwise the accumulator must be rebuilt.
+        """
+        if not self._size:
+            return False
+        if returns.empty:
+            return True
+        incoming = returns.index
+        if (incoming.tz is None) != (self.tz is None):
+            return False
+
+        last = self.last_date
+        seen = incoming[incoming <= last]
+        if len(seen) < len(incoming) and (len(seen) == 0 or seen[-1] != last):
+            return False
+        return bool(seen.isin(self._date_index()).all())
+
+    def _as_timestamp(self, value) -> pd.Timestamp:
+        """Make a date comparable with the stored (possibly tz-aware) bars"""
+        timestamp = pd.Timestamp(value)
+        if self.tz is not None and timestamp.tz is None:
+            timestamp = timestamp.tz_localize(self.tz)
+        elif self.tz is None and timestamp.tz is not None:
+            timestamp = timestamp.tz_localize(None)
+        return timestamp
+
+    def _date_index(self) -> pd.DatetimeIndex:
+        """Stored bar dates in the series' timezone"""
+        dates = pd.DatetimeIndex(self._dates[:self._size])
+        if self.tz is not None:
+            dates = dates.tz_localize('UTC').tz_convert(self.tz)
+        return dates
+
+    def _window_bounds(self, start_date=None, end_date=None):
+        """Index of the first and last bar inside [start_date, end_date]"""
+        dates = self._date_index()
+        first = 0 if start_date is None else int(dates.searchsorted(self._as_timestamp(start_date), side='left'))
+        last = self._size - 1 if end_date is None else int(dates.searchsorted(self._as_timestamp(end_date), side='right')) - 1
+        return first, last, dates
+
+    def metrics(self) -> Dict[str, float]:
+        """All-history metrics straight from the Welford and drawdown accumulators"""
+        if self.count < 2:
+            return self._empty_metrics()
+        std = math.sqrt(self.m2 / (self.count - 1))
+        if std == 0:
+            return self._empty_metrics()
+        return {
+            'volatility': std * math.sqrt(TRADING_DAYS),
+            'sharpe': self.mean / std * math.sqrt(TRADING_DAYS),
+            'max_drawdown': math.expm1(self.max_drawdown_log),
+            'total_return': math.expm1(self._log_growth[self._size - 1])
+        }
+
+    def window_metrics(self, start_date=None, end_date=None) -> Dict:
+        """
+        Metrics for the bars between start_date and end_date
+
+        Growth is measured from the close of the first bar in the window, so the
+        window's returns are the bars after it. The mean comes from prefix-sum
+        differences and the variance from the window's returns centred on that mean
+        (E[x^2] - E[x]^2 from prefix sums cancels badly for small daily returns);
+        total return, drawdown and the cumulative curve only touch the window's
+        slice of the stored log-growth curve.
+
+        Returns:
+            Same keys as FinancialCalculator.calculate_metrics
+        """
+        first, last, dates = self._window_bounds(start_date, end_date)
+        n = last - first
+        if n < 2:
+            return {**self._empty_metrics(), 'cumulative_returns': pd.Series(dtype=float)}
+
+        total = self._sum[last] - self._sum[first]
+        mean = total / n
+        deviations = self._returns[first + 1:last + 1] - mean
+        variance = float(deviations @ deviations) / (n - 1)
+        std = math.sqrt(variance)
+        if std <= 1e-12:
+            return {**self._empty_metrics(), 'cumulative_returns': pd.Series(dtype=float)}
+
+        log_growth = self._log_growth[first:last + 1] - self._log_growth[first]
+        drawdown = log_growth - np.maximum.accumulate(log_growth)
+
+        return {
+            'volatility': std * math.sqrt(TRADING_DAYS),
+            'sharpe': mean / std * math.sqrt(TRADING_DAYS),
+            'max_drawdown': float(np.expm1(drawdown.min())),
+            'total_return': float(np.expm1(log_growth[-1])),
+            'cumulative_returns': pd.Series(np.expm1(log_growth), index=dates[first:last + 1])
+        }
+
+    @staticmethod
+    def _empty_metrics() -> Dict[str, float]:
+        return {'volatility': 0, 'sharpe': 0, 'max_drawdown': 0, 'total_return': 0}
+
+    def to_dict(self) -> Dict:
+        """Serializable state for persisting next to the candle store"""
+        dates = self._dates[:self._size].astype('int64')
+        returns = self._returns[:self._size]
+        return {
+            'tz': str(self.tz) if self.tz is not None else None,
+            'dates': dates.tolist(),
+            'returns': returns.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'StreamingMetrics':
+        """Rebuild an accumulator from to_dict() output"""
+        accumulator = cls(capacity=max(256, len(state['dates'])))
+        tz = state.get('tz')
+        for date, value in zip(state['dates'], state['returns']):
+            timestamp = pd.Timestamp(date)
+            if tz:
+                timestamp = timestamp.tz_localize('UTC').tz_convert(tz)
+            accumulator.update(timestamp, value)
+        return accumulator
+
+    @classmethod
+    def from_returns(cls, returns: pd.Series) -> 'StreamingMetrics':
+        """Build an accumulator from a full returns series"""
+        accumulator = cls(capacity=max(256, len(returns)))
+        accumulator.extend(returns)
+        return accumulator
@@ -0,0 +1,221 @@
+"""
+Request-scoped timing spans.
+
+While a request is traced, every `timed` function and `span` block adds its
+duration to the request's trace; the totals go out as a Server-Timing header
+and into a rolling per-route breakdown. Spans are inclusive, so a service span
+contains the Upstox spans it triggered.
+
+With timing disabled (or outside a request) no trace is active and each span
+costs a single ContextVar lookup.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+from flask import Flask, g, request, before_render_template, template_rendered
+
+logger = logging.getLogger(__name__)
+
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('timing_trace', default=None)
+
+
+class Trace:
+    """Span totals collected during one request"""
+
+    __slots__ = ('start', 'spans')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: Dict[str, list] = {}  # name -> [calls, seconds]
+
+    def add(self, name: str, seconds: float):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+@contextmanager
+def span(name: str):
+    """Time a block under name if a trace is active"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call under name if a trace is active"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                trace.add(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def start_trace():
+    """Begin collecting spans in the current context; returns a reset token"""
+    return _current_trace.set(Trace())
+
+
+def end_trace(token) -> Optional[Trace]:
+    """Stop collecting spans and return the finished trace"""
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    return trace
+
+
+def server_timing_header(trace: Trace, total: float) -> str:
+    """Format a trace as a Server-Timing header value (milliseconds, slowest first)"""
+    entries = [f'total;dur={total * 1000:.1f}']
+    for name, (calls, seconds) in sorted(trace.spans.items(), key=lambda item: -item[1][1]):
+        entry = f'{name};dur={seconds * 1000:.1f}'
+        if calls > 1:
+            entry += f';desc="{calls} calls"'
+        entries.append(entry)
+    return ', '.join(entries)
+
+
+class RouteTimings:
+    """Rolling window of recent request timings per route"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._requests: Dict[str, Deque[Tuple[float, Dict[str, list]]]] = {}
+
+    def record(self, route: str, total: float, spans: Dict[str, list]):
+        with self._lock:
+            history = self._requests.get(route)
+            if history is None:
+                history = self._requests[route] = deque(maxlen=self.window)
+            history.append((total, spans))
+
+    def breakdown(self) -> Dict[str, Dict]:
+        """
+        Latency summary per route over the rolling window
+
+        Returns:
+            Dictionary per route with the request count, total latency
+            percentiles and, per span, mean milliseconds per request, calls per
+            request and share of total request time
+        """
+        with self._lock:
+            snapshot = {route: list(history) for route, history in self._requests.items()}
+
+        result = {}
+        for route, history in snapshot.items():
+            totals = np.array([total for total, _ in history]) * 1000
+            span_totals: Dict[str, list] = {}
+            for _, spans in history:
+                for name, (calls, seconds) in spans.items():
+                    entry = span_totals.setdefault(name, [0, 0.0])
+                    entry[0] += calls
+                    entry[1] += seconds * 1000
+
+            requests = len(history)
+            result[route] = {
+                'requests': requests,
+                'total_ms': {
+                    'mean': float(totals.mean()),
+                    'p50': float(np.percentile(totals, 50)),
+                    'p95': float(np.percentile(totals, 95)),
+                    'max': float(totals.max())
+                },
+                'spans': {
+                    name: {
+                        'mean_ms': milliseconds / requests,
+                        'calls_per_request': calls / requests,
+                        'share': milliseconds / totals.sum() if totals.sum() > 0 else 0.0
+                    }
+                    for name, (calls, milliseconds) in sorted(span_totals.items(), key=lambda item: -item[1][1])
+                }
+            }
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._requests.clear()
+
+
+# Shared by every app instance in the process
+route_timings = RouteTimings()
+
+
+def init_timing(app: Flask, window: int = 200):
+    """
+    Trace every request of app
+
+    Adds the Server-Timing header, records the rolling per-route breakdown and
+    times template rendering. Only call this when timing is enabled; without it
+    no trace is ever started and spans are no-ops.
+    """
+    route_timings.window = window
+
+    @app.before_request
+    def _start_request_trace():
+        g._timing_token = start_trace()
+
+    @app.after_request
+    def _finish_request_trace(response):
+        token = g.pop('_timing_token', None)
+        if token is None:
+            return response
+
+        trace = end_trace(token)
+        total = trace.elapsed()
+        response.headers['Server-Timing'] = server_timing_header(trace, total)
+
+        if request.endpoint != 'static':
+            route = request.url_rule.rule if request.url_rule else request.path
+            route_timings.record(route, total, trace.spans)
+        return response
+
+    @app.teardown_request
+    def _discard_request_trace(exc):
+        # after_request is skipped when the view raises
+        token = g.pop('_timing_token', None)
+        if token is not None:
+            end_trace(token)
+
+    def _template_started(sender, template, context, **extra):
+        g._template_start = time.perf_counter()
+
+    def _template_finished(sender, template, context, **extra):
+        started = g.pop('_template_start', None)
+        trace = _current_trace.get()
+        if started is not None and trace is not None:
+            trace.add('template', time.perf_counter() - started)
+
+    before_render_template.connect(_template_started, app, weak=False)
+    template_rendered.connect(_template_finished, app, weak=False)
+
+    logger.info("Request timing enabled (Server-Timing headers, /api/timing)")